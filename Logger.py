@@ -1,22 +1,75 @@
 import csv
 import datetime
+import heapq
+import io
+import itertools
 import json
 import os
 import shutil
+import operator
+import time
 import zipfile
-from typing import Iterator, Dict, Optional
+from typing import Iterator, Dict, List, NamedTuple, Optional
+
+import lazy_import
+import timecodec
+from calibration import CalibrationTable
+from chunk_cache import ChunkCache
+from log_maintenance import ArchiveManifest, MaintenanceWorker, is_archive_name
+from metrics import REGISTRY
+from partitions import PARTITION_DIRNAME, PartitionLayout, PartitionWriter
+from write_policy import WriteFilter, reconstruct
+
+# Bez NumPy porcje logów filtrowane są wiersz po wierszu
+np = lazy_import.optional("numpy")
+
+_FLUSH_SECONDS = REGISTRY.histogram("logger_flush_seconds", "Czas zapisu bufora do pliku CSV")
+_ROWS_WRITTEN = REGISTRY.counter("logger_rows_written_total", "Liczba wierszy zapisanych do plików CSV")
+_ROTATE_SECONDS = REGISTRY.histogram("logger_rotate_seconds", "Czas pełnej rotacji pliku logów")
+_ARCHIVE_SECONDS = REGISTRY.histogram("logger_archive_seconds", "Czas archiwizacji (kompresji) pliku logów")
+_RETENTION_SECONDS = REGISTRY.histogram("logger_retention_seconds", "Czas usuwania wygasłych archiwów")
+_ARCHIVES_EXPIRED = REGISTRY.counter("logger_archives_expired_total",
+                                     "Liczba archiwów i plików partycji usuniętych przez retencję")
+
+# Liczba wierszy CSV dekodowanych naraz przy odczycie logów
+READ_CHUNK_ROWS = 4096
+# Wartość "brak czasu" w kolumnie mikrosekund (jak NaT w NumPy) - zawsze poza zakresem zapytania
+_NAT_MICROS = -2 ** 63
+# Przedział agregacji obejmujący cały plik (podsumowanie archiwum w manifeście)
+_ROLLUP_SPAN_US = 2 ** 62
+
+
+class LogChunk(NamedTuple):
+    """Porcja wierszy logu w układzie kolumnowym."""
+    timestamps: object  # mikrosekundy od EPOCH (tablica NumPy int64 lub lista)
+    sensor_ids: List[Optional[str]]
+    values: object  # tablica float64 lub lista float/None
+    units: List[Optional[str]]
+
+
+class FileRange(NamedTuple):
+    """Zakres czasu wierszy pliku logu zapamiętany po pełnym odczycie (ważny, dopóki plik się nie zmieni)."""
+    mtime_ns: int
+    size: int
+    min_us: Optional[int]  # None - plik bez poprawnych wierszy
+    max_us: Optional[int]
 
 
 class Logger:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, clock=None):
         """
         Inicjalizuje logger na podstawie pliku JSON.
         :param config_path: Ścieżka do pliku konfiguracyjnego (.json)
+        :param clock: Zegar z metodą now() (np. simulation.SimulationClock) używany do nazw plików
+                      i rotacji czasowej; domyślnie czas rzeczywisty
         """
+        self.clock = clock
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = json.load(f)
+        # Ścieżki względne z konfiguracji liczone są od katalogu pliku konfiguracyjnego, nie od katalogu roboczego
+        self.config_dir = os.path.dirname(os.path.abspath(config_path))
 
-        self.log_dir = self.config.get("log_dir", "./logs")
+        self.log_dir = self._resolve_path(self.config.get("log_dir", "./logs"))
         self.filename_pattern = self.config.get("filename_pattern", "sensors_%Y%m%d.csv")
         self.buffer_size = self.config.get("buffer_size", 10)  # Domyślnie 10 dla testów, specyfikacja mówi 200
         self.rotate_every_hours = self.config.get("rotate_every_hours")
@@ -26,24 +79,78 @@ class Logger:
         self.compress_archive = self.config.get("compress_archive", True)  # Domyślnie kompresuj
 
         self.archive_dir = os.path.join(self.log_dir, "archive")
+        # Zamknięte pliki czekające na archiwizację (nazwy już unikalne w archiwum)
+        self.pending_dir = os.path.join(self.log_dir, "pending")
         os.makedirs(self.log_dir, exist_ok=True)
         os.makedirs(self.archive_dir, exist_ok=True)
+        os.makedirs(self.pending_dir, exist_ok=True)
+        self.manifest = ArchiveManifest(self.archive_dir)
+        # Kompresja i retencja w wątku utrzymania - rotacja tylko zamyka i przenosi plik
+        self.background_maintenance = self.config.get("background_maintenance", True)
+        self._maintenance = MaintenanceWorker() if self.background_maintenance else None
+        self._recovered = False
+        # Opcjonalny układ partycjonowany: zamiast wspólnego pliku dziennego katalog na czujnik
+        # (lub grupę czujników) i plik na przedział czasu - zapytania o czujnik czytają tylko swoje pliki
+        partition_by = self.config.get("partition_by")
+        self.partitions: Optional[PartitionLayout] = None
+        self._partition_writer: Optional[PartitionWriter] = None
+        self._buffer_micros: List[int] = []
+        if partition_by:
+            self.partitions = PartitionLayout(os.path.join(self.log_dir, PARTITION_DIRNAME), by=partition_by,
+                                              groups=self.config.get("partition_groups", 16),
+                                              bucket_hours=self.config.get("partition_hours", 24))
+            self._partition_writer = PartitionWriter(self.partitions,
+                                                     max_open_files=self.config.get("partition_open_files", 64))
 
         self.buffer = []
         self.current_file_path = None
         self.current_file_writer = None
         self.current_file_handle = None
         self.current_file_lines = 0
-        self.last_rotation_time = datetime.datetime.now()
+        self.last_rotation_time = self._now()
+        # Indeks zakresów czasu plików: pozwala pominąć pliki spoza zakresu zapytania bez ich czytania
+        self._file_ranges: Dict[str, FileRange] = {}
+        # Zdekodowane porcje plików w pamięci (0 - wyłączone); archiwa nie zmieniają się, więc
+        # powtarzane zapytania o te same dni nie wymagają ponownej dekompresji
+        cache_max_mb = self.config.get("cache_max_mb", 64)
+        self.chunk_cache = ChunkCache(int(cache_max_mb * 1024 * 1024)) if cache_max_mb else None
+        # Kalibracja stosowana przy odczycie (read_logs/aggregate_logs); pliki zawierają surowe wartości
+        calibration_file = self.config.get("calibration_file")
+        self.calibration: Optional[CalibrationTable] = (CalibrationTable.load(self._resolve_path(calibration_file))
+                                                        if calibration_file else None)
+        # Polityki zapisu (deadband, swinging door, max_silence_s) per czujnik - None: zapis każdego odczytu
+        write_policies = self.config.get("write_policies")
+        self.write_filter: Optional[WriteFilter] = WriteFilter(write_policies) if write_policies else None
+        # Dziennik odczytów wstrzymanych przez polityki (zapisywany przy flush, przenoszony do logu przy start)
+        self.policy_journal_path = os.path.join(self.log_dir, "write_policy.journal")
+
+    def _resolve_path(self, path: str) -> str:
+        """Ścieżka z konfiguracji: względna liczona od katalogu pliku konfiguracyjnego."""
+        return os.path.normpath(os.path.join(self.config_dir, path))
+
+    def _now(self) -> datetime.datetime:
+        if self.clock is not None:
+            return self.clock.now()
+        return datetime.datetime.now()
 
     def start(self) -> None:
         """
         Otwiera nowy plik CSV do logowania. Jeśli plik jest nowy, zapisuje nagłówek.
+        W układzie partycjonowanym pliki otwierane są dopiero przy zapisie.
         """
         if self.current_file_handle:
-            self.stop()  # Zamknij poprzedni plik jeśli istnieje
+            self._close_file()  # Zamknij poprzedni plik jeśli istnieje
+        replay_journal = not self._recovered
+        if not self._recovered:
+            # Raz na proces: uzgodnienie manifestu i dokończenie archiwizacji przerwanej np. awarią
+            self._recovered = True
+            self._run_maintenance(self._recover_archives, sorted(os.listdir(self.pending_dir)))
+        if self._partition_writer is not None:
+            if replay_journal:
+                self._replay_policy_journal()
+            return  # Pliki partycji otwierane są przy zapisie bufora
 
-        timestamp = datetime.datetime.now()
+        timestamp = self._now()
         self.current_file_path = os.path.join(self.log_dir, timestamp.strftime(self.filename_pattern))
 
         file_exists = os.path.exists(self.current_file_path)
@@ -64,13 +171,32 @@ class Logger:
                 reader = csv.reader(f_count)
                 self.current_file_lines = sum(1 for row in reader)
 
-        self.last_rotation_time = datetime.datetime.now()  # Resetujemy czas ostatniej rotacji
+        self.last_rotation_time = self._now()  # Resetujemy czas ostatniej rotacji
+        if replay_journal:
+            self._replay_policy_journal()
 
     def stop(self) -> None:
         """
-        Wymusza zapis bufora i zamyka bieżący plik.
+        Wymusza zapis bufora (z odczytami wstrzymanymi przez polityki zapisu), zamyka bieżący plik
+        i czeka na zakończenie zleconych prac utrzymania archiwów.
         """
+        if self.write_filter is not None:
+            for row, row_us in self.write_filter.drain():
+                self._append_row(row, row_us)
+        self._close_file()
+        if self.write_filter is not None:
+            self._remove_policy_journal()
+        self.wait_for_maintenance()
+
+    def wait_for_maintenance(self) -> None:
+        """Czeka, aż wątek utrzymania zarchiwizuje zamknięte pliki i zastosuje retencję."""
+        if self._maintenance is not None:
+            self._maintenance.drain()
+
+    def _close_file(self) -> None:
         self._flush_buffer()
+        if self._partition_writer is not None:
+            self._partition_writer.close()
         if self.current_file_handle:
             self.current_file_handle.close()
             self.current_file_handle = None
@@ -78,6 +204,79 @@ class Logger:
             self.current_file_path = None
             self.current_file_lines = 0
 
+    def flush(self, sync: bool = False) -> None:
+        """
+        Zapisuje bufor do bieżącego pliku bez jego zamykania. Odczyty wstrzymane przez polityki zapisu
+        trafiają do dziennika write_policy.journal - po awarii przenoszone są do logu przy start(),
+        więc każdy odczyt przekazany do log_reading przed flush() jest trwały.
+
+        :param sync: Czy dodatkowo wymusić zapis na nośnik (os.fsync) - trwałość kosztem opóźnienia
+        """
+        self._flush_buffer()
+        if sync and self.current_file_handle:
+            os.fsync(self.current_file_handle.fileno())
+        if sync and self._partition_writer is not None:
+            self._partition_writer.sync()
+        if self.write_filter is not None:
+            self._write_policy_journal(sync)
+
+    def _write_policy_journal(self, sync: bool) -> None:
+        pending = self.write_filter.pending()
+        if not pending:
+            self._remove_policy_journal()
+            return
+        temp_path = self.policy_journal_path + ".tmp"
+        with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(row for row, _ in pending)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, self.policy_journal_path)
+
+    def _remove_policy_journal(self) -> None:
+        try:
+            os.remove(self.policy_journal_path)
+        except FileNotFoundError:
+            pass
+
+    def _replay_policy_journal(self) -> None:
+        """
+        Przenosi do logu odczyty wstrzymane przez polityki zapisu, których nie zapisano przed awarią.
+        Dziennik aktualizowany jest tylko przy flush(), więc wiersz mógł trafić do pliku później (zapis
+        pełnego bufora) - pomijane są wiersze nie nowsze od ostatniego zapisanego odczytu czujnika.
+        """
+        try:
+            with open(self.policy_journal_path, 'r', newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+        except FileNotFoundError:
+            return
+        entries = []
+        for row in rows:
+            try:
+                row_us = timecodec.to_micros(timecodec.parse_datetime(row[0]))
+                row[2] = float(row[2])
+            except (IndexError, ValueError):
+                continue  # Wiersz uszkodzony w trakcie awarii
+            entries.append((row, row_us))
+        if entries:
+            last_written = self._last_written_micros({row[1] for row, _ in entries},
+                                                     min(row_us for _, row_us in entries))
+            for row, row_us in entries:
+                if row[1] not in last_written or row_us > last_written[row[1]]:
+                    self._append_row(row, row_us)
+        self.flush(sync=True)
+        self._remove_policy_journal()
+
+    def _last_written_micros(self, sensor_ids: set, start_us: int) -> Dict[str, int]:
+        """Czas ostatniego zapisanego odczytu (od start_us) dla każdego z podanych czujników."""
+        last: Dict[str, int] = {}
+        for entry in self.read_logs(timecodec.from_micros(start_us), datetime.datetime.max, calibrated=False):
+            sensor_id = entry["sensor_id"]
+            if sensor_id in sensor_ids:
+                entry_us = timecodec.to_micros(entry["timestamp"])
+                last[sensor_id] = max(entry_us, last.get(sensor_id, entry_us))
+        return last
+
     def log_reading(
             self,
             sensor_id: str,
@@ -87,26 +286,86 @@ class Logger:
     ) -> None:
         """
         Dodaje wpis do bufora i ewentualnie wykonuje rotację pliku.
+        Przy polityce zapisu czujnika (write_policies) odczyt może zostać pominięty lub zapisany później.
         """
-        if not self.current_file_handle:
+        if self._partition_writer is not None:
+            if not self._recovered:
+                self.start()
+        elif not self.current_file_handle:
             # Jeśli plik nie jest otwarty (np. po pierwszym uruchomieniu lub po rotacji)
             self.start()
 
-        self.buffer.append([timestamp.isoformat(), sensor_id, value, unit])
+        row = [timecodec.format_datetime(timestamp), sensor_id, value, unit]
+        if self.write_filter is None:
+            row_us = timecodec.to_micros(timestamp) if self._partition_writer is not None else None
+            self._append_row(row, row_us)
+        else:
+            for kept_row, row_us in self.write_filter.offer(sensor_id, timecodec.to_micros(timestamp), value, row):
+                self._append_row(kept_row, row_us)
+
+        if self._partition_writer is None:
+            self._check_and_perform_rotation()
 
+    def _append_row(self, row: list, row_us: Optional[int]) -> None:
+        self.buffer.append(row)
+        if self._partition_writer is not None:
+            self._buffer_micros.append(row_us)
         if len(self.buffer) >= self.buffer_size:
             self._flush_buffer()
 
-        self._check_and_perform_rotation()
+    def write_stats(self) -> Dict[str, dict]:
+        """
+        Skutek polityk zapisu od uruchomienia: dla każdego czujnika z polityką liczba odczytów
+        (received), zapisanych wierszy (stored) i krotność redukcji (received / stored).
+        """
+        return self.write_filter.stats() if self.write_filter is not None else {}
 
     def _flush_buffer(self) -> None:
         """Wewnętrzna metoda do zapisu bufora do pliku."""
-        if self.current_file_writer and self.buffer:
+        if self._partition_writer is not None:
+            self._flush_partitions()
+        elif self.current_file_writer and self.buffer:
+            t0 = time.perf_counter()
             self.current_file_writer.writerows(self.buffer)
             self.current_file_lines += len(self.buffer)
+            _ROWS_WRITTEN.inc(len(self.buffer))
             self.buffer.clear()
             if self.current_file_handle:  # Upewnij się, że plik jest otwarty
                 self.current_file_handle.flush()  # Wymuś zapis na dysk
+            if self.chunk_cache is not None:
+                self.chunk_cache.invalidate(self.current_file_path)
+            _FLUSH_SECONDS.observe(time.perf_counter() - t0)
+
+    def _flush_partitions(self) -> None:
+        """Zapis bufora do plików partycji; początek nowego przedziału czasu uruchamia retencję partycji."""
+        if not self.buffer:
+            return
+        t0 = time.perf_counter()
+        newest = self._partition_writer.newest_bucket
+        touched = self._partition_writer.write(self.buffer, self._buffer_micros)
+        _ROWS_WRITTEN.inc(len(self.buffer))
+        self.buffer.clear()
+        self._buffer_micros.clear()
+        if self.chunk_cache is not None:
+            for path in touched:
+                self.chunk_cache.invalidate(path)
+        if self._partition_writer.newest_bucket != newest:
+            self._run_maintenance(self._expire_partitions)
+        _FLUSH_SECONDS.observe(time.perf_counter() - t0)
+
+    def _expire_partitions(self) -> None:
+        """
+        Usuwa pliki partycji, których przedział zakończył się ponad `retention_days` dni temu.
+        Przedziały odpowiadają czasowi odczytów, więc granica liczona jest według zegara Loggera.
+        """
+        if self.retention_days is None:
+            return
+        cutoff_us = timecodec.to_micros(self._now() - datetime.timedelta(days=self.retention_days))
+        with _RETENTION_SECONDS.time():
+            for path in self.partitions.expire(cutoff_us):
+                _ARCHIVES_EXPIRED.inc()
+                if self.chunk_cache is not None:
+                    self.chunk_cache.invalidate(path)
 
     def _check_and_perform_rotation(self) -> None:
         """Sprawdza warunki rotacji i wykonuje ją w razie potrzeby."""
@@ -114,7 +373,7 @@ class Logger:
             return
 
         perform_rotation = False
-        now = datetime.datetime.now()
+        now = self._now()
 
         # 1. Interwał czasowy
         if self.rotate_every_hours:
@@ -143,82 +402,500 @@ class Logger:
             self._rotate()
 
     def _rotate(self) -> None:
-        """Wykonuje proces rotacji: archiwizuje stary plik, czyści stare archiwa, otwiera nowy plik."""
-        # print(f"DEBUG: Rozpoczynanie rotacji dla {self.current_file_path}")
+        """
+        Wykonuje rotację: zamyka bieżący plik, przenosi go do katalogu pending/ pod unikalną nazwą
+        archiwum i otwiera nowy plik. Kompresja i retencja wykonywane są w wątku utrzymania
+        (background_maintenance), więc rotacja nie blokuje zapisu.
+        """
+        t0 = time.perf_counter()
         old_file_path = self.current_file_path
 
-        self.stop()  # Zapisuje bufor i zamyka bieżący plik
+        self._close_file()  # Zapisuje bufor i zamyka bieżący plik
 
         if old_file_path and os.path.exists(old_file_path):  # Sprawdź czy plik faktycznie istnieje
-            self._archive(old_file_path)
+            pending_path = os.path.join(self.pending_dir,
+                                        self._unique_archive_name(os.path.basename(old_file_path)))
+            os.replace(old_file_path, pending_path)
+            self._run_maintenance(self._archive, pending_path)
+        if self.chunk_cache is not None and old_file_path:
+            self.chunk_cache.invalidate(old_file_path)
 
-        self._clean_old_archives()
+        self._run_maintenance(self._expire_archives)
 
         self.start()  # Otwiera nowy plik logów
-        self.last_rotation_time = datetime.datetime.now()  # Aktualizacja czasu ostatniej rotacji
-        # print("DEBUG: Rotacja zakończona, nowy plik otwarty.")
+        self.last_rotation_time = self._now()  # Aktualizacja czasu ostatniej rotacji
+        _ROTATE_SECONDS.observe(time.perf_counter() - t0)
+
+    def _run_maintenance(self, func, *args) -> None:
+        """Zleca zadanie wątkowi utrzymania albo (bez background_maintenance) wykonuje je od razu."""
+        if self._maintenance is not None:
+            self._maintenance.submit(func, *args)
+        else:
+            func(*args)
+
+    def _unique_archive_name(self, filename: str) -> str:
+        """
+        Zwraca nazwę niezajętą w archiwum ani w pending/ - kolejne rotacje z tego samego dnia
+        dostają przyrostek _1, _2, ... zamiast nadpisywać wcześniejsze archiwum.
+        """
+        stem, ext = os.path.splitext(filename)
+        candidate = filename
+        n = 0
+        while (os.path.exists(os.path.join(self.pending_dir, candidate))
+               or os.path.exists(os.path.join(self.archive_dir, candidate))
+               or os.path.exists(os.path.join(self.archive_dir, candidate + ".zip"))):
+            n += 1
+            candidate = f"{stem}_{n}{ext}"
+        return candidate
 
     def _archive(self, file_path_to_archive: str) -> None:
-        """Archiwizuje podany plik."""
+        """Archiwizuje podany plik (synchronicznie) i dopisuje go do manifestu."""
         if not os.path.exists(file_path_to_archive):
             # print(f"DEBUG: Plik {file_path_to_archive} nie istnieje, pomijanie archiwizacji.")
             return
 
+        with _ARCHIVE_SECONDS.time():
+            self._archive_file(file_path_to_archive)
+
+    def _archive_file(self, file_path_to_archive: str) -> None:
         base_filename = os.path.basename(file_path_to_archive)
+        if os.path.dirname(os.path.abspath(file_path_to_archive)) != os.path.abspath(self.pending_dir):
+            base_filename = self._unique_archive_name(base_filename)  # Nazwy w pending/ są już zarezerwowane
         archive_target_path = os.path.join(self.archive_dir, base_filename)
+        rollup = self._rollup(file_path_to_archive)
 
         if self.compress_archive:
             archive_target_path += ".zip"
+            tmp_path = archive_target_path + ".tmp"
             try:
-                with zipfile.ZipFile(archive_target_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                    zipf.write(file_path_to_archive, base_filename)
+                # Plik tymczasowy - odczyt nigdy nie trafi na niedokończone archiwum
+                with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                    if self.clock is None:
+                        zipf.write(file_path_to_archive, base_filename)
+                    else:
+                        # Symulacja: data wpisu z ostatniego odczytu zamiast mtime - ten sam seed daje identyczne archiwa
+                        info = zipfile.ZipInfo(base_filename, date_time=self._entry_date_time(rollup))
+                        info.compress_type = zipfile.ZIP_DEFLATED
+                        with open(file_path_to_archive, 'rb') as src, zipf.open(info, 'w', force_zip64=True) as dst:
+                            shutil.copyfileobj(src, dst)
+                os.replace(tmp_path, archive_target_path)
                 os.remove(file_path_to_archive)  # Usuń oryginał po skompresowaniu
-                # print(f"DEBUG: Zarchiwizowano i skompresowano {file_path_to_archive} do {archive_target_path}")
             except Exception as e:
                 print(f"Błąd podczas kompresji pliku {file_path_to_archive}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
                 # Jeśli kompresja się nie uda, spróbuj przenieść plik bez kompresji
+                archive_target_path = os.path.join(self.archive_dir, base_filename)
                 try:
-                    shutil.move(file_path_to_archive, os.path.join(self.archive_dir, base_filename))
-                    # print(f"DEBUG: Przeniesiono (bez kompresji) {file_path_to_archive} do archiwum po błędzie kompresji.")
+                    shutil.move(file_path_to_archive, archive_target_path)
                 except Exception as e_move:
                     print(f"Błąd podczas przenoszenia pliku {file_path_to_archive} do archiwum: {e_move}")
+                    return
         else:
             try:
                 shutil.move(file_path_to_archive, archive_target_path)
-                # print(f"DEBUG: Zarchiwizowano (bez kompresji) {file_path_to_archive} do {archive_target_path}")
             except Exception as e:
                 print(f"Błąd podczas przenoszenia pliku {file_path_to_archive} do archiwum: {e}")
+                return
 
-    def _clean_old_archives(self) -> None:
-        """Usuwa archiwa starsze niż `retention_days`."""
+        if self.chunk_cache is not None:
+            self.chunk_cache.invalidate(file_path_to_archive)
+        stat = os.stat(archive_target_path)
+        self.manifest.add(dict(name=os.path.basename(archive_target_path), archived_at=time.time(),
+                               mtime_ns=stat.st_mtime_ns, size=stat.st_size, **rollup))
+
+    @staticmethod
+    def _entry_date_time(rollup: Dict) -> tuple:
+        """Data wpisu ZIP z czasu ostatniego odczytu w pliku (format ZIP nie obsługuje dat sprzed 1980 r.)."""
+        if rollup["max_us"] is None:
+            return (1980, 1, 1, 0, 0, 0)
+        return max(timecodec.from_micros(rollup["max_us"]).timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+
+    def _rollup(self, file_path: str) -> Dict:
+        """Podsumowanie pliku do manifestu: liczba wierszy, zakres czasu i [liczba, suma, min, max] każdego czujnika."""
+        rows = 0
+        low = high = None
+        sensors: Dict[str, List[float]] = {}
+        for raw_rows, columns in self._iter_row_blocks(file_path):
+            chunk = _decode_chunk(raw_rows, columns)
+            rows += len(raw_rows)
+            low, high = _merge_range(low, high, chunk.timestamps)
+            for (_, sid), count, total, vmin, vmax, _ in self._aggregate_chunk(
+                    chunk, -_ROLLUP_SPAN_US, _ROLLUP_SPAN_US, None, _ROLLUP_SPAN_US):
+                if sid is None:
+                    continue
+                entry = sensors.get(sid)
+                if entry is None:
+                    sensors[sid] = [int(count), total, vmin, vmax]
+                else:
+                    entry[0] += int(count)
+                    entry[1] += total
+                    entry[2] = min(entry[2], vmin)
+                    entry[3] = max(entry[3], vmax)
+        return {"rows": rows, "min_us": low, "max_us": high, "sensors": sensors}
+
+    def _expire_archives(self) -> None:
+        """
+        Usuwa archiwa starsze niż `retention_days` według manifestu - bez listowania katalogu.
+        Retencja dotyczy rzeczywistych plików na dysku, więc zawsze liczona jest według czasu rzeczywistego.
+        """
         if self.retention_days is None:
             return
 
-        now = datetime.datetime.now()
-        cutoff_date = now - datetime.timedelta(days=self.retention_days)
-
-        for filename in os.listdir(self.archive_dir):
-            file_path = os.path.join(self.archive_dir, filename)
-            try:
-                file_mod_time_dt = datetime.datetime.fromtimestamp(os.path.getmtime(file_path))
-                if file_mod_time_dt < cutoff_date:
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.retention_days)).timestamp()
+        with _RETENTION_SECONDS.time():
+            for entry in self.manifest.pop_expired(cutoff):
+                file_path = os.path.join(self.archive_dir, entry["name"])
+                try:
                     os.remove(file_path)
-                    # print(f"DEBUG: Usunięto stare archiwum: {file_path}")
-            except OSError as e:
-                print(f"Błąd podczas usuwania starego archiwum {file_path}: {e}")
-            except Exception as e:
-                print(f"Nieoczekiwany błąd podczas przetwarzania archiwum {file_path}: {e}")
+                    _ARCHIVES_EXPIRED.inc()
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Błąd podczas usuwania starego archiwum {file_path}: {e}")
+                if self.chunk_cache is not None:
+                    self.chunk_cache.invalidate(file_path)
+
+    def _clean_old_archives(self) -> None:
+        """
+        Pełny przebieg retencji: uzgadnia manifest z katalogiem archiwów (archiwa dodane z zewnątrz)
+        i usuwa archiwa starsze niż `retention_days`.
+        """
+        if self.retention_days is None:
+            return
+        self.manifest.reconcile()
+        self._expire_archives()
+
+    def _recover_archives(self, leftover: List[str]) -> None:
+        """
+        Uzgadnia manifest, archiwizuje pliki pozostawione w pending/ przed startem i stosuje retencję.
+        :param leftover: Nazwy plików w pending/ w chwili startu (późniejsze rotacje zlecają archiwizację same)
+        """
+        self.manifest.reconcile()
+        for filename in leftover:
+            file_path = os.path.join(self.pending_dir, filename)
+            if (os.path.exists(os.path.join(self.archive_dir, filename))
+                    or os.path.exists(os.path.join(self.archive_dir, filename + ".zip"))):
+                # Archiwum powstało (zapis przez plik tymczasowy), przerwano tylko usuwanie oryginału
+                os.remove(file_path)
+            else:
+                self._archive(file_path)
+        self._expire_archives()
 
     def read_logs(
             self,
             start_dt: datetime.datetime,  # Zmieniono nazwę dla jasności, że to datetime
             end_dt: datetime.datetime,  # Zmieniono nazwę dla jasności, że to datetime
-            sensor_id: Optional[str] = None
+            sensor_id: Optional[str] = None,
+            calibrated: bool = True
     ) -> Iterator[Dict]:
         """
         Pobiera wpisy z logów zadanego zakresu i opcjonalnie konkretnego czujnika.
-        Iteruje przez pliki .csv w log_dir/ i archiwa .zip w log_dir/archive/.
+        Iteruje przez pliki .csv w log_dir/ i archiwa .zip w log_dir/archive/, a w układzie
+        partycjonowanym także przez partycje z zakresu (tylko partycje czujnika, jeśli podano sensor_id).
+        Pliki czytane są porcjami, a kolumna znaczników czasu parsowana jest wektorowo.
+
+        :param calibrated: Czy zastosować kalibrację (self.calibration); False - surowe wartości z plików
         """
+        start_us = timecodec.to_micros(start_dt)
+        end_us = timecodec.to_micros(end_dt)
+
+        if self.partitions is None:
+            for chunk in self._chunks_in_range(start_us, end_us, calibrated, sensor_id):
+                yield from self._filter_chunk(chunk, start_us, end_us, sensor_id)
+            return
+
+        # Pliki sprzed włączenia partycji w kolejności nazw, potem partycje przedział po przedziale -
+        # pliki partycji jednego przedziału scalane są według czasu
+        self.manifest.refresh()
+        for chunk in self._chunks_of_files(self._log_files(), start_us, end_us, calibrated, sensor_id):
+            yield from self._filter_chunk(chunk, start_us, end_us, sensor_id)
+        for _, bucket_files in itertools.groupby(self.partitions.files(start_us, end_us, sensor_id),
+                                                 key=operator.itemgetter(0)):
+            streams = [self._read_file(path, start_us, end_us, sensor_id, calibrated) for _, path in bucket_files]
+            if len(streams) == 1:
+                yield from streams[0]
+            else:
+                yield from heapq.merge(*streams, key=operator.itemgetter("timestamp"))
+
+    def _read_file(self, file_path: str, start_us: int, end_us: int, sensor_id: Optional[str],
+                   calibrated: bool) -> Iterator[Dict]:
+        for chunk in self._chunks_of_files([file_path], start_us, end_us, calibrated, sensor_id):
+            yield from self._filter_chunk(chunk, start_us, end_us, sensor_id)
+
+    def aggregate_logs(
+            self,
+            start_dt: datetime.datetime,
+            end_dt: datetime.datetime,
+            sensor_id: Optional[str] = None,
+            bucket_seconds: float = 60,
+            calibrated: bool = True
+    ) -> List[Dict]:
+        """
+        Agreguje odczyty z zakresu w przedziałach czasu wyrównanych do EPOCH.
+        Dla każdej pary (czujnik, przedział) zwraca liczbę odczytów, minimum, maksimum i średnią.
+
+        :param bucket_seconds: Długość przedziału w sekundach
+        :param calibrated: Czy agregować wartości skalibrowane (self.calibration) zamiast surowych
+        :return: Lista słowników posortowana według początku przedziału i czujnika
+        """
+        start_us = timecodec.to_micros(start_dt)
+        end_us = timecodec.to_micros(end_dt)
+        bucket_us = int(bucket_seconds * timecodec.MICROS_PER_SECOND)
+        if bucket_us <= 0:
+            raise ValueError(f"Niepoprawna długość przedziału: {bucket_seconds}")
+
+        stats: Dict[tuple, List[float]] = {}  # (bucket, sensor_id) -> [count, sum, min, max]
+        units: Dict[str, Optional[str]] = {}
+        for chunk in self._chunks_in_range(start_us, end_us, calibrated, sensor_id):
+            for key, count, total, low, high, unit in self._aggregate_chunk(chunk, start_us, end_us,
+                                                                             sensor_id, bucket_us):
+                units.setdefault(key[1], unit)
+                entry = stats.get(key)
+                if entry is None:
+                    stats[key] = [count, total, low, high]
+                else:
+                    entry[0] += count
+                    entry[1] += total
+                    entry[2] = min(entry[2], low)
+                    entry[3] = max(entry[3], high)
+
+        return [{
+            "sensor_id": sid,
+            "start": timecodec.from_micros(bucket * bucket_us),
+            "count": int(count),
+            "min": low,
+            "max": high,
+            "mean": total / count,
+            "unit": units[sid],
+        } for (bucket, sid), (count, total, low, high) in sorted(stats.items(), key=_bucket_order)]
+
+    def reconstruct(
+            self,
+            sensor_id: str,
+            times: List[datetime.datetime],
+            calibrated: bool = True
+    ) -> List[Optional[float]]:
+        """
+        Odtwarza wartości czujnika w podanych chwilach z wierszy zapisanych zgodnie z jego polityką
+        zapisu: schodkowo (deadband, bez polityki) lub liniowo (swinging door). Surowa wartość różni się
+        od odczytu czujnika najwyżej o error_bound(sensor_id); None oznacza brak danych w tej chwili.
+
+        :param times: Chwile, dla których odtworzyć wartości (dowolna kolejność)
+        :param calibrated: Czy zastosować kalibrację do odtworzonych wartości (błąd skaluje się z jej nachyleniem)
+        """
+        if not times:
+            return []
+        policy = self.write_filter.policy_for(sensor_id) if self.write_filter is not None else None
+        query_us = [timecodec.to_micros(t) for t in times]
+        # Potrzebne są też zapisy sąsiadujące z zakresem - najdalej o max_silence_s (bez limitu: całe logi)
+        margin = policy.max_silence_us if policy is not None and policy.max_silence_us is not None else _ROLLUP_SPAN_US
+        start_us, end_us = min(query_us) - margin, max(query_us) + margin
+        points = sorted((timecodec.to_micros(row["timestamp"]), row["value"])
+                        for chunk in self._chunks_in_range(start_us, end_us, False, sensor_id)
+                        for row in self._filter_chunk(chunk, start_us, end_us, sensor_id))
+        values = reconstruct([p[0] for p in points], [p[1] for p in points], query_us, policy)
+        if calibrated and self.calibration is not None:
+            values = [None if v is None else self.calibration.calibrate_value(sensor_id, v) for v in values]
+        return values
+
+    def error_bound(self, sensor_id: str) -> float:
+        """Maksymalny błąd surowej wartości zwracanej przez reconstruct() dla czujnika (0 - zapis bez redukcji)."""
+        policy = self.write_filter.policy_for(sensor_id) if self.write_filter is not None else None
+        return policy.error_bound if policy is not None else 0.0
+
+    def export_columns(
+            self,
+            start_dt: datetime.datetime,
+            end_dt: datetime.datetime,
+            sensor_id: Optional[str] = None,
+            calibrated: bool = True
+    ) -> Dict[str, object]:
+        """
+        Zwraca wiersze z zakresu jako kolumny NumPy gotowe dla pandas.DataFrame (bez słownika na wiersz):
+        timestamp (datetime64[us]), sensor_id, value (float64), unit. Wymaga NumPy.
+        """
+        import log_export
+        return log_export.export_columns(self, timecodec.to_micros(start_dt), timecodec.to_micros(end_dt),
+                                         sensor_id, calibrated)
+
+    def export_npz(
+            self,
+            path: str,
+            start_dt: datetime.datetime,
+            end_dt: datetime.datetime,
+            sensor_id: Optional[str] = None,
+            calibrated: bool = True,
+            compress: bool = False
+    ) -> int:
+        """
+        Zapisuje wiersze z zakresu strumieniowo do pliku .npz (format w log_export); zwraca liczbę wierszy.
+        Plik wczytuje log_export.load_npz. Wymaga NumPy.
+
+        :param compress: Czy kompresować kolumny (mniejszy plik kosztem czasu zapisu i odczytu)
+        """
+        import log_export
+        return log_export.export_npz(self, path, timecodec.to_micros(start_dt), timecodec.to_micros(end_dt),
+                                     sensor_id, calibrated, compress)
+
+    @staticmethod
+    def _aggregate_chunk(chunk: LogChunk, start_us: int, end_us: int, sensor_id: Optional[str],
+                         bucket_us: int) -> Iterator[tuple]:
+        """Zwraca (klucz, liczba, suma, min, max, jednostka) dla par (przedział, czujnik) z jednej porcji."""
+        micros, sensor_ids, values, units = chunk
+        if np is not None and isinstance(micros, np.ndarray):
+            if not isinstance(values, np.ndarray):
+                values = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            mask = (micros >= start_us) & (micros <= end_us) & ~np.isnan(values)
+            if sensor_id is not None:
+                mask &= np.asarray(sensor_ids, dtype=object) == sensor_id
+            indices = np.flatnonzero(mask)
+            if not len(indices):
+                return
+            # Kody czujników nadawane w kolejności wystąpienia - bez sortowania napisów
+            codes_of: Dict[Optional[str], int] = {}
+            codes = np.fromiter((codes_of.setdefault(sensor_ids[i], len(codes_of)) for i in indices.tolist()),
+                                dtype=np.int64, count=len(indices))
+            buckets = micros[indices] // bucket_us
+            first_bucket = int(buckets.min())
+            width = int(buckets.max()) - first_bucket + 1
+            keys, inverse = np.unique(codes * width + (buckets - first_bucket), return_inverse=True)
+            selected = values[indices]
+            counts = np.bincount(inverse)
+            sums = np.bincount(inverse, weights=selected)
+            lows = np.full(len(keys), np.inf)
+            highs = np.full(len(keys), -np.inf)
+            np.minimum.at(lows, inverse, selected)
+            np.maximum.at(highs, inverse, selected)
+            ids = list(codes_of)
+            id_units = {}
+            for i in indices.tolist():
+                id_units.setdefault(sensor_ids[i], units[i])
+            for key, count, total, low, high in zip(keys.tolist(), counts.tolist(), sums.tolist(),
+                                                    lows.tolist(), highs.tolist()):
+                sid = ids[key // width]
+                yield (first_bucket + key % width, sid), count, total, low, high, id_units[sid]
+        else:
+            partial: Dict[tuple, List] = {}
+            for i, row_us in enumerate(micros):
+                if row_us is None or not start_us <= row_us <= end_us or values[i] is None:
+                    continue
+                if sensor_id is not None and sensor_ids[i] != sensor_id:
+                    continue
+                value = values[i]
+                key = (row_us // bucket_us, sensor_ids[i])
+                entry = partial.get(key)
+                if entry is None:
+                    partial[key] = [1, value, value, value, units[i]]
+                else:
+                    entry[0] += 1
+                    entry[1] += value
+                    entry[2] = min(entry[2], value)
+                    entry[3] = max(entry[3], value)
+            for key, (count, total, low, high, unit) in partial.items():
+                yield key, count, total, low, high, unit
+
+    def _chunks_in_range(self, start_us: int, end_us: int, calibrated: bool = False,
+                         sensor_id: Optional[str] = None) -> Iterator[LogChunk]:
+        """
+        Zwraca porcje wszystkich plików (w tym partycji), które mogą zawierać wiersze z zakresu
+        [start_us, end_us] (i czujnika `sensor_id`, jeśli podano). Przy calibrated=True wartości porcji są kalibrowane
+        (kopie - porcje w pamięci podręcznej pozostają surowe).
+        """
+        files = self._log_files()
+        self.manifest.refresh()
+        # Wpisy indeksu dla plików, których już nie ma (np. usunięte archiwa), nie są potrzebne
+        for stale in self._file_ranges.keys() - set(files):
+            if self.partitions is None or not stale.startswith(self.partitions.root):
+                self._file_ranges.pop(stale, None)
+        if self.partitions is not None:
+            files += [path for _, path in self.partitions.files(start_us, end_us, sensor_id)]
+        yield from self._chunks_of_files(files, start_us, end_us, calibrated, sensor_id)
+
+    def _chunks_of_files(self, files: List[str], start_us: int, end_us: int, calibrated: bool,
+                         sensor_id: Optional[str]) -> Iterator[LogChunk]:
+        calibration = self.calibration if calibrated and self.calibration else None
+        for file_path in files:
+            if self._file_outside_range(file_path, start_us, end_us, sensor_id):
+                continue
+            try:
+                for chunk in self._scan_file(file_path):
+                    yield chunk if calibration is None else calibration.apply_chunk(chunk)
+            except FileNotFoundError:
+                # Plik mógł zostać usunięty/przeniesiony od czasu listowania
+                # print(f"Plik {file_path} nie znaleziony podczas odczytu logów.")
+                continue
+            except Exception as e:
+                print(f"Ogólny błąd podczas przetwarzania pliku {file_path}: {e}")
+                continue
+
+    def _file_outside_range(self, file_path: str, start_us: int, end_us: int,
+                            sensor_id: Optional[str] = None) -> bool:
+        """
+        Sprawdza w indeksie lub w podsumowaniu archiwum z manifestu, czy niezmieniony plik leży
+        poza zakresem (albo nie zawiera odczytów czujnika `sensor_id`).
+        """
+        entry = self._file_ranges.get(file_path)
+        rollup = self._archive_rollup(file_path)
+        if entry is None and rollup is None:
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        version = (stat.st_mtime_ns, stat.st_size)
+        if rollup is not None and (rollup["mtime_ns"], rollup["size"]) == version:
+            if sensor_id is not None and sensor_id not in rollup["sensors"]:
+                return True
+            entry = FileRange(stat.st_mtime_ns, stat.st_size, rollup["min_us"], rollup["max_us"])
+        elif entry is None or (entry.mtime_ns, entry.size) != version:
+            return False
+        return entry.min_us is None or entry.max_us < start_us or entry.min_us > end_us
+
+    def _archive_rollup(self, file_path: str) -> Optional[Dict]:
+        """Podsumowanie archiwum z manifestu (None dla plików spoza archiwum i archiwów bez podsumowania)."""
+        if os.path.dirname(file_path) != self.archive_dir:
+            return None
+        entry = self.manifest.get(os.path.basename(file_path))
+        return entry if entry is not None and "sensors" in entry else None
+
+    def _scan_file(self, file_path: str) -> Iterator[LogChunk]:
+        """
+        Zwraca porcje pliku - z pamięci podręcznej, jeśli są w niej, w przeciwnym razie dekodując plik.
+        Po pełnym odczycie zapisuje zakres czasu pliku w indeksie.
+        """
+        stat = os.stat(file_path)
+        file_key = (file_path, stat.st_mtime_ns, stat.st_size)
+        low = high = None
+        served = 0
+        cache = self.chunk_cache
+        if cache is not None and cache.block_count(file_key) is not None:
+            # Plik był już czytany w całości - porcje z pamięci aż do pierwszej wypartej
+            for block in range(cache.block_count(file_key)):
+                chunk = cache.get(file_key, block)
+                if chunk is None:
+                    break
+                low, high = _merge_range(low, high, chunk.timestamps)
+                served += 1
+                yield chunk
+
+        blocks = served
+        if cache is None or cache.block_count(file_key) != served:
+            for block, (rows, columns) in enumerate(self._iter_row_blocks(file_path)):
+                blocks = block + 1
+                if block < served:
+                    continue  # Porcja już zwrócona z pamięci - bez ponownego dekodowania
+                chunk = _decode_chunk(rows, columns)
+                if cache is not None:
+                    chunk = cache.put(file_key, block, chunk)
+                low, high = _merge_range(low, high, chunk.timestamps)
+                yield chunk
+            if cache is not None:
+                cache.set_block_count(file_key, blocks)
+        self._file_ranges[file_path] = FileRange(stat.st_mtime_ns, stat.st_size, low, high)
+
+    def _log_files(self) -> List[str]:
+        """Zwraca listę plików logów (bieżący, pozostałe .csv, pliki w pending/ i archiwa) w kolejności nazw."""
         files_to_check = []
 
         # 1. Sprawdź aktualnie otwarty plik (jeśli istnieje i nie jest pusty)
@@ -233,69 +910,156 @@ class Logger:
                 if file_path != self.current_file_path:  # Unikaj duplikatu
                     files_to_check.append(file_path)
 
-        # 3. Sprawdź pliki w katalogu archive_dir
+        # 3. Pliki czekające na archiwizację w pending/
+        for filename in os.listdir(self.pending_dir):
+            if filename.endswith(".csv"):
+                files_to_check.append(os.path.join(self.pending_dir, filename))
+
+        # 4. Sprawdź pliki w katalogu archive_dir (bez manifestu i plików tymczasowych)
         for filename in os.listdir(self.archive_dir):
-            file_path = os.path.join(self.archive_dir, filename)
-            files_to_check.append(file_path)
+            if is_archive_name(filename):
+                files_to_check.append(os.path.join(self.archive_dir, filename))
 
         # Sortuj pliki, aby próbować przetwarzać je w kolejności chronologicznej (na podstawie nazwy)
         # To jest heurystyka, lepsze byłoby parsowanie daty z nazwy pliku, jeśli wzorzec na to pozwala.
         files_to_check.sort()
+        return files_to_check
+
+    def _iter_row_blocks(self, file_path: str) -> Iterator[tuple]:
+        """Czyta plik .csv lub archiwum .zip i zwraca porcje surowych wierszy CSV z mapą kolumn."""
+        if file_path.endswith(".csv"):
+            with open(file_path, 'r', newline='', encoding='utf-8') as f:
+                yield from self._iter_csv_blocks(f)
+        elif file_path.endswith(".zip"):
+            with zipfile.ZipFile(file_path, 'r') as zipf:
+                for csv_filename_in_zip in zipf.namelist():
+                    if csv_filename_in_zip.endswith(".csv"):  # Upewnij się, że to CSV w ZIPie
+                        with zipf.open(csv_filename_in_zip, 'r') as f_bytes:
+                            # Zakładamy UTF-8, tak jak przy zapisie
+                            f_text = io.TextIOWrapper(f_bytes, encoding='utf-8', newline='')
+                            yield from self._iter_csv_blocks(f_text)
+
+    @staticmethod
+    def _iter_csv_blocks(f) -> Iterator[tuple]:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        columns = {name: i for i, name in enumerate(header)}
+        if "timestamp" not in columns:
+            return
+        while True:
+            rows = list(itertools.islice(reader, READ_CHUNK_ROWS))
+            if not rows:
+                return
+            yield rows, columns
+
+    @staticmethod
+    def _filter_chunk(chunk: LogChunk, start_us: int, end_us: int, sensor_id: Optional[str]) -> Iterator[Dict]:
+        """Wybiera z porcji wiersze z zakresu czasu (i czujnika) i zwraca je jako słowniki."""
+        micros, sensor_ids, values, units = chunk
+        if np is not None and isinstance(micros, np.ndarray):
+            mask = (micros >= start_us) & (micros <= end_us)
+            if sensor_id is not None:
+                mask &= np.asarray(sensor_ids, dtype=object) == sensor_id
+            indices = np.flatnonzero(mask)
+            if not len(indices):
+                return
+            times = timecodec.micros_to_datetimes(micros[indices])
+            for i, row_time in zip(indices.tolist(), times):
+                value = values[i]
+                if value is None:
+                    continue  # Pomiń wiersz z błędną wartością
+                yield {
+                    "timestamp": row_time,
+                    "sensor_id": sensor_ids[i],
+                    "value": float(value),
+                    "unit": units[i]
+                }
+        else:
+            for i, row_us in enumerate(micros):
+                if row_us is None or not start_us <= row_us <= end_us:
+                    continue
+                if sensor_id is not None and sensor_ids[i] != sensor_id:
+                    continue
+                if values[i] is None:
+                    continue
+                yield {
+                    "timestamp": timecodec.from_micros(row_us),
+                    "sensor_id": sensor_ids[i],
+                    "value": float(values[i]),
+                    "unit": units[i]
+                }
+
 
-        for file_path in files_to_check:
+def _column(rows: List[List[str]], index: Optional[int]) -> List[Optional[str]]:
+    """Wyciąga kolumnę z wierszy CSV; brakujące pola zamieniane są na None."""
+    if index is None:
+        return [None] * len(rows)
+    try:
+        return [row[index] for row in rows]
+    except IndexError:
+        return [row[index] if len(row) > index else None for row in rows]
+
+
+def _bucket_order(item) -> tuple:
+    (bucket, sensor_id), _ = item
+    return bucket, sensor_id or ""
+
+
+def _merge_range(low: Optional[int], high: Optional[int], micros) -> tuple:
+    """Rozszerza zakres (low, high) o znaczniki czasu porcji."""
+    chunk_range = _time_range(micros)
+    if chunk_range is None:
+        return low, high
+    if low is None:
+        return chunk_range
+    return min(low, chunk_range[0]), max(high, chunk_range[1])
+
+
+def _time_range(micros) -> Optional[tuple]:
+    """Zwraca (min, max) poprawnych znaczników czasu porcji lub None."""
+    if np is not None and isinstance(micros, np.ndarray):
+        valid = micros[micros != _NAT_MICROS]
+        if not len(valid):
+            return None
+        return int(valid.min()), int(valid.max())
+    valid = [m for m in micros if m is not None]
+    if not valid:
+        return None
+    return min(valid), max(valid)
+
+
+def _decode_chunk(rows: List[List[str]], columns: Dict[str, int]) -> LogChunk:
+    """
+    Dekoduje porcję wierszy CSV do kolumn: znaczniki czasu jako mikrosekundy od EPOCH,
+    wartości jako liczby (None dla wierszy, których nie da się sparsować).
+    """
+    timestamps = _column(rows, columns.get("timestamp"))
+    sensor_ids = _column(rows, columns.get("sensor_id"))
+    raw_values = _column(rows, columns.get("value"))
+    units = _column(rows, columns.get("unit"))
+
+    try:
+        micros = timecodec.parse_column(timestamps)
+    except ValueError:
+        micros = timecodec.parse_column_lenient(timestamps)
+
+    values = None
+    if np is not None:
+        try:
+            values = np.array(raw_values, dtype=np.float64)
+        except (ValueError, TypeError):
+            values = None
+    if values is None:
+        values = []
+        for raw in raw_values:
             try:
-                if file_path.endswith(".csv"):
-                    with open(file_path, 'r', newline='', encoding='utf-8') as f:
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            try:
-                                timestamp_str = row.get("timestamp")
-                                if not timestamp_str: continue  # Pomiń wiersze bez timestamp
-
-                                row_time = datetime.datetime.fromisoformat(timestamp_str)
-                                if start_dt <= row_time <= end_dt:
-                                    if sensor_id is None or row.get("sensor_id") == sensor_id:
-                                        yield {
-                                            "timestamp": row_time,
-                                            "sensor_id": row.get("sensor_id"),
-                                            "value": float(row.get("value", 0.0)),
-                                            # Dodaj domyślną wartość w razie braku
-                                            "unit": row.get("unit")
-                                        }
-                            except (ValueError, TypeError) as e_parse:
-                                # print(f"Błąd parsowania wiersza w {file_path}: {row} - {e_parse}")
-                                continue  # Pomiń błędny wiersz
-                elif file_path.endswith(".zip"):
-                    with zipfile.ZipFile(file_path, 'r') as zipf:
-                        for csv_filename_in_zip in zipf.namelist():
-                            if csv_filename_in_zip.endswith(".csv"):  # Upewnij się, że to CSV w ZIPie
-                                with zipf.open(csv_filename_in_zip, 'r') as f_bytes:
-                                    # Potrzebujemy zdekodować bajty do tekstu
-                                    # Zakładamy UTF-8, co jest częste
-                                    import io
-                                    f_text = io.TextIOWrapper(f_bytes, encoding='utf-8')
-                                    reader = csv.DictReader(f_text)
-                                    for row in reader:
-                                        try:
-                                            timestamp_str = row.get("timestamp")
-                                            if not timestamp_str: continue
-
-                                            row_time = datetime.datetime.fromisoformat(timestamp_str)
-                                            if start_dt <= row_time <= end_dt:
-                                                if sensor_id is None or row.get("sensor_id") == sensor_id:
-                                                    yield {
-                                                        "timestamp": row_time,
-                                                        "sensor_id": row.get("sensor_id"),
-                                                        "value": float(row.get("value", 0.0)),
-                                                        "unit": row.get("unit")
-                                                    }
-                                        except (ValueError, TypeError) as e_parse:
-                                            # print(f"Błąd parsowania wiersza w {csv_filename_in_zip} (z {file_path}): {row} - {e_parse}")
-                                            continue
-            except FileNotFoundError:
-                # Plik mógł zostać usunięty/przeniesiony od czasu listowania
-                # print(f"Plik {file_path} nie znaleziony podczas odczytu logów.")
-                continue
-            except Exception as e:
-                print(f"Ogólny błąd podczas przetwarzania pliku {file_path}: {e}")
-                continue
\ No newline at end of file
+                values.append(float(raw))
+            except (ValueError, TypeError):
+                values.append(None)
+
+    if np is not None and not isinstance(micros, np.ndarray):
+        # Po parsowaniu awaryjnym: wiersze bez poprawnego czasu wypadają poza każdy zakres
+        micros = np.array([_NAT_MICROS if m is None else m for m in micros], dtype=np.int64)
+    return LogChunk(micros, sensor_ids, values, units)
@@ -0,0 +1,305 @@
+"""
+Wykrywanie anomalii w strumieniu odczytów (mikro-porcje przetwarzane wektorowo w NumPy).
+
+Reguły dla każdego czujnika:
+    range  - wartość poza zakresem [min_value, max_value] z definicji czujnika,
+    rate   - zmiana szybsza niż max_rate jednostek na sekundę względem poprzedniego odczytu,
+    zscore - odchylenie od wykładniczo ważonej średniej (EWMA) większe niż z_threshold
+             odchyleń standardowych (po okresie rozgrzewki warmup odczytów).
+
+Stan czujnika to kilka liczb w tablicach (ostatni odczyt, średnia, wariancja, czasy
+ostatnich alertów), więc pamięć nie rośnie z liczbą odczytów. Alerty tej samej reguły
+dla czujnika są wygaszane przez cooldown_seconds. Z tabelą kalibracji reguły sprawdzane są
+na wartościach skalibrowanych (surowe odczyty przekazywane dalej bez zmian).
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import lazy_import
+import timecodec
+from metrics import REGISTRY
+
+np = lazy_import.lazy("numpy")
+
+_ALERTS = REGISTRY.counter("alerts_total", "Liczba zgłoszonych alertów")
+_READINGS_CHECKED = REGISTRY.counter("alerts_readings_checked_total", "Liczba odczytów sprawdzonych przez detektor")
+_BATCH_SECONDS = REGISTRY.histogram("alerts_batch_seconds", "Czas sprawdzenia jednej mikro-porcji odczytów")
+
+RULES = ("range", "rate", "zscore")
+
+
+class Alert(NamedTuple):
+    sensor_id: str
+    timestamp: object  # datetime odczytu, który wywołał alert
+    rule: str
+    value: float
+    message: str
+
+
+class AnomalyDetector:
+    """
+    Detektor anomalii dla floty czujników.
+
+    Odczyty można przekazywać pojedynczo przez observe() (zgodne z sensor.register_callback)
+    - są wtedy zbierane w mikro-porcje po batch_size - albo całymi porcjami przez process().
+    """
+
+    def __init__(self, z_threshold: float = 6.0, alpha: float = 0.01, warmup: int = 100,
+                 max_rate_fraction: Optional[float] = None, cooldown_seconds: float = 60.0,
+                 batch_size: int = 256, calibration=None):
+        """
+        :param z_threshold: Próg reguły zscore (w odchyleniach standardowych)
+        :param alpha: Waga nowego odczytu w EWMA średniej i wariancji
+        :param warmup: Liczba odczytów czujnika przed włączeniem reguły zscore
+        :param max_rate_fraction: Domyślny limit reguły rate jako ułamek zakresu czujnika na sekundę
+                                  (None - reguła tylko dla czujników z jawnym max_rate)
+        :param cooldown_seconds: Minimalny odstęp (czasu odczytów) między alertami tej samej reguły
+        :param batch_size: Rozmiar mikro-porcji zbieranej przez observe()
+        :param calibration: Tabela kalibracji (calibration.CalibrationTable) stosowana do każdej porcji
+        """
+        self.z_threshold = z_threshold
+        self.alpha = alpha
+        self.warmup = warmup
+        self.max_rate_fraction = max_rate_fraction
+        self.cooldown_us = int(cooldown_seconds * timecodec.MICROS_PER_SECOND)
+        self.batch_size = batch_size
+        self.calibration = calibration
+        self.logger = logging.getLogger("alerts")
+
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._capacity = 0
+        self._resize(64)
+        self._handlers: List[Callable[[Alert], None]] = []
+        self._pending_ids: List[str] = []
+        self._pending_times: List[int] = []
+        self._pending_values: List[float] = []
+        self._lock = threading.RLock()
+
+    def _resize(self, capacity: int) -> None:
+        def grow(array: Optional[np.ndarray], fill) -> np.ndarray:
+            new = np.full(capacity, fill, dtype=np.float64 if isinstance(fill, float) else np.int64)
+            if array is not None:
+                new[:len(array)] = array
+            return new
+
+        existing = self._capacity > 0
+        self._min = grow(self._min if existing else None, np.nan)
+        self._max = grow(self._max if existing else None, np.nan)
+        self._max_rate = grow(self._max_rate if existing else None, np.nan)
+        self._last_value = grow(self._last_value if existing else None, np.nan)
+        self._last_time = grow(self._last_time if existing else None, 0)
+        self._mean = grow(self._mean if existing else None, 0.0)
+        self._moment2 = grow(self._moment2 if existing else None, 0.0)
+        self._count = grow(self._count if existing else None, 0)
+        # Czas ostatniego alertu reguły; wartość początkowa daleko w przeszłości, ale bez przepełnienia różnicy
+        self._last_alert = {rule: grow(self._last_alert[rule] if existing else None, -2 ** 62)
+                            for rule in RULES}
+        self._capacity = capacity
+
+    def add_sensor(self, sensor_id: str, min_value: Optional[float] = None, max_value: Optional[float] = None,
+                   max_rate: Optional[float] = None) -> int:
+        """
+        Rejestruje czujnik (lub aktualizuje jego limity) i zwraca jego indeks w tablicach stanu.
+        Limity podawane są w jednostkach sprawdzanych wartości (po kalibracji, jeśli jest ustawiona).
+        """
+        with self._lock:
+            return self._add_sensor(sensor_id, min_value, max_value, max_rate)
+
+    def _add_sensor(self, sensor_id, min_value, max_value, max_rate) -> int:
+        index = self._index.get(sensor_id)
+        if index is None:
+            index = len(self._ids)
+            if index >= self._capacity:
+                self._resize(self._capacity * 2)
+            self._index[sensor_id] = index
+            self._ids.append(sensor_id)
+        if min_value is not None:
+            self._min[index] = min_value
+        if max_value is not None:
+            self._max[index] = max_value
+        if max_rate is None and self.max_rate_fraction is not None and None not in (min_value, max_value):
+            max_rate = (max_value - min_value) * self.max_rate_fraction
+        if max_rate is not None:
+            self._max_rate[index] = max_rate
+        return index
+
+    def add_sensors(self, sensors: Iterable) -> None:
+        """
+        Rejestruje czujniki z ich zakresami min_value/max_value. Zakresy dotyczą surowych odczytów,
+        więc przy ustawionej kalibracji przeliczane są na skalibrowane jednostki.
+        """
+        for s in sensors:
+            low, high = s.min_value, s.max_value
+            if self.calibration is not None and low is not None and high is not None:
+                low, high = sorted((self.calibration.calibrate_value(s.sensor_id, low),
+                                    self.calibration.calibrate_value(s.sensor_id, high)))
+            self.add_sensor(s.sensor_id, low, high)
+
+    def add_handler(self, handler: Callable[[Alert], None]) -> None:
+        """Dodaje odbiorcę alertów (np. pasek statusu GUI); alerty trafiają też do loggera "alerts"."""
+        self._handlers.append(handler)
+
+    def observe(self, sensor_id: str, timestamp, value: float, unit: str = None) -> None:
+        """Dodaje odczyt do bieżącej mikro-porcji (sygnatura callbacku sensor.register_callback)."""
+        with self._lock:
+            self._pending_ids.append(sensor_id)
+            self._pending_times.append(timecodec.to_micros(timestamp))
+            self._pending_values.append(value)
+            if len(self._pending_ids) < self.batch_size:
+                return
+            batch = self._take_pending()
+        self.process(*batch)
+
+    def flush(self) -> List[Alert]:
+        """Sprawdza odczyty zebrane przez observe() (wywoływane okresowo, np. co obieg pętli)."""
+        with self._lock:
+            if not self._pending_ids:
+                return []
+            batch = self._take_pending()
+        return self.process(*batch)
+
+    def _take_pending(self) -> tuple:
+        batch = (self._pending_ids, np.array(self._pending_times, dtype=np.int64),
+                 np.array(self._pending_values, dtype=np.float64))
+        self._pending_ids, self._pending_times, self._pending_values = [], [], []
+        return batch
+
+    def process_readings(self, readings: List[tuple]) -> List[Alert]:
+        """Sprawdza porcję krotek (sensor_id, timestamp, value, unit), np. grupę z IngestSink."""
+        if not readings:
+            return []
+        return self.process([r[0] for r in readings],
+                            np.fromiter((timecodec.to_micros(r[1]) for r in readings), dtype=np.int64,
+                                        count=len(readings)),
+                            np.fromiter((r[2] for r in readings), dtype=np.float64, count=len(readings)))
+
+    def process(self, sensor_ids: List[str], micros: "np.ndarray", values: "np.ndarray") -> List[Alert]:
+        """
+        Sprawdza mikro-porcję odczytów wszystkimi regułami i aktualizuje stan czujników.
+
+        :param sensor_ids: Identyfikatory czujników (lista napisów)
+        :param micros: Znaczniki czasu w mikrosekundach od EPOCH (int64)
+        :param values: Wartości odczytów (float64)
+        :return: Lista zgłoszonych alertów
+        """
+        t0 = time.perf_counter()
+        if self.calibration is not None:
+            values = self.calibration.apply(sensor_ids, np.asarray(values, dtype=np.float64))
+        with self._lock:
+            alerts = self._process(sensor_ids, micros, values)
+        _READINGS_CHECKED.inc(len(values))
+        _BATCH_SECONDS.observe(time.perf_counter() - t0)
+        for alert in alerts:
+            _ALERTS.inc()
+            self.logger.warning(alert.message)
+            for handler in self._handlers:
+                handler(alert)
+        return alerts
+
+    def _process(self, sensor_ids: List[str], micros: "np.ndarray", values: "np.ndarray") -> List[Alert]:
+        n = len(values)
+        if not n:
+            return []
+        index = self._index
+        idx = np.fromiter((index[s] if s in index else self._add_sensor(s, None, None, None) for s in sensor_ids),
+                          dtype=np.int64, count=n)
+        # Porządek (czujnik, czas) - kolejne odczyty czujnika leżą obok siebie
+        order = np.lexsort((micros, idx))
+        idx, micros, values = idx[order], micros[order], values[order]
+        first = np.ones(n, dtype=bool)
+        first[1:] = idx[1:] != idx[:-1]
+        last = np.ones(n, dtype=bool)
+        last[:-1] = first[1:]
+
+        # Poprzedni odczyt: z porcji lub ze stanu czujnika
+        prev_value = np.empty(n)
+        prev_value[1:] = values[:-1]
+        prev_value[first] = self._last_value[idx[first]]
+        prev_time = np.empty(n, dtype=np.int64)
+        prev_time[1:] = micros[:-1]
+        prev_time[first] = self._last_time[idx[first]]
+
+        flags = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            flags["range"] = (values < self._min[idx]) | (values > self._max[idx])
+            dt = (micros - prev_time) / timecodec.MICROS_PER_SECOND
+            rate = np.abs(values - prev_value) / dt
+            flags["rate"] = (dt > 0) & (rate > self._max_rate[idx])
+            # zscore względem stanu sprzed porcji (opóźnienie najwyżej o jedną mikro-porcję)
+            mean = self._mean[idx]
+            std = np.sqrt(np.maximum(self._moment2[idx] - mean * mean, 0.0))
+            z = np.abs(values - mean) / std
+            flags["zscore"] = (self._count[idx] >= self.warmup) & (std > 0) & (z > self.z_threshold)
+
+        self._update_state(idx, micros, values, first, last)
+        return self._collect_alerts(idx, micros, values, flags, rate, z)
+
+    def _update_state(self, idx, micros, values, first, last) -> None:
+        n = len(values)
+        starts = np.flatnonzero(first)
+        sizes = np.diff(np.append(starts, n))
+        groups = idx[first]
+
+        # Nowe czujniki: EWMA startuje od pierwszej wartości
+        fresh = self._count[groups] == 0
+        self._mean[groups[fresh]] = values[starts[fresh]]
+        self._moment2[groups[fresh]] = values[starts[fresh]] ** 2
+
+        # k kroków EWMA naraz: m' = (1-a)^k m + sum a (1-a)^(k-1-j) x_j
+        a = self.alpha
+        position = np.arange(n) - np.repeat(starts, sizes)
+        weights = a * (1 - a) ** (np.repeat(sizes, sizes) - 1 - position)
+        decay = (1 - a) ** sizes
+        self._mean[groups] = self._mean[groups] * decay + np.add.reduceat(weights * values, starts)
+        self._moment2[groups] = self._moment2[groups] * decay + np.add.reduceat(weights * values * values, starts)
+        self._count[groups] += sizes
+        self._last_value[idx[last]] = values[last]
+        self._last_time[idx[last]] = micros[last]
+
+    def _collect_alerts(self, idx, micros, values, flags, rate, z) -> List[Alert]:
+        alerts = []
+        for rule in RULES:
+            rows = np.flatnonzero(flags[rule])
+            if not len(rows):
+                continue
+            # Najwyżej jeden alert reguły na czujnik w porcji, z zachowaniem cooldown
+            sensors, first_rows = np.unique(idx[rows], return_index=True)
+            rows = rows[first_rows]
+            last_alert = self._last_alert[rule]
+            allowed = micros[rows] - last_alert[sensors] >= self.cooldown_us
+            rows, sensors = rows[allowed], sensors[allowed]
+            last_alert[sensors] = micros[rows]
+            for row, sensor in zip(rows.tolist(), sensors.tolist()):
+                sensor_id = self._ids[sensor]
+                value = float(values[row])
+                if rule == "range":
+                    detail = f"poza zakresem [{self._min[sensor]:g}, {self._max[sensor]:g}]"
+                elif rule == "rate":
+                    detail = f"zmiana {rate[row]:.3g}/s przekracza limit {self._max_rate[sensor]:.3g}/s"
+                else:
+                    detail = f"odchylenie {z[row]:.1f} sigma od średniej kroczącej"
+                alerts.append(Alert(sensor_id, timecodec.from_micros(int(micros[row])), rule, value,
+                                    f"Alert [{rule}] {sensor_id}: wartość {value:g} - {detail}"))
+        return alerts
+
+
+def from_config(config: dict, calibration=None) -> Optional[AnomalyDetector]:
+    """
+    Tworzy detektor na podstawie sekcji `alerts` z config.yaml; zwraca None, gdy wyłączony.
+
+    :param calibration: Opcjonalna tabela kalibracji (calibration.CalibrationTable)
+    """
+    if not config.get("enabled"):
+        return None
+    return AnomalyDetector(
+        z_threshold=config.get("z_threshold", 6.0),
+        alpha=config.get("ewma_alpha", 0.01),
+        warmup=config.get("warmup", 100),
+        max_rate_fraction=config.get("max_rate_fraction"),
+        cooldown_seconds=config.get("cooldown_seconds", 60.0),
+        batch_size=config.get("batch_size", 256),
+        calibration=calibration,
+    )
@@ -0,0 +1,195 @@
+"""
+Asynchroniczny tryb SensorApplication (asyncio).
+
+Próbkowanie czujników, zapis do logów i wysyłka na serwer działają jako niezależne zadania
+połączone ograniczonymi kolejkami. Blokujące operacje Loggera (zapis, flush, rotacja) i klienta
+sieciowego wykonywane są w osobnych wątkach (executor), więc zawieszenie sieci albo dysku
+nie opóźnia kolejnych obiegów próbkowania. Gdy kolejka etapu jest pełna, odczyt dla tego
+etapu jest odrzucany i liczony w metrykach zamiast blokować próbkowanie.
+
+Uruchomienie: python main_app.py --async
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import simulation
+import timecodec
+from main_app import SensorApplication, _TICK_SECONDS
+from metrics import REGISTRY
+
+_TICK_JITTER = REGISTRY.histogram("sensor_tick_jitter_seconds",
+                                  "Opóźnienie rozpoczęcia obiegu próbkowania względem planu",
+                                  buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+_LOG_DROPPED = REGISTRY.counter("async_log_dropped_total", "Odczyty niezapisane do logu (pełna kolejka zapisu)")
+_UPLINK_DROPPED = REGISTRY.counter("async_uplink_dropped_total",
+                                   "Odczyty niewysłane na serwer (pełna kolejka wysyłki lub koniec pracy)")
+
+_STOP = object()
+_LOG_BATCH = 1000
+
+
+class AsyncSensorApplication(SensorApplication):
+    def __init__(self, clock=None, seed: Optional[int] = None, fleet_path: Optional[str] = None,
+                 tick_seconds: float = 1.0, log_queue_size: int = 10000, uplink_queue_size: int = 1000,
+                 uplink_workers: Optional[int] = None, shutdown_timeout: float = 5.0):
+        """
+        :param tick_seconds: Odstęp między obiegami próbkowania
+        :param log_queue_size: Pojemność kolejki odczytów czekających na zapis do logu
+        :param uplink_queue_size: Pojemność kolejki pakietów czekających na wysyłkę
+        :param uplink_workers: Liczba równoległych wysyłek; domyślnie rozmiar puli połączeń (lub 1)
+        :param shutdown_timeout: Ile sekund przy zamykaniu czekać na wysłanie zaległych pakietów
+        """
+        super().__init__(clock=clock, seed=seed, fleet_path=fleet_path)
+        self.tick_seconds = tick_seconds
+        self.log_queue_size = log_queue_size
+        self.uplink_queue_size = uplink_queue_size
+        # Pojedynczy NetworkClient ma jedno gniazdo - współbieżne wysyłki tylko przez pulę
+        self.uplink_workers = uplink_workers or (self.network_client.size if self.pooled else 1)
+        self.shutdown_timeout = shutdown_timeout
+        self.log = logging.getLogger("AsyncSensorApplication")
+
+    def run(self, ticks: Optional[int] = None):
+        """
+        Uruchamia aplikację w pętli asyncio (do przerwania albo po `ticks` obiegach próbkowania).
+        """
+        print("Uruchamianie aplikacji sensorów (asyncio)...")
+        try:
+            asyncio.run(self.run_async(ticks))
+        except KeyboardInterrupt:
+            print("\nZamykanie aplikacji...")
+        print("Aplikacja została zatrzymana.")
+
+    async def run_async(self, ticks: Optional[int] = None) -> None:
+        loop = asyncio.get_running_loop()
+        # Logger używany jest tylko z jednego wątku, tak jak w trybie synchronicznym
+        self._log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="logger-io")
+        self._net_executor = ThreadPoolExecutor(max_workers=self.uplink_workers, thread_name_prefix="uplink")
+        log_queue = asyncio.Queue(maxsize=self.log_queue_size)
+        uplink_queue = asyncio.Queue(maxsize=self.uplink_queue_size)
+        writer = senders = None
+        try:
+            await loop.run_in_executor(self._net_executor, self.network_client.connect)
+            writer = asyncio.create_task(self._log_writer(log_queue))
+            senders = [asyncio.create_task(self._uplink_sender(uplink_queue)) for _ in range(self.uplink_workers)]
+            await self._sampler(log_queue, uplink_queue, ticks)
+        except ConnectionRefusedError:
+            print("Nie można połączyć się z serwerem. Sprawdź, czy jest uruchomiony.")
+        finally:
+            await self._shutdown(log_queue, uplink_queue, writer, senders)
+
+    async def _sampler(self, log_queue: asyncio.Queue, uplink_queue: asyncio.Queue, ticks: Optional[int]) -> None:
+        """Obiegi próbkowania w stałym rytmie; odczyty trafiają do kolejek bez czekania."""
+        loop = asyncio.get_running_loop()
+        real_time = isinstance(self.clock, simulation.WallClock)
+        next_tick = loop.time()
+        done = 0
+        while ticks is None or done < ticks:
+            _TICK_JITTER.observe(max(0.0, loop.time() - next_tick))
+            tick_start = time.perf_counter()
+            for s in self.sensors:
+                last_read_time = s._last_read_time
+                new_value = s.read_value()
+                # Nowy odczyt po czasie odczytu, nie po wartości (jak w SensorApplication.run)
+                if s._last_read_time != last_read_time:
+                    self._enqueue(s.sensor_id, s._last_read_time, new_value, s.unit, log_queue, uplink_queue)
+            if self.alerts is not None:
+                self.alerts.flush()
+            _TICK_SECONDS.observe(time.perf_counter() - tick_start)
+            done += 1
+
+            if real_time:
+                next_tick += self.tick_seconds
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            else:
+                # Zegar symulacyjny przesuwa się natychmiast; oddanie sterowania pozwala działać pozostałym zadaniom
+                self.clock.sleep(self.tick_seconds)
+                await asyncio.sleep(0)
+                next_tick = loop.time()
+
+    def _enqueue(self, sensor_id, timestamp, value, unit, log_queue: asyncio.Queue, uplink_queue: asyncio.Queue):
+        self.events.event("odczyt", "Nowy odczyt z %s: %.2f %s", sensor_id, value, unit)
+        try:
+            log_queue.put_nowait((sensor_id, timestamp, round(value, 2), unit))
+        except asyncio.QueueFull:
+            _LOG_DROPPED.inc()
+        try:
+            uplink_queue.put_nowait({
+                "sensor_id": sensor_id,
+                "timestamp": timecodec.format_datetime(timestamp),
+                "value": round(value, 2),
+                "unit": unit
+            })
+        except asyncio.QueueFull:
+            _UPLINK_DROPPED.inc()
+
+    async def _log_writer(self, queue: asyncio.Queue) -> None:
+        """Zapisuje zebrane odczyty porcjami w wątku Loggera."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < _LOG_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+            if batch:
+                await loop.run_in_executor(self._log_executor, self._write_batch, batch)
+            if stopping:
+                return
+
+    def _write_batch(self, batch) -> None:
+        for sensor_id, timestamp, value, unit in batch:
+            self.logger.log_reading(sensor_id, timestamp, value, unit)
+
+    async def _uplink_sender(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            packet = await queue.get()
+            try:
+                if not await loop.run_in_executor(self._net_executor, self.network_client.send, packet):
+                    print(f"BŁĄD: Nie udało się wysłać danych z sensora {packet['sensor_id']} na serwer.")
+            except Exception as e:
+                self.log.error(f"Błąd wysyłki: {e}")
+            finally:
+                queue.task_done()
+
+    async def _shutdown(self, log_queue, uplink_queue, writer, senders) -> None:
+        """Zapisuje wszystkie zebrane odczyty, daje wysyłce shutdown_timeout sekund i zamyka zasoby."""
+        loop = asyncio.get_running_loop()
+        writer_error = None
+        if writer is not None:
+            # Zadanie zapisu mogło zakończyć się błędem (np. dysku) - wtedy nikt nie opróżni pełnej kolejki
+            stop = asyncio.ensure_future(log_queue.put(_STOP))
+            await asyncio.wait([stop, writer], return_when=asyncio.FIRST_COMPLETED)
+            stop.cancel()
+            await asyncio.wait([writer])
+            if not writer.cancelled() and writer.exception() is not None:
+                writer_error = writer.exception()
+                _LOG_DROPPED.inc(log_queue.qsize())
+                self.log.error(f"Zapis do logu przerwany błędem: {writer_error}")
+        if senders:
+            try:
+                await asyncio.wait_for(uplink_queue.join(), self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                _UPLINK_DROPPED.inc(uplink_queue.qsize())
+                self.log.warning(f"Nie wysłano {uplink_queue.qsize()} odczytów przed zamknięciem")
+            for task in senders:
+                task.cancel()
+            await asyncio.gather(*senders, return_exceptions=True)
+        if self.alerts is not None:
+            self.alerts.flush()
+        self.events.flush_summary()
+        await loop.run_in_executor(self._log_executor, self.logger.stop)
+        # Zamknięcie po trwającej wysyłce (ten sam wątek), ale bez czekania dłużej niż shutdown_timeout
+        try:
+            await asyncio.wait_for(loop.run_in_executor(self._net_executor, self.network_client.close),
+                                   self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            self.network_client.close()
+        self._log_executor.shutdown()
+        self._net_executor.shutdown(wait=False)
+        if writer_error is not None:
+            raise writer_error
@@ -0,0 +1,416 @@
+"""
+Zestaw benchmarków wydajności zapisu, odczytu i przesyłania odczytów czujników.
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --quick --compare bench.json
+
+Wyniki zapisywane są jako JSON, dzięki czemu można je porównywać między wersjami.
+Opcja --compare zgłasza regresje (kod wyjścia 1), gdy wynik jest gorszy od bazowego
+o więcej niż --tolerance. Wyniki cold_start/* porównywane są też z celami COLD_START_TARGETS_MS.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import simulation
+import timecodec
+from Logger import Logger
+from sensor import TemperatureSensor, HumiditySensor, PressureSensor, LightSensor
+
+SEED = 2025
+BASE_TIME = datetime.datetime(2025, 1, 1)
+
+# Kierunek metryk: True - im więcej tym lepiej (przepustowość), False - im mniej tym lepiej (czas)
+HIGHER_IS_BETTER = {
+    "rows_per_s": True,
+    "msgs_per_s": True,
+    "latency_ms": False,
+    "refresh_ms": False,
+    "startup_ms": False,
+    "reduction": True,
+}
+
+# Docelowy czas zimnego startu punktów wejścia (import modułu w nowym interpreterze, mediana, ms).
+# Przed leniwymi importami start trwał ok. 200-280 ms (z interpreterem) - ciężkie zależności (NumPy, PyYAML,
+# tkinter, http.server) nie mogą wracać do ścieżki importu, jeśli punkt wejścia z nich nie korzysta.
+COLD_START_TARGETS_MS = {
+    "main_app": 120,
+    "server.server": 100,
+    "tools.replay": 120,
+    "tools.export": 120,
+    "gui.backend": 80,
+    "sensor_config": 80,
+}
+
+
+def make_sensors(count: int) -> list:
+    """
+    Tworzy flotę czujników wszystkich typów, generujących nową wartość przy każdym odczycie.
+    Czujniki mają wspólny zegar symulacyjny (od BASE_TIME) i własne generatory z seeda SEED,
+    więc wartości nie zależą od godziny ani dnia uruchomienia benchmarku.
+    """
+    classes = [
+        (TemperatureSensor, "°C", -20, 40),
+        (HumiditySensor, "%", 0, 100),
+        (PressureSensor, "hPa", 950, 1050),
+        (LightSensor, "lux", 0, 2000),
+    ]
+    clock = simulation.SimulationClock(BASE_TIME)
+    sensors = []
+    for i in range(count):
+        cls, unit, lo, hi = classes[i % len(classes)]
+        sensor_id = f"{cls.__name__[:4].lower()}_{i:05d}"
+        sensors.append(cls(sensor_id=sensor_id, name=cls.__name__, unit=unit, min_value=lo, max_value=hi,
+                           frequency=0, clock=clock, rng=simulation.sensor_rng(SEED, sensor_id)))
+    return sensors
+
+
+def iter_readings(count: int, sensors: list, step_s: float = 1.0) -> Iterator[Tuple]:
+    """
+    Generuje odczyty (sensor_id, timestamp, value, unit) z klas czujników, co step_s sekund od BASE_TIME.
+    Zegar symulacyjny czujników przesuwany jest do chwili każdego odczytu (kolejne wywołania - dalszy czas).
+    """
+    for i in range(count):
+        s = sensors[i % len(sensors)]
+        timestamp = BASE_TIME + datetime.timedelta(seconds=i * step_s)
+        s.clock.set(timestamp)
+        yield s.sensor_id, timestamp, s.read_value(), s.unit
+
+
+def synthetic_readings(count: int, sensors: list, step_s: float = 1.0) -> List[Tuple]:
+    """Lista odczytów z iter_readings."""
+    return list(iter_readings(count, sensors, step_s))
+
+
+def _write_config(directory: str, **overrides) -> str:
+    config = {
+        "log_dir": directory,
+        "filename_pattern": "sensors_%Y%m%d.csv",
+        "buffer_size": 200,
+    }
+    config.update(overrides)
+    path = os.path.join(directory, "config.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    return path
+
+
+def bench_logger_write(rows: int, buffer_sizes: List[int]) -> List[Dict]:
+    """Przepustowość Logger.log_reading w zależności od buffer_size."""
+    readings = synthetic_readings(rows, make_sensors(16))
+    results = []
+    for buffer_size in buffer_sizes:
+        temp_dir = tempfile.mkdtemp()
+        try:
+            logger = Logger(_write_config(temp_dir, buffer_size=buffer_size))
+            logger.start()
+            t0 = time.perf_counter()
+            for sensor_id, ts, value, unit in readings:
+                logger.log_reading(sensor_id, ts, value, unit)
+            logger.stop()
+            elapsed = time.perf_counter() - t0
+        finally:
+            shutil.rmtree(temp_dir)
+        results.append({
+            "name": f"logger_write/buffer_{buffer_size}",
+            "buffer_size": buffer_size,
+            "rows": rows,
+            "seconds": elapsed,
+            "rows_per_s": rows / elapsed,
+        })
+    return results
+
+
+def _build_archives(temp_dir: str, archive_count: int, rows_per_archive: int) -> Tuple[str, datetime.datetime]:
+    """
+    Tworzy archiwa .zip (po jednym dniu na archiwum) za pomocą samego Loggera: zapis na zegarze
+    symulacyjnym z rotacją dobową, archiwizację wykonuje utrzymanie Loggera.
+    Zwraca ścieżkę konfiguracji Loggera i koniec zapisanego zakresu.
+    """
+    config_path = _write_config(temp_dir, buffer_size=1000, rotate_every_hours=24, compress_archive=True)
+    clock = simulation.SimulationClock(BASE_TIME)
+    writer = Logger(config_path, clock=clock)
+    writer.start()
+    # Odczyt z chwili końca zakresu rotuje (i archiwizuje) plik ostatniego dnia
+    for sensor_id, timestamp, value, unit in iter_readings(archive_count * rows_per_archive + 1, make_sensors(16),
+                                                           86400 / rows_per_archive):
+        clock.set(timestamp)
+        writer.log_reading(sensor_id, timestamp, value, unit)
+    writer.stop()
+    return config_path, BASE_TIME + datetime.timedelta(days=archive_count)
+
+
+def bench_read_logs(archive_counts: List[int], rows_per_archive: int, widths: List[float]) -> List[Dict]:
+    """
+    Opóźnienie Logger.read_logs w zależności od liczby archiwów i szerokości zakresu.
+    Pomiar zimny na nowym Loggerze (pusta pamięć podręczna porcji), a osobny wpis "warm" -
+    to samo zapytanie powtórzone na tym Loggerze (zysk z chunk_cache).
+    """
+    results = []
+    for archive_count in archive_counts:
+        temp_dir = tempfile.mkdtemp()
+        try:
+            config_path, end_all = _build_archives(temp_dir, archive_count, rows_per_archive)
+            span = end_all - BASE_TIME
+            for width in widths:
+                # Zakres kończy się na ostatnim archiwum - typowe zapytanie "ostatnie N"
+                start = end_all - span * width
+                logger = Logger(config_path)
+                for suffix in ("", "/warm"):
+                    t0 = time.perf_counter()
+                    count = sum(1 for _ in logger.read_logs(start, end_all))
+                    elapsed = time.perf_counter() - t0
+                    results.append({
+                        "name": f"read_logs/archives_{archive_count}/width_{width}{suffix}",
+                        "archives": archive_count,
+                        "range_fraction": width,
+                        "rows_returned": count,
+                        "latency_ms": elapsed * 1000,
+                    })
+        finally:
+            shutil.rmtree(temp_dir)
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_network(messages: int) -> List[Dict]:
+    """Liczba wiadomości na sekundę NetworkClient -> NetworkServer przez loopback."""
+    from network.client import NetworkClient
+    from server.server import NetworkServer
+
+    port = _free_port()
+    server = NetworkServer("127.0.0.1", port)
+    server_thread = threading.Thread(target=server.start, daemon=True)
+    readings = synthetic_readings(messages, make_sensors(16))
+    packets = [{"sensor_id": sid, "timestamp": timecodec.format_datetime(ts), "value": round(v, 2), "unit": u}
+               for sid, ts, v, u in readings]
+
+    # Wyjście konsolowe serwera i logi klienta nie są mierzone - kierujemy je do /dev/null
+    logging.disable(logging.CRITICAL)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            server_thread.start()
+            client = NetworkClient("127.0.0.1", port, timeout=5.0, retries=1)
+            for _ in range(50):
+                try:
+                    client.connect()
+                    break
+                except ConnectionRefusedError:
+                    time.sleep(0.05)
+            ok = 0
+            t0 = time.perf_counter()
+            for packet in packets:
+                ok += client.send(packet)
+            elapsed = time.perf_counter() - t0
+            client.close()
+            server.stop()
+    finally:
+        logging.disable(logging.NOTSET)
+    return [{
+        "name": "network/loopback_single_connection",
+        "messages": messages,
+        "acked": ok,
+        "seconds": elapsed,
+        "msgs_per_s": messages / elapsed,
+    }]
+
+
+def bench_sensor_buffer(sensor_counts: List[int], readings_per_sensor: int) -> List[Dict]:
+    """Koszt odświeżenia tabeli GUI (get_avg 1h i 12h dla każdego czujnika)."""
+    from gui.backend import SensorBuffer
+
+    results = []
+    for count in sensor_counts:
+        sensors = make_sensors(count)
+        buffer = SensorBuffer()
+        now = datetime.datetime.now()
+        step = datetime.timedelta(hours=12) / readings_per_sensor
+        for s in sensors:
+            buffer.add_many([(s.sensor_id, s.read_value(), s.unit, now - step * i)
+                             for i in range(readings_per_sensor)])
+        t0 = time.perf_counter()
+        for sensor_id in buffer.get_all_sensors():
+            buffer.get_avg(sensor_id, 1)
+            buffer.get_avg(sensor_id, 12)
+        elapsed = time.perf_counter() - t0
+        results.append({
+            "name": f"sensor_buffer/sensors_{count}",
+            "sensors": count,
+            "readings_per_sensor": readings_per_sensor,
+            "refresh_ms": elapsed * 1000,
+        })
+    return results
+
+
+def bench_write_policy(rows: int, policies: Dict[str, dict]) -> List[Dict]:
+    """
+    Redukcja liczby zapisanych wierszy przez polityki zapisu Loggera i największy błąd odtworzenia
+    (Logger.reconstruct w chwilach wszystkich odczytów) względem granicy polityki.
+    """
+    sensors = make_sensors(4)
+    readings = synthetic_readings(rows, sensors)
+    results = []
+    for label, policy in policies.items():
+        temp_dir = tempfile.mkdtemp()
+        try:
+            logger = Logger(_write_config(temp_dir, buffer_size=1000, write_policies={"*": policy}))
+            logger.start()
+            t0 = time.perf_counter()
+            for sensor_id, ts, value, unit in readings:
+                logger.log_reading(sensor_id, ts, value, unit)
+            logger.stop()
+            elapsed = time.perf_counter() - t0
+            max_error = 0.0
+            for s in sensors:
+                own = [(ts, value) for sensor_id, ts, value, _ in readings if sensor_id == s.sensor_id]
+                restored = logger.reconstruct(s.sensor_id, [ts for ts, _ in own], calibrated=False)
+                max_error = max([max_error] + [abs(r - v) for r, (_, v) in zip(restored, own) if r is not None])
+            stored = sum(stats["stored"] for stats in logger.write_stats().values())
+        finally:
+            shutil.rmtree(temp_dir)
+        results.append({
+            "name": f"write_policy/{label}",
+            "policy": policy,
+            "rows": rows,
+            "stored_rows": stored,
+            "reduction": rows / stored,
+            "rows_per_s": rows / elapsed,
+            "max_error": max_error,
+            "within_bound": max_error <= logger.error_bound(sensors[0].sensor_id) + 1e-9,
+        })
+    return results
+
+
+def bench_cold_start(modules: Dict[str, float], repeats: int) -> List[Dict]:
+    """Czas importu punktów wejścia w nowym procesie Pythona (mediana z `repeats` uruchomień)."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=project_root)
+    # Czas samego interpretera odejmowany od wyniku - mierzony jest koszt importów projektu
+    baseline = _median_run_ms([sys.executable, "-c", "pass"], env, project_root, repeats)
+    results = []
+    for module, target_ms in modules.items():
+        total_ms = _median_run_ms([sys.executable, "-c", f"import {module}"], env, project_root, repeats)
+        results.append({
+            "name": f"cold_start/{module}",
+            "repeats": repeats,
+            "interpreter_ms": baseline,
+            "startup_ms": total_ms - baseline,
+            "target_ms": target_ms,
+            "within_target": total_ms - baseline <= target_ms,
+        })
+    return results
+
+
+def _median_run_ms(command: List[str], env: Dict[str, str], cwd: str, repeats: int) -> float:
+    # Pierwsze uruchomienie zapisuje pliki .pyc - nie wliczamy go do pomiaru
+    subprocess.run(command, env=env, cwd=cwd, check=True, capture_output=True)
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        subprocess.run(command, env=env, cwd=cwd, check=True, capture_output=True)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_all(quick: bool = False) -> Dict:
+    scale = 10 if quick else 1
+    results = []
+    results += bench_logger_write(100_000 // scale, [1, 10, 200, 1000])
+    results += bench_read_logs([1, 5, 20] if not quick else [1, 5], 20_000 // scale, [0.01, 0.1, 1.0])
+    results += bench_network(20_000 // scale)
+    results += bench_sensor_buffer([10, 100, 1000] if not quick else [10, 100], 2000 // scale)
+    results += bench_write_policy(40_000 // scale, {
+        "deadband_1": {"deadband": 1.0, "max_silence_s": 600},
+        "swinging_door_1": {"swinging_door": 1.0, "max_silence_s": 600},
+    })
+    results += bench_cold_start(COLD_START_TARGETS_MS, 5 if quick else 15)
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+            "seed": SEED,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Zwraca listę opisów regresji względem wyników bazowych."""
+    baseline_by_name = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current["results"]:
+        base = baseline_by_name.get(result["name"])
+        if not base:
+            continue
+        for metric, higher_is_better in HIGHER_IS_BETTER.items():
+            if metric not in result or metric not in base or not base[metric]:
+                continue
+            ratio = result[metric] / base[metric]
+            worse = ratio < 1 - tolerance if higher_is_better else ratio > 1 + tolerance
+            print(f"{result['name']:<45} {metric:<12} {base[metric]:>12.2f} -> {result[metric]:>12.2f} "
+                  f"({ratio:.2f}x){'  REGRESJA' if worse else ''}")
+            if worse:
+                regressions.append(f"{result['name']} {metric}: {ratio:.2f}x")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarki Loggera, sieci i bufora GUI.")
+    parser.add_argument("--output", default="bench.json", help="Plik wynikowy JSON")
+    parser.add_argument("--quick", action="store_true", help="Mniejsze rozmiary danych (szybki przebieg)")
+    parser.add_argument("--compare", help="Plik JSON z wynikami bazowymi do porównania")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Dopuszczalne pogorszenie (ułamek)")
+    args = parser.parse_args(argv)
+
+    report = run_all(quick=args.quick)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Zapisano wyniki do {args.output}")
+    for result in report["results"]:
+        if result.get("within_target") is False:
+            print(f"{result['name']}: {result['startup_ms']:.0f} ms przekracza cel {result['target_ms']} ms")
+        if result.get("within_bound") is False:
+            print(f"{result['name']}: błąd odtworzenia {result['max_error']:.3f} przekracza granicę polityki")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"Wykryto regresje: {len(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
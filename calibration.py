@@ -0,0 +1,178 @@
+"""
+Kalibracja odczytów czujników: krzywe afiniczne i odcinkowo-liniowe stosowane wektorowo.
+
+Surowe odczyty zapisane w logach nie są zmieniane - kalibracja stosowana jest przy
+odczycie (Logger.read_logs / aggregate_logs, zapytania sieciowe) i w strumieniu
+(IngestSink przed detektorem anomalii), więc zmiana tabeli działa wstecz na całą historię.
+
+Opis kalibracji (zgodny z JSON, np. atrybut sensor.calibration lub plik tabeli):
+    {"type": "affine", "gain": 1.02, "offset": -0.3}       wartość * gain + offset
+    {"type": "piecewise", "points": [[0, 0.5], [50, 49.0], [100, 101.5]]}
+        interpolacja liniowa między punktami (surowa, skalibrowana), poza zakresem
+        przedłużenie skrajnych odcinków
+"""
+import bisect
+import json
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import lazy_import
+
+# Bez NumPy kalibracja wykonywana jest wartość po wartości
+np = lazy_import.optional("numpy")
+
+
+class AffineCalibration:
+    def __init__(self, gain: float = 1.0, offset: float = 0.0):
+        self.gain = float(gain)
+        self.offset = float(offset)
+
+    def apply(self, values):
+        return values * self.gain + self.offset
+
+    def to_dict(self) -> dict:
+        return {"type": "affine", "gain": self.gain, "offset": self.offset}
+
+
+class PiecewiseLinearCalibration:
+    def __init__(self, points: Sequence[Sequence[float]]):
+        """
+        :param points: Punkty (wartość surowa, wartość skalibrowana); co najmniej dwa, różne wartości surowe
+        """
+        points = sorted((float(raw), float(calibrated)) for raw, calibrated in points)
+        if len(points) < 2 or len({raw for raw, _ in points}) != len(points):
+            raise ValueError("Kalibracja odcinkowa wymaga co najmniej dwóch punktów o różnych wartościach surowych")
+        self.raw = [raw for raw, _ in points]
+        self.calibrated = [calibrated for _, calibrated in points]
+        # Nachylenia skrajnych odcinków - do przedłużenia krzywej poza zakres punktów
+        self._low_slope = (self.calibrated[1] - self.calibrated[0]) / (self.raw[1] - self.raw[0])
+        self._high_slope = (self.calibrated[-1] - self.calibrated[-2]) / (self.raw[-1] - self.raw[-2])
+
+    def apply(self, values):
+        if np is not None and isinstance(values, np.ndarray):
+            out = np.interp(values, self.raw, self.calibrated)
+            low = values < self.raw[0]
+            out[low] = self.calibrated[0] + (values[low] - self.raw[0]) * self._low_slope
+            high = values > self.raw[-1]
+            out[high] = self.calibrated[-1] + (values[high] - self.raw[-1]) * self._high_slope
+            return out
+        value = values
+        if value <= self.raw[0]:
+            return self.calibrated[0] + (value - self.raw[0]) * self._low_slope
+        if value >= self.raw[-1]:
+            return self.calibrated[-1] + (value - self.raw[-1]) * self._high_slope
+        i = bisect.bisect_right(self.raw, value)
+        x0, x1 = self.raw[i - 1], self.raw[i]
+        y0, y1 = self.calibrated[i - 1], self.calibrated[i]
+        return y0 + (value - x0) * (y1 - y0) / (x1 - x0)
+
+    def to_dict(self) -> dict:
+        return {"type": "piecewise", "points": [[raw, cal] for raw, cal in zip(self.raw, self.calibrated)]}
+
+
+def from_dict(spec: Optional[dict]):
+    """Tworzy kalibrację z opisu; None dla braku kalibracji. Opis bez "type" traktowany jest jako afiniczny."""
+    if spec is None:
+        return None
+    kind = spec.get("type", "affine")
+    if kind == "affine":
+        return AffineCalibration(spec.get("gain", 1.0), spec.get("offset", 0.0))
+    if kind == "piecewise":
+        return PiecewiseLinearCalibration(spec["points"])
+    raise ValueError(f"Nieznany typ kalibracji: {kind}")
+
+
+class CalibrationTable:
+    """
+    Kalibracje wielu czujników stosowane naraz do porcji odczytów z różnych czujników.
+
+    Krzywe afiniczne sprowadzane są do tablic gain/offset indeksowanych kodem czujnika
+    (jedno mnożenie i dodawanie dla całej porcji); krzywe odcinkowe stosowane są tylko
+    do wierszy czujników, które w porcji występują.
+    """
+
+    def __init__(self, calibrations: Optional[Dict[str, object]] = None):
+        self._calibrations: Dict[str, object] = {}
+        self._codes: Dict[str, int] = {}
+        self._gain: List[float] = [1.0]  # kod 0 - czujnik bez kalibracji
+        self._offset: List[float] = [0.0]
+        self._piecewise: Dict[int, PiecewiseLinearCalibration] = {}
+        self._arrays = None
+        for sensor_id, calibration in (calibrations or {}).items():
+            self.set(sensor_id, calibration)
+
+    @classmethod
+    def from_sensors(cls, sensors: Iterable) -> "CalibrationTable":
+        """Tabela z atrybutów calibration czujników (np. floty wczytanej przez sensor_config)."""
+        return cls({s.sensor_id: from_dict(s.calibration) for s in sensors
+                    if getattr(s, "calibration", None) is not None})
+
+    @classmethod
+    def load(cls, path: str) -> "CalibrationTable":
+        """Wczytuje plik JSON {sensor_id: opis kalibracji}."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls({sensor_id: from_dict(spec) for sensor_id, spec in json.load(f).items()})
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({sensor_id: c.to_dict() for sensor_id, c in self._calibrations.items()}, f,
+                      ensure_ascii=False, indent=2)
+
+    def set(self, sensor_id: str, calibration) -> None:
+        """Ustawia kalibrację czujnika (obiekt kalibracji lub opis słownikowy)."""
+        if isinstance(calibration, dict):
+            calibration = from_dict(calibration)
+        if calibration is None:
+            return
+        self._calibrations[sensor_id] = calibration
+        code = self._codes.get(sensor_id)
+        if code is None:
+            code = len(self._gain)
+            self._codes[sensor_id] = code
+            self._gain.append(1.0)
+            self._offset.append(0.0)
+        self._piecewise.pop(code, None)
+        if isinstance(calibration, AffineCalibration):
+            self._gain[code], self._offset[code] = calibration.gain, calibration.offset
+        else:
+            self._gain[code], self._offset[code] = 1.0, 0.0
+            self._piecewise[code] = calibration
+        self._arrays = None
+
+    def get(self, sensor_id: str):
+        return self._calibrations.get(sensor_id)
+
+    def __len__(self) -> int:
+        return len(self._calibrations)
+
+    def calibrate_value(self, sensor_id: str, value: float) -> float:
+        calibration = self._calibrations.get(sensor_id)
+        return value if calibration is None else calibration.apply(value)
+
+    def apply(self, sensor_ids: Sequence[str], values):
+        """
+        Zwraca skalibrowane wartości (nowa tablica - wejście nie jest modyfikowane).
+
+        :param sensor_ids: Identyfikatory czujników wierszy
+        :param values: Tablica float64 (lub lista wartości/None bez NumPy)
+        """
+        if not self._calibrations:
+            return values
+        if np is None or not isinstance(values, np.ndarray):
+            return [None if v is None else self.calibrate_value(s, v) for s, v in zip(sensor_ids, values)]
+        if self._arrays is None:
+            self._arrays = (np.array(self._gain), np.array(self._offset))
+        gain, offset = self._arrays
+        codes_of = self._codes
+        codes = np.fromiter((codes_of.get(s, 0) for s in sensor_ids), dtype=np.intp, count=len(values))
+        out = values * gain[codes] + offset[codes]
+        if self._piecewise:
+            for code in np.unique(codes).tolist():
+                calibration = self._piecewise.get(code)
+                if calibration is not None:
+                    rows = codes == code
+                    out[rows] = calibration.apply(values[rows])
+        return out
+
+    def apply_chunk(self, chunk):
+        """Zwraca porcję logu (Logger.LogChunk) ze skalibrowaną kolumną wartości."""
+        return chunk._replace(values=self.apply(chunk.sensor_ids, chunk.values))
@@ -0,0 +1,124 @@
+"""
+Pamięć podręczna zdekodowanych porcji logów (LRU ograniczone rozmiarem w bajtach).
+
+Klucz porcji to (ścieżka, mtime_ns, rozmiar pliku, numer porcji), więc zmieniony plik
+nigdy nie zwróci starych danych. Archiwa są niezmienne i pozostają w pamięci aż do
+wyparcia; wpisy aktywnego pliku Logger usuwa przy każdym zapisie bufora i rotacji.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+import lazy_import
+from metrics import REGISTRY
+
+np = lazy_import.optional("numpy")
+
+_HITS = REGISTRY.counter("logger_cache_hits_total", "Porcje logów zwrócone z pamięci podręcznej")
+_MISSES = REGISTRY.counter("logger_cache_misses_total", "Porcje logów zdekodowane z pliku")
+_EVICTIONS = REGISTRY.counter("logger_cache_evictions_total", "Porcje wyparte z pamięci podręcznej")
+
+FileKey = Tuple[str, int, int]  # (ścieżka, mtime_ns, rozmiar)
+
+
+def compact_chunk(chunk) -> Tuple[object, int]:
+    """
+    Przygotowuje porcję do przechowania: powtarzające się napisy (identyfikatory czujników,
+    jednostki) współdzielą jeden obiekt. Zwraca porcję i przybliżony rozmiar w bajtach.
+    """
+    total = 0
+    columns = []
+    for column in chunk:
+        if np is not None and isinstance(column, np.ndarray):
+            total += column.nbytes
+        elif column and isinstance(column[0], str):
+            canonical: Dict[str, str] = {}
+            column = [canonical.setdefault(value, value) for value in column]
+            total += sys.getsizeof(column) + sum(sys.getsizeof(value) for value in canonical)
+        else:
+            total += sys.getsizeof(column) + 24 * len(column)
+        columns.append(column)
+    return type(chunk)(*columns), total
+
+
+class ChunkCache:
+    """
+    Pamięć LRU porcji logów ograniczona do max_bytes (bezpieczna wątkowo).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # klucz -> (porcja, rozmiar)
+        self._by_path: Dict[str, Set[tuple]] = {}
+        self._block_counts: Dict[str, Tuple[FileKey, int]] = {}  # ścieżka -> (wersja pliku, liczba porcji)
+        self._lock = threading.Lock()
+
+    def get(self, file_key: FileKey, block: int):
+        key = file_key + (block,)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                _MISSES.inc()
+                return None
+            self._entries.move_to_end(key)
+        _HITS.inc()
+        return entry[0]
+
+    def put(self, file_key: FileKey, block: int, chunk):
+        """Zapamiętuje porcję i zwraca jej przechowywaną (zwartą) wersję."""
+        chunk, size = compact_chunk(chunk)
+        if size > self.max_bytes:
+            return chunk
+        key = file_key + (block,)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (chunk, size)
+            self._by_path.setdefault(file_key[0], set()).add(key)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                old_key, (_, old_size) = self._entries.popitem(last=False)
+                self._forget(old_key)
+                self.bytes -= old_size
+                _EVICTIONS.inc()
+        return chunk
+
+    def block_count(self, file_key: FileKey) -> Optional[int]:
+        """Liczba porcji pliku, jeśli został kiedyś przeczytany w całości."""
+        entry = self._block_counts.get(file_key[0])
+        if entry is None or entry[0] != file_key:
+            return None
+        return entry[1]
+
+    def set_block_count(self, file_key: FileKey, count: int) -> None:
+        with self._lock:
+            self._block_counts[file_key[0]] = (file_key, count)
+
+    def invalidate(self, path: str) -> None:
+        """Usuwa wszystkie porcje pliku (np. aktywnego pliku po zapisie bufora)."""
+        with self._lock:
+            for key in self._by_path.pop(path, ()):
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self.bytes -= entry[1]
+            self._block_counts.pop(path, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_path.clear()
+            self._block_counts.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _forget(self, key: tuple) -> None:
+        keys = self._by_path.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_path[key[0]]
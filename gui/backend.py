@@ -0,0 +1,314 @@
+"""
+Część serwera GUI niezależna od Tk: bufor odczytów z agregatami, wczytywanie historii z logów
+i serwer TCP w wątku. Importowana bez tkinter (testy, benchmarki, praca bez wyświetlacza).
+
+Komunikaty dla paska statusu trafiają do ograniczonej kolejki (StatusQueue, STATUS_QUEUE_SIZE):
+gdy GUI nie nadąża z ich odbiorem, nowe komunikaty "info" są odrzucane i liczone, a błędy i alerty
+scalane w jeden komunikat zbiorczy na poziom ("N komunikatów, ostatni: ..."), odbierany przez GUI
+w kolejnym obiegu. Informacje o odebranych odczytach serwer wysyła zbiorczo, najwyżej raz na
+STATUS_INFO_INTERVAL.
+"""
+import queue
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+
+import timecodec
+from metrics import REGISTRY
+from network.framing import BadLine, LineFramer, parse_json_lines
+
+_STATUS_DROPPED = REGISTRY.counter("gui_status_dropped_total",
+                                   "Komunikaty statusu odrzucone przy pełnej kolejce (GUI nie nadąża)")
+_CONNECTION_WAITS = REGISTRY.counter("gui_connection_waits_total",
+                                     "Połączenia oczekujące na wolny wątek obsługi (limit max_clients)")
+
+# Pojemność kolejki komunikatów statusu dla GUI
+STATUS_QUEUE_SIZE = 1000
+# Minimalny odstęp (s) między komunikatami o odebranych danych - GUI odświeża pasek statusu co 0,5 s
+STATUS_INFO_INTERVAL = 0.5
+
+
+class StatusQueue(queue.Queue):
+    """
+    Ograniczona kolejka komunikatów statusu. Błędy i alerty, które nie mieszczą się w kolejce,
+    nie są odrzucane: dla każdego poziomu pamiętana jest liczba i ostatni komunikat (take_overflow).
+    """
+
+    def __init__(self, maxsize=STATUS_QUEUE_SIZE):
+        super().__init__(maxsize)
+        self._overflow_lock = threading.Lock()
+        self._overflow = {}  # poziom -> [liczba, ostatni komunikat]
+
+    def post(self, level, message):
+        """Wstawia komunikat bez blokowania; False, gdy komunikat "info" został odrzucony."""
+        try:
+            self.put_nowait((level, message))
+            return True
+        except queue.Full:
+            pass
+        if level == "info":
+            _STATUS_DROPPED.inc()
+            return False
+        with self._overflow_lock:
+            entry = self._overflow.setdefault(level, [0, ""])
+            entry[0] += 1
+            entry[1] = message
+        return True
+
+    def take_overflow(self):
+        """Zwraca i zeruje komunikaty zbiorcze [(poziom, tekst)] dla błędów i alertów spoza kolejki."""
+        with self._overflow_lock:
+            overflow, self._overflow = self._overflow, {}
+        return [(level, message if count == 1 else f"{count} komunikatów, ostatni: {message}")
+                for level, (count, message) in overflow.items()]
+
+
+def post_status(status_queue, level, message):
+    """
+    Wstawia komunikat do kolejki statusu bez blokowania. Przy pełnej kolejce komunikat "info"
+    jest odrzucany i zliczany; błędy i alerty StatusQueue scala w komunikat zbiorczy.
+    """
+    if isinstance(status_queue, StatusQueue):
+        return status_queue.post(level, message)
+    try:
+        status_queue.put_nowait((level, message))
+        return True
+    except queue.Full:
+        _STATUS_DROPPED.inc()
+        return False
+
+
+def _to_seconds(t):
+    """Zamienia datetime na liczbę sekund od początku ery (bez kosztownej konwersji strefy czasowej)."""
+    return t.toordinal() * 86400 + t.hour * 3600 + t.minute * 60 + t.second
+
+
+class SensorBuffer:
+    def __init__(self, bucket_seconds=60, max_hours=12):
+        self.data = defaultdict(lambda: deque(maxlen=1000))  # czujnik: lista (timestamp, value, unit)
+        # Agregaty kroczące: czujnik -> {indeks kubełka czasowego: [suma, liczba]}.
+        # Średnie 1h/12h liczone są z kubełków, więc nie zależą od długości deque z surowymi odczytami.
+        self.bucket_seconds = bucket_seconds
+        self.max_buckets = int(max_hours * 3600 // bucket_seconds) + 1
+        self._buckets = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def add(self, sensor_id, value, unit, timestamp):
+        with self._lock:
+            self._add(sensor_id, value, unit, timestamp)
+
+    def add_many(self, readings):
+        """Dodaje porcję odczytów (sensor_id, value, unit, timestamp) pod jedną blokadą."""
+        with self._lock:
+            for sensor_id, value, unit, timestamp in readings:
+                self._add(sensor_id, value, unit, timestamp)
+
+    def _add(self, sensor_id, value, unit, timestamp):
+        series = self.data[sensor_id]
+        # Dane historyczne (np. z wczytywania logów) mogą przyjść po nowszych odczytach na żywo -
+        # trafiają wtedy tylko do agregatów, żeby nie nadpisać ostatniej wartości.
+        if not series or timestamp >= series[-1][0]:
+            series.append((timestamp, value, unit))
+
+        buckets = self._buckets[sensor_id]
+        key = _to_seconds(timestamp) // self.bucket_seconds
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = [value, 1]
+            if len(buckets) > self.max_buckets + 60:
+                newest = max(buckets)
+                for old_key in [k for k in buckets if k <= newest - self.max_buckets]:
+                    del buckets[old_key]
+        else:
+            bucket[0] += value
+            bucket[1] += 1
+
+    def get_last(self, sensor_id):
+        if self.data[sensor_id]:
+            t, v, u = self.data[sensor_id][-1]
+            return v, u, t
+        return None, None, None
+
+    def get_avg(self, sensor_id, hours):
+        # Dokładność do jednego kubełka (domyślnie minuta) na początku okna
+        cutoff = (_to_seconds(datetime.now()) - hours * 3600) // self.bucket_seconds
+        total = 0.0
+        count = 0
+        with self._lock:
+            for key, (s, n) in self._buckets[sensor_id].items():
+                if key >= cutoff:
+                    total += s
+                    count += n
+        if count:
+            return total / count
+        return None
+
+    def get_all_sensors(self):
+        return list(self.data.keys())
+
+
+class LogBackfiller(threading.Thread):
+    """
+    Wątek wczytujący historię odczytów z plików Loggera do SensorBuffer.
+
+    Logi są czytane strumieniowo (Logger.read_logs) i przekazywane do bufora porcjami,
+    dzięki czemu średnie w tabeli uzupełniają się stopniowo, a pętla Tk nie jest blokowana.
+    """
+
+    def __init__(self, logger_config, sensor_buffer, status_queue, hours=12, batch_size=2000, max_rows=None):
+        super().__init__(daemon=True)
+        self.logger_config = logger_config
+        self.sensor_buffer = sensor_buffer
+        self.status_queue = status_queue
+        self.hours = hours
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self._stop_event = threading.Event()
+
+    def run(self):
+        total = 0
+        try:
+            from Logger import Logger
+            logger = Logger(self.logger_config)
+            end = datetime.now()
+            start = end - timedelta(hours=self.hours)
+            batch = []
+            for entry in logger.read_logs(start, end):
+                if self._stop_event.is_set():
+                    break
+                batch.append((entry["sensor_id"], entry["value"], entry["unit"], entry["timestamp"]))
+                if len(batch) >= self.batch_size:
+                    self.sensor_buffer.add_many(batch)
+                    total += len(batch)
+                    batch = []
+                    post_status(self.status_queue, "info", f"Wczytywanie historii: {total} odczytów...")
+                    time.sleep(0)  # Oddaj GIL wątkowi GUI
+                    if self.max_rows and total >= self.max_rows:
+                        break
+            if batch:
+                self.sensor_buffer.add_many(batch)
+                total += len(batch)
+            post_status(self.status_queue, "info", f"Wczytano historię: {total} odczytów z ostatnich {self.hours} h")
+        except Exception as e:
+            post_status(self.status_queue, "error", f"Błąd wczytywania historii z logów: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+# Prosty serwer TCP w wątku
+class ThreadedServer(threading.Thread):
+    def __init__(self, port, on_data, status_queue, detector=None, max_clients=32):
+        super().__init__(daemon=True)
+        self.port = port
+        # Wywoływane w wątku połączenia przed wysłaniem ACK - wolne on_data spowalnia nadawcę
+        self.on_data = on_data
+        self.status_queue = status_queue
+        # Opcjonalny alerts.AnomalyDetector - odczyty zbierane w mikro-porcje, sprawdzane przy flush()
+        self.detector = detector
+        # Limit wątków obsługi: kolejne połączenia czekają w kolejce nasłuchu na wolny wątek
+        self.max_clients = max_clients
+        self._slots = threading.BoundedSemaphore(max_clients)
+        self._stop_event = threading.Event()
+        # Odczyty odebrane od ostatniego komunikatu statusu (wspólne dla wątków połączeń)
+        self._status_lock = threading.Lock()
+        self._received = 0
+        self._last_info = float("-inf")
+
+    def run(self):
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                s.bind(("", self.port))
+                s.listen()
+                post_status(self.status_queue, "info", f"Serwer nasłuchuje na porcie {self.port}")
+                s.settimeout(1.0)
+                while not self._stop_event.is_set() and self._acquire_slot():
+                    try:
+                        client, addr = s.accept()
+                    except socket.timeout:
+                        self._slots.release()
+                        continue
+                    threading.Thread(target=self._serve, args=(client, addr), daemon=True).start()
+        except Exception as e:
+            post_status(self.status_queue, "error", f"Błąd serwera: {e}")
+
+    def _acquire_slot(self):
+        """Czeka na wolny wątek obsługi; False po zatrzymaniu serwera."""
+        if self._slots.acquire(blocking=False):
+            return True
+        _CONNECTION_WAITS.inc()
+        while not self._stop_event.is_set():
+            if self._slots.acquire(timeout=1.0):
+                return True
+        return False
+
+    def _serve(self, client, addr):
+        try:
+            self.handle_client(client, addr)
+        finally:
+            self._slots.release()
+
+    def handle_client(self, client, addr):
+        try:
+            with client:
+                framer = LineFramer(client)
+                while framer.fill():
+                    # Jedno połączenie może przenosić wiele wiadomości (np. NetworkClient, tools.replay)
+                    lines = []
+                    line = framer.next_line()
+                    while line is not None:
+                        lines.append(line)
+                        line = framer.next_line()
+                    for payload in parse_json_lines(lines):
+                        self._handle_message(client, payload)
+                # Ostatnia wiadomość bez znaku nowej linii (klient zamknął zapis)
+                for payload in parse_json_lines([framer.remainder()]):
+                    self._handle_message(client, payload)
+        except Exception as e:
+            post_status(self.status_queue, "error", f"Błąd obsługi klienta: {e}")
+
+    def _handle_message(self, client, payload):
+        if isinstance(payload, BadLine) and not payload.text.strip():
+            return  # Pusta linia - bez odpowiedzi
+        try:
+            if isinstance(payload, BadLine):
+                raise ValueError(payload.error)
+            # Oczekiwany format: {"sensor": "id", "value": 12.3, "unit": "C", "timestamp": "..."}
+            # (akceptowany jest też klucz "sensor_id", jak w pakietach NetworkClient)
+            sensor_id = payload.get("sensor", payload.get("sensor_id"))
+            value = float(payload.get("value"))
+            unit = payload.get("unit", "")
+            ts = payload.get("timestamp")
+            if ts:
+                timestamp = timecodec.parse_datetime(ts)
+            else:
+                timestamp = datetime.now()
+            self.on_data(sensor_id, value, unit, timestamp)
+            if self.detector is not None:
+                self.detector.observe(sensor_id, timestamp, value, unit)
+            self._report_received(sensor_id, value, unit)
+        except Exception as e:
+            post_status(self.status_queue, "error", f"Błąd parsowania JSON: {e}")
+        try:
+            client.sendall(b"ACK\n")
+        except Exception as e:
+            post_status(self.status_queue, "error", f"Błąd wysyłania ACK: {e}")
+
+    def _report_received(self, sensor_id, value, unit):
+        """Komunikat o odebranych danych najwyżej raz na STATUS_INFO_INTERVAL, z liczbą odczytów od poprzedniego."""
+        now = time.monotonic()
+        with self._status_lock:
+            self._received += 1
+            if now - self._last_info < STATUS_INFO_INTERVAL:
+                return
+            count, self._received, self._last_info = self._received, 0, now
+        if count == 1:
+            message = f"Odebrano dane z {sensor_id}: {value} {unit}"
+        else:
+            message = f"Odebrano {count} odczytów (ostatni z {sensor_id}: {value} {unit})"
+        post_status(self.status_queue, "info", message)
+
+    def stop(self):
+        self._stop_event.set()
@@ -1,106 +1,25 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
 import queue
-import time
-import json
 import os
-import yaml
+import sys
 
-# Buforowanie i agregacja odczytów (przykładowa struktura)
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
+# Konfiguracja obok modułu - niezależnie od katalogu roboczego
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gui_config.yaml")
 
-CONFIG_FILE = "gui_config.yaml"
+# Katalog główny projektu (Logger.py) musi być importowalny także przy uruchomieniu z katalogu gui/
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
-class SensorBuffer:
-    def __init__(self):
-        self.data = defaultdict(lambda: deque(maxlen=1000))  # czujnik: lista (timestamp, value, unit)
-
-    def add(self, sensor_id, value, unit, timestamp):
-        self.data[sensor_id].append((timestamp, value, unit))
-
-    def get_last(self, sensor_id):
-        if self.data[sensor_id]:
-            t, v, u = self.data[sensor_id][-1]
-            return v, u, t
-        return None, None, None
-
-    def get_avg(self, sensor_id, hours):
-        now = datetime.now()
-        values = [v for t, v, u in self.data[sensor_id]
-                  if now - t <= timedelta(hours=hours)]
-        if values:
-            return sum(values) / len(values)
-        return None
-
-    def get_all_sensors(self):
-        return list(self.data.keys())
-
-# Prosty serwer TCP w wątku
-import socket
-
-class ThreadedServer(threading.Thread):
-    def __init__(self, port, on_data, status_queue):
-        super().__init__(daemon=True)
-        self.port = port
-        self.on_data = on_data
-        self.status_queue = status_queue
-        self._stop_event = threading.Event()
-
-    def run(self):
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                s.bind(("", self.port))
-                s.listen()
-                self.status_queue.put(("info", f"Serwer nasłuchuje na porcie {self.port}"))
-                while not self._stop_event.is_set():
-                    s.settimeout(1.0)
-                    try:
-                        client, addr = s.accept()
-                    except socket.timeout:
-                        continue
-                    threading.Thread(target=self.handle_client, args=(client, addr), daemon=True).start()
-        except Exception as e:
-            self.status_queue.put(("error", f"Błąd serwera: {e}"))
+import alerts
+import lazy_import
+# Bufor, wczytywanie historii i serwer TCP są w module bez Tk (re-eksport dla zgodności)
+from gui.backend import STATUS_QUEUE_SIZE, LogBackfiller, SensorBuffer, StatusQueue, ThreadedServer, post_status
 
-    def handle_client(self, client, addr):
-        try:
-            with client:
-                data = b""
-                while True:
-                    chunk = client.recv(4096)
-                    if not chunk:
-                        break
-                    data += chunk
-                    if b"\n" in data:
-                        break
-                msg = data.decode().strip()
-                try:
-                    payload = json.loads(msg)
-                    # Oczekiwany format: {"sensor": "id", "value": 12.3, "unit": "C", "timestamp": "..."}
-                    sensor_id = payload.get("sensor")
-                    value = float(payload.get("value"))
-                    unit = payload.get("unit", "")
-                    ts = payload.get("timestamp")
-                    if ts:
-                        timestamp = datetime.fromisoformat(ts)
-                    else:
-                        timestamp = datetime.now()
-                    self.on_data(sensor_id, value, unit, timestamp)
-                    self.status_queue.put(("info", f"Odebrano dane z {sensor_id}: {value} {unit}"))
-                except Exception as e:
-                    self.status_queue.put(("error", f"Błąd parsowania JSON: {e}"))
-                try:
-                    client.sendall(b"ACK\n")
-                except Exception as e:
-                    self.status_queue.put(("error", f"Błąd wysyłania ACK: {e}"))
-        except Exception as e:
-            self.status_queue.put(("error", f"Błąd obsługi klienta: {e}"))
+# PyYAML potrzebny dopiero przy wczytaniu i zapisie konfiguracji okna
+yaml = lazy_import.lazy("yaml")
 
-    def stop(self):
-        self._stop_event.set()
 
 # GUI
 class ServerGUI(tk.Tk):
@@ -111,14 +30,19 @@ class ServerGUI(tk.Tk):
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.sensor_buffer = SensorBuffer()
-        self.status_queue = queue.Queue()
+        # Ograniczona kolejka - przy zalewie komunikatów nadmiarowe "info" są odrzucane
+        # (gui_status_dropped_total), a błędy i alerty scalane w komunikat zbiorczy
+        self.status_queue = StatusQueue(STATUS_QUEUE_SIZE)
         self.server_thread = None
+        self.backfill_thread = None
 
         self._load_config()
+        self.detector = self._create_detector()
 
         self._build_widgets()
         self._update_table()
         self._poll_status()
+        self._start_backfill()
 
     def _build_widgets(self):
         # Górny panel
@@ -146,8 +70,9 @@ class ServerGUI(tk.Tk):
 
         # Pasek statusu
         self.status_var = tk.StringVar()
-        status_bar = tk.Label(self, textvariable=self.status_var, anchor="w", relief=tk.SUNKEN)
-        status_bar.pack(fill=tk.X, side=tk.BOTTOM)
+        self.status_bar = tk.Label(self, textvariable=self.status_var, anchor="w", relief=tk.SUNKEN)
+        self.status_bar.pack(fill=tk.X, side=tk.BOTTOM)
+        self._status_fg = self.status_bar.cget("fg")
 
     def start_server(self):
         try:
@@ -156,7 +81,8 @@ class ServerGUI(tk.Tk):
                 self.status_var.set("Serwer już działa.")
                 return
             self.server_thread = ThreadedServer(
-                port, self.sensor_buffer.add, self.status_queue
+                port, self.sensor_buffer.add, self.status_queue, self.detector,
+                max_clients=int(self.config.get("max_clients", 32))
             )
             self.server_thread.start()
             self.status_var.set(f"Serwer uruchomiony na porcie {port}")
@@ -195,40 +121,90 @@ class ServerGUI(tk.Tk):
 
     def _poll_status(self):
         # Odbieranie komunikatów statusu/błędów z wątku serwera
+        if self.detector is not None:
+            self.detector.flush()  # Alerty z ostatniej mikro-porcji trafiają do status_queue
+        messages = []
         try:
             while True:
-                level, msg = self.status_queue.get_nowait()
-                if level == "info":
-                    self.status_var.set(msg)
-                else:
-                    self.status_var.set(msg)
-                    messagebox.showerror("Błąd serwera", msg)
+                messages.append(self.status_queue.get_nowait())
         except queue.Empty:
             pass
+        # Błędy i alerty, które nie zmieściły się w kolejce - po jednym komunikacie zbiorczym na poziom
+        messages.extend(self.status_queue.take_overflow())
+        error_shown = False
+        for level, msg in messages:
+            self.status_var.set(msg)
+            if level == "info":
+                self.status_bar.config(fg=self._status_fg)
+            elif level == "alert" or error_shown:
+                # Alerty tylko na pasku statusu; jedno okno dialogowe na obieg - seria błędów nie blokuje GUI
+                self.status_bar.config(fg="red")
+            else:
+                error_shown = True
+                messagebox.showerror("Błąd serwera", msg)
         self.after(500, self._poll_status)
 
+    def _start_backfill(self):
+        # Opcjonalne wczytanie historii z logów, żeby średnie 1h/12h miały sens od razu po starcie
+        backfill = self.config.get("backfill") or {}
+        if not backfill.get("enabled"):
+            return
+        # Ścieżka względna w gui_config.yaml liczona od katalogu tego pliku
+        logger_config = os.path.join(os.path.dirname(CONFIG_FILE), backfill.get("logger_config", "../config.json"))
+        self.backfill_thread = LogBackfiller(
+            os.path.normpath(logger_config),
+            self.sensor_buffer,
+            self.status_queue,
+            hours=backfill.get("hours", 12),
+            batch_size=backfill.get("batch_size", 2000),
+            max_rows=backfill.get("max_rows"),
+        )
+        self.backfill_thread.start()
+
+    def _create_detector(self):
+        # Detektor anomalii według sekcji `alerts` konfiguracji GUI (zakresy z domyślnych czujników)
+        detector = alerts.from_config(self.config.get("alerts") or {})
+        if detector is not None:
+            from sensor import default_sensors
+            detector.add_sensors(default_sensors())
+            detector.add_handler(lambda alert: post_status(self.status_queue, "alert", alert.message))
+        return detector
+
     def _load_config(self):
         self.port = 9000
+        self.config = {}
         if os.path.exists(CONFIG_FILE):
             try:
                 with open(CONFIG_FILE, "r") as f:
-                    cfg = yaml.safe_load(f)
-                    self.port = int(cfg.get("port", 9000))
+                    self.config = yaml.safe_load(f) or {}
+                    self.port = int(self.config.get("port", 9000))
             except Exception:
                 pass
 
     def _save_config(self):
         try:
+            # Zachowujemy pozostałe ustawienia (np. backfill), nadpisujemy tylko port
+            self.config["port"] = int(self.port_var.get())
             with open(CONFIG_FILE, "w") as f:
-                yaml.safe_dump({"port": int(self.port_var.get())}, f)
+                yaml.safe_dump(self.config, f)
         except Exception:
             pass
 
     def on_close(self):
         self._save_config()
+        if self.backfill_thread:
+            self.backfill_thread.stop()
         self.stop_server()
         self.destroy()
 
 if __name__ == "__main__":
+    import argparse
+
+    import profiler
+
+    parser = argparse.ArgumentParser(description="Serwer z interfejsem graficznym (Tkinter).")
+    profiler.add_arguments(parser)
+    profiler.start_from_args(parser.parse_args())
+
     app = ServerGUI()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Leniwy import ciężkich zależności (NumPy, PyYAML).
+
+lazy("numpy") zwraca obiekt zastępczy, który importuje moduł dopiero przy pierwszym odwołaniu
+do atrybutu, a potem kopiuje jego atrybuty do siebie - kolejne odwołania (np.asarray) kosztują
+tyle samo co przy zwykłym imporcie. Krótkie narzędzia (replay, zapytania) i sam start aplikacji
+nie płacą więc za import NumPy, jeśli z niego nie korzystają.
+
+optional("numpy") zachowuje dotychczasową konwencję zależności opcjonalnych: zwraca None,
+jeśli modułu nie ma w środowisku (sprawdzane przez importlib.util.find_spec, bez importu).
+"""
+import importlib
+import importlib.util
+import threading
+from typing import Optional
+
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Moduł importowany przy pierwszym odwołaniu do atrybutu."""
+
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+
+    def __getattr__(self, attr: str):
+        # Wywoływane tylko dla atrybutów, których jeszcze nie ma - po imporcie wyłącznie dla brakujących
+        if self.__dict__["_lazy_module"] is None:
+            self._load()
+        return getattr(self.__dict__["_lazy_module"], attr)
+
+    def __setattr__(self, attr: str, value) -> None:
+        raise AttributeError(f"Nie można ustawić atrybutu {attr} leniwie importowanego modułu")
+
+    def __repr__(self) -> str:
+        state = "zaimportowany" if self.__dict__["_lazy_module"] is not None else "niezaimportowany"
+        return f"<LazyModule {self.__dict__['_lazy_name']} ({state})>"
+
+    def _load(self) -> None:
+        with _lock:
+            if self.__dict__["_lazy_module"] is not None:
+                return
+            module = importlib.import_module(self.__dict__["_lazy_name"])
+            self.__dict__.update(vars(module))
+            self.__dict__["_lazy_module"] = module
+
+
+def lazy(name: str) -> LazyModule:
+    """Moduł wymagany, ale importowany dopiero przy pierwszym użyciu (błąd importu zgłaszany wtedy)."""
+    return LazyModule(name)
+
+
+def optional(name: str) -> Optional[LazyModule]:
+    """Moduł opcjonalny: None, jeśli nie jest zainstalowany, w przeciwnym razie leniwy import."""
+    if importlib.util.find_spec(name) is None:
+        return None
+    return LazyModule(name)
+
+
+def is_loaded(module) -> bool:
+    """Czy moduł (zwykły lub leniwy) został już zaimportowany."""
+    return not isinstance(module, LazyModule) or module.__dict__["_lazy_module"] is not None
@@ -0,0 +1,160 @@
+"""
+Hurtowy eksport logów do kolumn NumPy (dla notebooka analitycznego).
+
+Porcje z Logger._chunks_in_range filtrowane są maskami i dopisywane do wcześniej
+zaalokowanych tablic (pojemność podwajana), więc eksport nie tworzy słownika na wiersz.
+Identyfikatory czujników i jednostki przechowywane są jako kody int32 ze słownikiem nazw.
+
+Format pliku .npz (np.load):
+    timestamp    int64     mikrosekundy od EPOCH (view('datetime64[us]') daje znaczniki czasu)
+    sensor_code  int32     indeks w sensor_ids
+    value        float64   NaN dla pustych lub niepoprawnych wartości
+    unit_code    int32     indeks w units
+    sensor_ids   str       słownik identyfikatorów czujników
+    units        str       słownik jednostek
+Kolumny zapisywane są strumieniowo do plików tymczasowych i dopiero na końcu składane w archiwum,
+więc pamięć nie zależy od długości eksportowanego zakresu.
+"""
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import lazy_import
+
+# Eksport kolumnowy wymaga NumPy
+np = lazy_import.optional("numpy")
+
+_COLUMNS = (("timestamp", "<i8"), ("sensor_code", "<i4"), ("value", "<f8"), ("unit_code", "<i4"))
+
+
+class _Dictionary:
+    """Kody kolejnych różnych napisów (w kolejności wystąpienia)."""
+
+    def __init__(self):
+        self.codes: Dict[Optional[str], int] = {}
+
+    def encode(self, column: List[Optional[str]], indices) -> "np.ndarray":
+        selected = column if len(indices) == len(column) else [column[i] for i in indices.tolist()]
+        codes = self.codes
+        # Nowe napisy porcji (w kolejności wystąpienia), potem kody przez map - bez pętli w Pythonie na wiersz
+        for name in dict.fromkeys(selected):
+            if name not in codes:
+                codes[name] = len(codes)
+        return np.fromiter(map(codes.__getitem__, selected), dtype=np.int32, count=len(selected))
+
+    def names(self) -> "np.ndarray":
+        return np.array(["" if name is None else name for name in self.codes], dtype=str)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Eksport kolumnowy logów wymaga pakietu NumPy")
+
+
+def _iter_column_chunks(logger, start_us: int, end_us: int, sensor_id: Optional[str], calibrated: bool,
+                        sensors: _Dictionary, units: _Dictionary) -> Iterator[Tuple["np.ndarray", ...]]:
+    """Zwraca kolumny (timestamp, sensor_code, value, unit_code) wierszy z zakresu - porcja po porcji."""
+    for micros, sensor_ids, values, unit_column in logger._chunks_in_range(start_us, end_us, calibrated,
+                                                                           sensor_id):
+        micros = np.asarray(micros if isinstance(micros, np.ndarray)
+                            else [-2 ** 63 if m is None else m for m in micros], dtype=np.int64)
+        mask = (micros >= start_us) & (micros <= end_us)
+        if sensor_id is not None:
+            mask &= np.asarray(sensor_ids, dtype=object) == sensor_id
+        indices = np.flatnonzero(mask)
+        if not len(indices):
+            continue
+        if not isinstance(values, np.ndarray):
+            values = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        yield (micros[indices], sensors.encode(sensor_ids, indices), values[indices],
+               units.encode(unit_column, indices))
+
+
+def export_columns(logger, start_us: int, end_us: int, sensor_id: Optional[str] = None,
+                   calibrated: bool = True, initial_capacity: int = 1 << 16) -> Dict[str, "np.ndarray"]:
+    """
+    Zwraca słownik kolumn gotowy dla pandas.DataFrame: timestamp (datetime64[us]), sensor_id
+    i unit (tablice object ze współdzielonymi napisami) oraz value (float64).
+    Wiersze są w kolejności plików (jak w Logger.aggregate_logs) - do analizy szeregów czasowych
+    warto je posortować według timestamp.
+    """
+    _require_numpy()
+    sensors, units = _Dictionary(), _Dictionary()
+    capacity = initial_capacity
+    columns = [np.empty(capacity, dtype=dtype) for _, dtype in _COLUMNS]
+    size = 0
+    for parts in _iter_column_chunks(logger, start_us, end_us, sensor_id, calibrated, sensors, units):
+        count = len(parts[0])
+        if size + count > capacity:
+            while size + count > capacity:
+                capacity *= 2
+            grown = [np.empty(capacity, dtype=dtype) for _, dtype in _COLUMNS]
+            for old, new in zip(columns, grown):
+                new[:size] = old[:size]
+            columns = grown
+        for column, part in zip(columns, parts):
+            column[size:size + count] = part
+        size += count
+
+    # Kopie zwalniają nadmiarową pojemność buforów
+    timestamps, sensor_codes, values, unit_codes = (column[:size].copy() for column in columns)
+    return {
+        "timestamp": timestamps.view('datetime64[us]'),
+        "sensor_id": sensors.names().astype(object)[sensor_codes],
+        "value": values,
+        "unit": units.names().astype(object)[unit_codes],
+    }
+
+
+def export_npz(logger, path: str, start_us: int, end_us: int, sensor_id: Optional[str] = None,
+               calibrated: bool = True, compress: bool = False) -> int:
+    """
+    Zapisuje wiersze z zakresu do pliku .npz (format w opisie modułu); zwraca liczbę wierszy.
+    Plik docelowy podmieniany jest atomowo dopiero po zapisaniu całości.
+    """
+    _require_numpy()
+    sensors, units = _Dictionary(), _Dictionary()
+    target_dir = os.path.dirname(os.path.abspath(path))
+    rows = 0
+    with tempfile.TemporaryDirectory(dir=target_dir, prefix=".export-") as spool_dir:
+        spools = [open(os.path.join(spool_dir, name), 'wb') for name, _ in _COLUMNS]
+        try:
+            for parts in _iter_column_chunks(logger, start_us, end_us, sensor_id, calibrated, sensors, units):
+                for spool, part, (_, dtype) in zip(spools, parts, _COLUMNS):
+                    spool.write(part.astype(dtype, copy=False).tobytes())
+                rows += len(parts[0])
+        finally:
+            for spool in spools:
+                spool.close()
+
+        tmp_path = os.path.join(spool_dir, "export.npz")
+        method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        with zipfile.ZipFile(tmp_path, 'w', method, allowZip64=True) as zipf:
+            for name, dtype in _COLUMNS:
+                with zipf.open(name + ".npy", 'w', force_zip64=True) as out, \
+                        open(os.path.join(spool_dir, name), 'rb') as spool:
+                    header = {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                              "fortran_order": False, "shape": (rows,)}
+                    np.lib.format.write_array_header_1_0(out, header)
+                    shutil.copyfileobj(spool, out, 1 << 20)
+            for name, dictionary in (("sensor_ids", sensors), ("units", units)):
+                with zipf.open(name + ".npy", 'w') as out:
+                    np.lib.format.write_array(out, dictionary.names(), allow_pickle=False)
+        os.replace(tmp_path, path)
+    return rows
+
+
+def load_npz(path: str) -> Dict[str, "np.ndarray"]:
+    """Wczytuje plik z export_npz do kolumn w tym samym układzie co export_columns."""
+    _require_numpy()
+    with np.load(path, allow_pickle=False) as data:
+        sensor_names = data["sensor_ids"].astype(object)
+        unit_names = data["units"].astype(object)
+        return {
+            "timestamp": data["timestamp"].view('datetime64[us]'),
+            "sensor_id": sensor_names[data["sensor_code"]],
+            "value": data["value"],
+            "unit": unit_names[data["unit_code"]],
+        }
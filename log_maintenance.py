@@ -0,0 +1,179 @@
+"""
+Utrzymanie archiwów Loggera: trwały spis archiwów (manifest) i wątek prac w tle.
+
+Manifest (archive/manifest.json) przechowuje archiwa w kolejności archiwizacji wraz z
+podsumowaniem (rollup) każdego z nich: zakres czasu, liczba wierszy i statystyki czujników.
+Dzięki temu retencja usuwa archiwa z początku listy bez listowania katalogu i sprawdzania
+czasów modyfikacji, a odczyt może pominąć archiwa spoza zakresu zapytania bez ich otwierania.
+"""
+import bisect
+import json
+import os
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+
+from metrics import REGISTRY
+
+_TASKS = REGISTRY.counter("logger_maintenance_tasks_total", "Liczba wykonanych zadań utrzymania archiwów")
+_TASK_ERRORS = REGISTRY.counter("logger_maintenance_errors_total", "Liczba zadań utrzymania zakończonych błędem")
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class ArchiveManifest:
+    """
+    Spis archiwów katalogu archive_dir (bezpieczny wątkowo).
+
+    Wpis to słownik {"name", "archived_at" (sekundy EPOCH), "mtime_ns", "size", "rows",
+    "min_us", "max_us", "sensors": {sensor_id: [liczba, suma, min, max]}}; dla archiwów
+    dopisanych przez reconcile() znane są tylko nazwa i czas archiwizacji.
+    """
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+        self.path = os.path.join(archive_dir, MANIFEST_FILENAME)
+        self._entries: List[dict] = []  # Posortowane według archived_at
+        self._by_name: Dict[str, dict] = {}
+        self._loaded_version = None  # (i-węzeł, mtime_ns, rozmiar) wczytanego lub zapisanego pliku
+        self._lock = threading.RLock()
+
+    def refresh(self) -> None:
+        """Wczytuje manifest, jeśli plik zmienił się od ostatniego odczytu lub zapisu (np. przez inny Logger)."""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if version == self._loaded_version:
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)["archives"]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Błąd podczas wczytywania manifestu archiwów {self.path}: {e}")
+                return
+            entries.sort(key=lambda e: e["archived_at"])
+            self._entries = entries
+            self._by_name = {e["name"]: e for e in entries}
+            self._loaded_version = version
+
+    def save(self) -> None:
+        """Zapisuje manifest atomowo (plik tymczasowy i os.replace)."""
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"archives": self._entries}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            stat = os.stat(self.path)
+            self._loaded_version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def get(self, name: str) -> Optional[dict]:
+        return self._by_name.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: dict) -> None:
+        """Dodaje (lub zastępuje) wpis archiwum, zachowując kolejność według archived_at."""
+        with self._lock:
+            self.refresh()
+            self._discard(entry["name"])
+            keys = [e["archived_at"] for e in self._entries]
+            self._entries.insert(bisect.bisect_right(keys, entry["archived_at"]), entry)
+            self._by_name[entry["name"]] = entry
+            self.save()
+
+    def pop_expired(self, cutoff: float) -> List[dict]:
+        """Zdejmuje z manifestu wpisy zarchiwizowane przed `cutoff` (sekundy EPOCH) - koszt O(liczba wygasłych)."""
+        with self._lock:
+            self.refresh()
+            count = 0
+            while count < len(self._entries) and self._entries[count]["archived_at"] < cutoff:
+                count += 1
+            if not count:
+                return []
+            expired = self._entries[:count]
+            del self._entries[:count]
+            for entry in expired:
+                self._by_name.pop(entry["name"], None)
+            self.save()
+            return expired
+
+    def reconcile(self) -> None:
+        """
+        Uzgadnia manifest z zawartością katalogu: dopisuje archiwa spoza manifestu (np. utworzone
+        przez tools/generate.py lub skopiowane ręcznie) z czasem modyfikacji jako czasem archiwizacji
+        i usuwa wpisy plików, których już nie ma. Pełne listowanie katalogu - wykonywane rzadko.
+        """
+        with self._lock:
+            self.refresh()
+            names = {name for name in os.listdir(self.archive_dir) if is_archive_name(name)}
+            changed = False
+            for name in list(self._by_name):
+                if name not in names:
+                    self._discard(name)
+                    changed = True
+            for name in names - self._by_name.keys():
+                try:
+                    archived_at = os.path.getmtime(os.path.join(self.archive_dir, name))
+                except OSError:
+                    continue
+                entry = {"name": name, "archived_at": archived_at}
+                keys = [e["archived_at"] for e in self._entries]
+                self._entries.insert(bisect.bisect_right(keys, archived_at), entry)
+                self._by_name[name] = entry
+                changed = True
+            if changed or self._loaded_version is None:
+                self.save()
+
+    def _discard(self, name: str) -> None:
+        entry = self._by_name.pop(name, None)
+        if entry is not None:
+            self._entries.remove(entry)
+
+
+def is_archive_name(name: str) -> bool:
+    """Czy plik katalogu archiwów jest archiwum logów (a nie manifestem lub plikiem tymczasowym)."""
+    return name != MANIFEST_FILENAME and not name.endswith(".tmp")
+
+
+class MaintenanceWorker:
+    """
+    Wątek wykonujący zadania utrzymania (kompresja, retencja) po kolei, poza ścieżką zapisu.
+    Wątek uruchamiany jest przy pierwszym zadaniu.
+    """
+
+    def __init__(self, name: str = "logger-maintenance"):
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, func: Callable, *args) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+                self._thread.start()
+        self._queue.put((func, args))
+
+    def drain(self) -> None:
+        """Czeka na wykonanie wszystkich zleconych zadań."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            func, args = self._queue.get()
+            try:
+                func(*args)
+                _TASKS.inc()
+            except Exception as e:
+                _TASK_ERRORS.inc()
+                print(f"Błąd zadania utrzymania archiwów {getattr(func, '__name__', func)}: {e}")
+            finally:
+                self._queue.task_done()
@@ -1,9 +1,18 @@
+import argparse
 import time
 import datetime
 from Logger import Logger
 from sensor import sensor, TemperatureSensor, HumiditySensor, PressureSensor
+import profiler
+import sensor_config
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sekwencyjna symulacja czujników z zapisem do logów.")
+    parser.add_argument("--fleet", help="Plik konfiguracji czujników (sensor_config: .jsonl lub .bin)")
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler.start_from_args(args)
+
     # 1. Inicjalizacja Loggera
     logger = Logger(config_path="config.json")
     logger.start()
@@ -18,6 +27,9 @@ if __name__ == "__main__":
                                      max_value=1050,frequency=5)
 
     sensors_list = [temp_sensor, humidity_sensor, pressure_sensor]
+    if args.fleet:
+        sensors_list = sensor_config.load_sensors(args.fleet)
+        temp_sensor = sensors_list[0]  # Czujnik używany w przykładzie odczytu logów
 
     # 3. Główna pętla symulacji (sekwencyjna)
     simulation_duration_seconds = 60
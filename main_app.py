@@ -1,20 +1,36 @@
 import time
 import datetime
-from typing import List
+from typing import List, Optional
 
-# Importy modułów z projektu
-from sensor import TemperatureSensor, HumiditySensor, PressureSensor, LightSensor, sensor as BaseSensor
+# Importy modułów z projektu (pula połączeń, ramki odczytów i tryb asyncio importowane tylko, gdy są używane)
+from sensor import default_sensors, sensor as BaseSensor
 from Logger import Logger
-import threading
 from network.client import NetworkClient
-from server.server import NetworkServer
-from network.config import load_client_config
+from network.config import load_client_config, load_config_section
+import logging
+import alerts
+from calibration import CalibrationTable
+import metrics
+import sampled_log
+import sensor_config
+import simulation
+import timecodec
+
+_TICK_SECONDS = metrics.REGISTRY.histogram("sensor_loop_tick_seconds", "Czas jednego obiegu pętli czujników")
 
 
 class SensorApplication:
-    def __init__(self):
+    def __init__(self, clock=None, seed: Optional[int] = None, fleet_path: Optional[str] = None):
+        """
+        :param clock: Zegar (simulation.WallClock lub SimulationClock); domyślnie czas rzeczywisty
+        :param seed: Ziarno generatorów czujników - ten sam seed i zegar symulacji dają identyczne odczyty
+        :param fleet_path: Plik konfiguracji floty (sensor_config, .jsonl lub .bin); domyślnie
+                           fleet.file z config.yaml, a bez niego domyślny zestaw czujników
+        """
+        self.clock = clock or simulation.WallClock()
+
         # Inicjalizacja Loggera
-        self.logger = Logger(config_path='config.json')
+        self.logger = Logger(config_path='config.json', clock=self.clock)
         self.logger.start()
 
         # self.server = NetworkServer(
@@ -24,33 +40,56 @@ class SensorApplication:
         # self.server_thread = threading.Thread(target=self.server.start, daemon=True)
         # self.server_thread.start()
 
-        # Inicjalizacja klienta sieciowego
+        # Eksport metryk (endpoint HTTP / okresowy zrzut) według sekcji `metrics` z config.yaml
+        metrics.start_from_config(load_config_section('metrics'))
+        # Tryb logowania zdarzeń per odczyt/pakiet (verbose, sampled, summary, off)
+        sampled_log.configure(load_config_section('logging'))
+        self.events = sampled_log.SampledLog(logging.getLogger("SensorApplication"))
+
+        # Inicjalizacja klienta sieciowego: pojedyncze połączenie, pula do wysyłki współbieżnej
+        # (pool_size > 1) albo skompresowane ramki odczytów (batching.enabled)
         client_config = load_client_config()
-        self.network_client = NetworkClient(
-            host=client_config['host'],
-            port=client_config['port'],
-            timeout=client_config['timeout'],
-            retries=client_config['retries']
-        )
+        batching_config = client_config.get('batching') or {}
+        self.pooled = client_config.get('pool_size', 1) > 1 and not batching_config.get('enabled')
+        if self.pooled:
+            from network.pool import ClientPool
+            self.network_client = ClientPool.from_config(client_config)
+        else:
+            self.network_client = NetworkClient(
+                host=client_config['host'],
+                port=client_config['port'],
+                timeout=client_config['timeout'],
+                retries=client_config['retries']
+            )
+            if batching_config.get('enabled'):
+                from network.batching import BatchingClient
+                self.network_client = BatchingClient.from_config(self.network_client, batching_config)
+        self._pending_sends = []  # (sensor_id, Future) wysyłek puli z bieżącego obiegu pętli
 
         # Inicjalizacja sensorów
-        self.sensors: List[BaseSensor] = [
-            TemperatureSensor(sensor_id="temp_01", name="Czujnik temperatury", unit="°C", min_value=-20, max_value=40,
-                              frequency=5),
-            HumiditySensor(sensor_id="hum_01", name="Czujnik wilgotności", unit="%", min_value=0, max_value=100,
-                           frequency=7),
-            PressureSensor(sensor_id="press_01", name="Czujnik ciśnienia", unit="hPa", min_value=950, max_value=1050,
-                           frequency=10),
-            LightSensor(sensor_id="light_01", name="Czujnik światła", unit="lux", min_value=0, max_value=2000,
-                        frequency=6),
-        ]
+        fleet_path = fleet_path or load_config_section('fleet').get('file')
+        self.sensors: List[BaseSensor] = sensor_config.load_sensors(fleet_path) if fleet_path else default_sensors()
+        simulation.attach(self.sensors, self.clock, seed)
+        # Kalibracja z pliku loggera (calibration_file), a bez niego z definicji czujników floty;
+        # logi zawierają surowe odczyty, kalibracja stosowana jest przy odczycie i w detektorze
+        if self.logger.calibration is None:
+            fleet_calibration = CalibrationTable.from_sensors(self.sensors)
+            if len(fleet_calibration):
+                self.logger.calibration = fleet_calibration
+
+        # Detektor anomalii zasilany callbackami czujników (sekcja `alerts` z config.yaml)
+        self.alerts = alerts.from_config(load_config_section('alerts'), calibration=self.logger.calibration)
+        if self.alerts is not None:
+            self.alerts.add_sensors(self.sensors)
+            for s in self.sensors:
+                s.register_callback(self.alerts.observe)
 
     def process_sensor_reading(self, sensor_id: str, timestamp: datetime.datetime, value: float, unit: str):
         """
         Callback wywoływany przez sensor po nowym odczycie.
         Loguje dane i wysyła je na serwer.
         """
-        print(f"Nowy odczyt z {sensor_id}: {value:.2f} {unit}")
+        self.events.event("odczyt", "Nowy odczyt z %s: %.2f %s", sensor_id, value, unit)
 
         # 1. Logowanie danych do pliku CSV za pomocą Loggera
         self.logger.log_reading(sensor_id, timestamp, round(value, 2), unit)
@@ -58,14 +97,23 @@ class SensorApplication:
         # 2. Przygotowanie i wysłanie danych na serwer
         data_packet = {
             "sensor_id": sensor_id,
-            "timestamp": timestamp.isoformat(),
+            "timestamp": timecodec.format_datetime(timestamp),
             "value": round(value, 2),
             "unit": unit
         }
 
-        if not self.network_client.send(data_packet):
+        if self.pooled:
+            self._pending_sends.append((sensor_id, self.network_client.submit(data_packet)))
+        elif not self.network_client.send(data_packet):
             print(f"BŁĄD: Nie udało się wysłać danych z sensora {sensor_id} na serwer.")
 
+    def _collect_sends(self):
+        """Czeka na wysyłki puli z bieżącego obiegu i zgłasza nieudane."""
+        for sensor_id, future in self._pending_sends:
+            if not future.result():
+                print(f"BŁĄD: Nie udało się wysłać danych z sensora {sensor_id} na serwer.")
+        self._pending_sends = []
+
     def run(self):
         """
         Główna pętla aplikacji.
@@ -76,29 +124,62 @@ class SensorApplication:
 
             # Pętla symulująca działanie
             while True:
+                tick_start = time.perf_counter()
                 for s in self.sensors:
                     # Metoda read_value symuluje odczyt i uwzględnia częstotliwość
                     # Dla uproszczenia, będziemy tu bezpośrednio wywoływać odczyt,
                     # a metoda sama zdecyduje, czy wygenerować nową wartość.
-                    old_value = s.last_value
+                    last_read_time = s._last_read_time
                     new_value = s.read_value()
 
-                    # Wywołaj callback tylko, jeśli wartość jest nowa
-                    if new_value != old_value:
+                    # Nowy odczyt rozpoznawany po czasie odczytu, a nie po zmianie wartości - powtórzona
+                    # wartość też trafia do Loggera (o pominięciu decydują polityki zapisu, write_policies)
+                    if s._last_read_time != last_read_time:
                         self.process_sensor_reading(s.sensor_id, s._last_read_time, new_value, s.unit)
+                if self.alerts is not None:
+                    self.alerts.flush()
+                self._collect_sends()
+                _TICK_SECONDS.observe(time.perf_counter() - tick_start)
 
-                time.sleep(1)  # Sprawdzaj sensory co sekundę
+                self.clock.sleep(1)  # Sprawdzaj sensory co sekundę
 
         except ConnectionRefusedError:
             print("Nie można połączyć się z serwerem. Sprawdź, czy jest uruchomiony.")
         except KeyboardInterrupt:
             print("\nZamykanie aplikacji...")
         finally:
+            if self.alerts is not None:
+                self.alerts.flush()
+            self.events.flush_summary()
             self.logger.stop()
+            for sensor_id, stats in self.logger.write_stats().items():
+                print(f"Polityka zapisu {sensor_id}: zapisano {stats['stored']} z {stats['received']} odczytów "
+                      f"(błąd odtworzenia <= {self.logger.error_bound(sensor_id)} {stats['policy']})")
             self.network_client.close()
             print("Aplikacja została zatrzymana.")
 
 
 if __name__ == "__main__":
-    app = SensorApplication()
+    import argparse
+
+    import profiler
+
+    parser = argparse.ArgumentParser(description="Symulacja czujników z zapisem do logów i wysyłką na serwer.")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Tryb asyncio: próbkowanie, zapis i wysyłka jako niezależne zadania (async_app.py)")
+    parser.add_argument("--fleet", help="Plik konfiguracji czujników (sensor_config: .jsonl lub .bin)")
+    profiler.add_arguments(parser)
+    args = parser.parse_args()
+    profiler.start_from_args(args)
+    sampled_log.setup_console()
+
+    if args.use_async:
+        from async_app import AsyncSensorApplication
+        async_config = load_config_section('async')
+        app = AsyncSensorApplication(fleet_path=args.fleet,
+                                     log_queue_size=async_config.get('log_queue_size', 10000),
+                                     uplink_queue_size=async_config.get('uplink_queue_size', 1000),
+                                     shutdown_timeout=async_config.get('shutdown_timeout', 5.0))
+    else:
+        app = SensorApplication(fleet_path=args.fleet)
     app.run()
\ No newline at end of file
@@ -0,0 +1,246 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Domyślne granice kubełków histogramów (w sekundach) - od 50 µs do 10 s
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Counter:
+    """Licznik monotoniczny (np. liczba wiadomości, błędów, bajtów)."""
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    Histogram o stałych granicach kubełków.
+    Obserwacja to jedno wyszukiwanie binarne i inkrementacja - bez alokacji na ścieżce krytycznej.
+    """
+
+    def __init__(self, name: str, help: str = "", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # ostatni kubełek: +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        """Zwraca menedżer kontekstu mierzący czas wykonania bloku."""
+        return _Timer(self)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Przybliżony kwantyl (górna granica kubełka, w którym wypada)."""
+        with self._lock:
+            if not self.count:
+                return None
+            target = q * self.count
+            cumulative = 0
+            for bound, count in zip(self.bounds + [float("inf")], self.counts):
+                cumulative += count
+                if cumulative >= target:
+                    return bound
+        return None
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class MetricsRegistry:
+    """Rejestr liczników i histogramów udostępnianych przez endpoint HTTP lub okresowy zrzut."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help))
+
+    def histogram(self, name: str, help: str = "", buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help, buckets))
+
+    def _get_or_create(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = factory()
+                self._metrics[name] = metric
+            return metric
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Zwraca bieżące wartości wszystkich metryk jako słownik (np. do zapisu w JSON)."""
+        result = {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            if isinstance(metric, Counter):
+                result[metric.name] = {"type": "counter", "value": metric.value}
+            else:
+                result[metric.name] = {
+                    "type": "histogram",
+                    "count": metric.count,
+                    "sum": metric.sum,
+                    "p50": metric.quantile(0.5),
+                    "p95": metric.quantile(0.95),
+                    "p99": metric.quantile(0.99),
+                }
+        return result
+
+    def render_text(self) -> str:
+        """Formatuje metryki w tekstowym formacie zgodnym z Prometheusem."""
+        lines: List[str] = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            if isinstance(metric, Counter):
+                lines.append(f"# TYPE {metric.name} counter")
+                lines.append(f"{metric.name} {metric.value}")
+            else:
+                lines.append(f"# TYPE {metric.name} histogram")
+                with metric._lock:
+                    counts = list(metric.counts)
+                    total, count = metric.sum, metric.count
+                cumulative = 0
+                for bound, bucket_count in zip(metric.bounds, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric.name}_bucket{{le="{bound:g}"}} {cumulative}')
+                lines.append(f'{metric.name}_bucket{{le="+Inf"}} {count}')
+                lines.append(f"{metric.name}_sum {total}")
+                lines.append(f"{metric.name}_count {count}")
+        return "\n".join(lines) + "\n"
+
+
+# Wspólny rejestr procesu - moduły rejestrują w nim swoje metryki przy imporcie
+REGISTRY = MetricsRegistry()
+
+
+def _handler_class(registry: MetricsRegistry):
+    """Klasa obsługi zapytań endpointu metryk (http.server importowany dopiero przy uruchomieniu)."""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body = json.dumps(registry.snapshot()).encode('utf-8')
+                content_type = "application/json"
+            elif self.path.startswith("/metrics") or self.path == "/":
+                body = registry.render_text().encode('utf-8')
+                content_type = "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Bez logowania każdego zapytania o metryki
+
+    return MetricsHandler
+
+
+def start_http_server(port: int, host: str = "127.0.0.1",
+                      registry: MetricsRegistry = REGISTRY) -> "ThreadingHTTPServer":
+    """
+    Uruchamia w wątku tła lokalny endpoint HTTP z metrykami (/metrics oraz /metrics.json).
+
+    Args:
+        port (int): Port nasłuchu (0 - dowolny wolny port).
+        host (str): Adres nasłuchu, domyślnie tylko lokalnie.
+        registry (MetricsRegistry): Rejestr, którego metryki są udostępniane.
+
+    Returns:
+        Uruchomiony serwer HTTP (server_address zawiera rzeczywisty port).
+    """
+    from http.server import ThreadingHTTPServer
+
+    httpd = ThreadingHTTPServer((host, port), _handler_class(registry))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True, name="metrics-http").start()
+    return httpd
+
+
+class StatsDumper(threading.Thread):
+    """Okresowo zapisuje migawkę metryk do pliku (JSON lines) lub do standardowego loggera."""
+
+    def __init__(self, interval: float, path: Optional[str] = None, registry: MetricsRegistry = REGISTRY):
+        super().__init__(daemon=True, name="metrics-dump")
+        self.interval = interval
+        self.path = path
+        self.registry = registry
+        self.logger = logging.getLogger("Metrics")
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.dump()
+
+    def dump(self) -> None:
+        line = json.dumps({"time": time.time(), "metrics": self.registry.snapshot()})
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        else:
+            self.logger.info(line)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def start_from_config(config: Dict, registry: MetricsRegistry = REGISTRY, port_key: str = "http_port") -> None:
+    """
+    Uruchamia eksport metryk zgodnie z sekcją `metrics` z config.yaml.
+    Zajęty port endpointu HTTP nie przerywa działania procesu - metryki nie są wtedy udostępniane.
+
+    Args:
+        config (dict): Klucze http_port (endpoint HTTP), dump_interval i dump_file (okresowy zrzut).
+        port_key (str): Klucz portu HTTP tego procesu (aplikacja i serwer na jednym hoście
+            potrzebują różnych portów, np. http_port i server_http_port).
+    """
+    if config.get(port_key) is not None:
+        port = int(config[port_key])
+        try:
+            start_http_server(port, config.get("http_host", "127.0.0.1"), registry)
+        except OSError as e:
+            logging.getLogger("Metrics").warning(f"Nie można uruchomić endpointu metryk na porcie {port}: {e}")
+    if config.get("dump_interval"):
+        StatsDumper(float(config["dump_interval"]), config.get("dump_file"), registry).start()
@@ -0,0 +1,319 @@
+"""
+Skompresowane ramki odczytów dla wolnych łączy.
+
+Ramka to linia nagłówka JSON {"frame": <kodek>, "bytes": N} i N bajtów skompresowanej treści
+(zlib lub lzma z biblioteki standardowej). Treść to kolumny porcji odczytów w oryginalnej kolejności:
+    {"keys": [[sensor_id, unit], ...],   tablica czujników porcji
+     "k": [...],                          indeks czujnika każdego odczytu
+     "t": [...],                          znaczniki czasu w mikrosekundach: pierwszy bezwzględny, dalej różnice
+     "v": [...],                          wartości jako liczby całkowite (value * 10**decimals), dla każdego
+                                          czujnika pierwsza bezwzględna, dalej różnice względem jego poprzedniej
+     "d": decimals}
+Różnice są małymi liczbami o powtarzalnych cyfrach, więc po kompresji odczyt zajmuje kilka bajtów.
+Serwer odpowiada na ramkę jedną linią: "ACK" albo "NACK <powód>".
+"""
+import json
+import logging
+import lzma
+import math
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import timecodec
+from metrics import REGISTRY
+
+_FRAMES_SENT = REGISTRY.counter("client_frames_sent_total", "Liczba ramek potwierdzonych przez serwer")
+_FRAME_READINGS = REGISTRY.histogram("client_frame_readings", "Liczba odczytów w jednej ramce",
+                                     buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000))
+_RAW_BYTES = REGISTRY.counter("client_frame_raw_bytes_total", "Rozmiar treści ramek przed kompresją")
+_WIRE_BYTES = REGISTRY.counter("client_frame_wire_bytes_total", "Rozmiar wysłanych ramek (nagłówek i treść)")
+_FRAME_FAILURES = REGISTRY.counter("client_frame_failures_total", "Liczba ramek niewysłanych po wszystkich próbach")
+
+# Kodek -> (kompresja, fabryka dekompresora strumieniowego - rozpakowanie z limitem rozmiaru)
+CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompressobj),
+    "lzma": (lzma.compress, lzma.LZMADecompressor),
+}
+FRAME_PREFIX = b'{"frame"'
+# Ograniczenie rozmiaru ramki przyjmowanej przez serwer (po kompresji i po rozpakowaniu)
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+# Dopuszczalna dokładność wartości w ramce (miejsca po przecinku, pole "d")
+MAX_DECIMALS = 9
+
+
+def _valid_decimals(decimals) -> bool:
+    return isinstance(decimals, int) and not isinstance(decimals, bool) and 0 <= decimals <= MAX_DECIMALS
+
+
+def frameable(data: dict) -> bool:
+    """Czy pakiet jest odczytem, który da się zapisać w ramce (pozostałe wysyłane są jako linie JSON)."""
+    value = data.get("value")
+    if not (set(data) <= {"sensor_id", "timestamp", "value", "unit"}
+            and isinstance(data.get("sensor_id"), str) and isinstance(data.get("timestamp"), str)
+            and isinstance(data.get("unit", ""), str)
+            and isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)):
+        return False
+    try:
+        timecodec.parse_datetime(data["timestamp"])
+    except ValueError:
+        return False  # Znacznik spoza ISO 8601 - serwer oceni go jako zwykłą linię JSON
+    return True
+
+
+def encode_frame(readings: List[dict], codec: str = "zlib", decimals: int = 2) -> bytes:
+    """
+    Koduje porcję odczytów (pakiety jak dla NetworkClient.send, zob. frameable) do ramki.
+    Wartości zaokrąglane są do `decimals` miejsc po przecinku.
+    """
+    compress, _ = CODECS[codec]
+    body = _encode_body(readings, decimals)
+    _RAW_BYTES.inc(len(body))
+    payload = compress(body)
+    return json.dumps({"frame": codec, "bytes": len(payload)}).encode('utf-8') + b"\n" + payload
+
+
+def _encode_body(readings: List[dict], decimals: int) -> bytes:
+    scale = 10 ** decimals
+    keys: Dict[Tuple[str, str], int] = {}
+    last_values: List[int] = []
+    k, t, v = [], [], []
+    last_time = 0
+    for reading in readings:
+        key = (reading["sensor_id"], reading.get("unit", ""))
+        index = keys.get(key)
+        if index is None:
+            index = keys[key] = len(keys)
+            last_values.append(0)
+        micros = timecodec.to_micros(timecodec.parse_datetime(reading["timestamp"]))
+        quantized = round(reading["value"] * scale)
+        k.append(index)
+        t.append(micros - last_time)
+        v.append(quantized - last_values[index])
+        last_time = micros
+        last_values[index] = quantized
+    return json.dumps({"keys": list(keys), "k": k, "t": t, "v": v, "d": decimals},
+                      separators=(",", ":")).encode('utf-8')
+
+
+def parse_header(line: bytes) -> Tuple[str, int]:
+    """
+    Odczytuje nagłówek ramki i zwraca (kodek, liczba bajtów treści).
+
+    Raises:
+        ValueError: Niepoprawny nagłówek, nieznany kodek lub zbyt duża ramka.
+    """
+    try:
+        header = json.loads(line)
+        codec, size = header["frame"], header["bytes"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("niepoprawny nagłówek ramki")
+    if codec not in CODECS:
+        raise ValueError(f"nieznany kodek ramki: {codec}")
+    if not isinstance(size, int) or not 0 <= size <= MAX_FRAME_BYTES:
+        raise ValueError(f"niepoprawny rozmiar ramki: {size}")
+    return codec, size
+
+
+def decode_frame(codec: str, payload: bytes) -> List[dict]:
+    """
+    Dekoduje treść ramki do pakietów odczytów (w formacie NetworkClient.send).
+
+    Raises:
+        ValueError: Uszkodzona treść ramki.
+    """
+    _, decompressor_factory = CODECS[codec]
+    try:
+        # Limit wyjścia: mała ramka od niezaufanego nadawcy nie może rozpakować się do dowolnego rozmiaru
+        decompressor = decompressor_factory()
+        raw = decompressor.decompress(payload, MAX_FRAME_BYTES)
+        if not decompressor.eof:
+            raise ValueError(f"treść niekompletna lub większa niż {MAX_FRAME_BYTES} B po rozpakowaniu")
+        if decompressor.unused_data:
+            raise ValueError("dane za końcem skompresowanej treści")
+        body = json.loads(raw)
+        keys, k, t, v, decimals = body["keys"], body["k"], body["t"], body["v"], body["d"]
+        if not len(k) == len(t) == len(v):
+            raise ValueError("kolumny ramki mają różne długości")
+        if not _valid_decimals(decimals):
+            raise ValueError(f"niepoprawna dokładność: {decimals!r}")
+        scale = 10 ** decimals
+        micros = []
+        last_time = 0
+        for delta in t:
+            last_time += delta
+            micros.append(last_time)
+        last_values = [0] * len(keys)
+        readings = []
+        for index, value_delta, timestamp in zip(k, v, timecodec.format_micros_column(micros)):
+            last_values[index] += value_delta
+            sensor_id, unit = keys[index]
+            readings.append({"sensor_id": sensor_id, "timestamp": timestamp,
+                             "value": last_values[index] / scale, "unit": unit})
+        return readings
+    except (ValueError, KeyError, TypeError, IndexError, zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"uszkodzona ramka: {e}")
+
+
+class BatchingClient:
+    """
+    Nakładka na NetworkClient zbierająca odczyty w skompresowane ramki.
+
+    send() tylko dopisuje odczyt do porcji; wątek wysyłający wysyła ramkę, gdy najstarszy
+    odczyt czeka max_delay albo porcja osiągnie docelowy rozmiar. Docelowy rozmiar to liczba
+    odczytów napływających w czasie max(max_delay, RTT) (z bieżącej przepustowości), ograniczona
+    limitem, który maleje o połowę po timeoucie lub błędzie ramki i rośnie powoli po udanych wysyłkach.
+    """
+
+    def __init__(self, client, max_delay: float = 0.2, max_messages: int = 500, codec: str = "zlib",
+                 decimals: int = 2):
+        """
+        Args:
+            client (NetworkClient): Klient, którym wysyłane są ramki (połączenie i ponowienia).
+            max_delay (float): Maksymalny czas oczekiwania odczytu na wysłanie w sekundach.
+            max_messages (int): Maksymalna liczba odczytów w ramce.
+            codec (str): Kodek kompresji ("zlib" lub "lzma").
+            decimals (int): Dokładność wartości w ramce (miejsca po przecinku).
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Nieznany kodek: {codec}")
+        if not _valid_decimals(decimals):
+            raise ValueError(f"Dokładność ramki musi być liczbą całkowitą 0..{MAX_DECIMALS}: {decimals!r}")
+        self.client = client
+        self.max_delay = max_delay
+        self.max_messages = max_messages
+        self.codec = codec
+        self.decimals = decimals
+        self.logger = logging.getLogger("BatchingClient")
+        self._pending: List[dict] = []
+        self._first_arrival = 0.0
+        self._cond = threading.Condition()
+        self._closing = False
+        self._sending = False
+        self._limit = max_messages
+        self._rate: Optional[float] = None  # Odczyty/s (EWMA)
+        self._rtt: Optional[float] = None  # Czas potwierdzenia ramki (EWMA)
+        self._last_flush = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, client, config: dict) -> "BatchingClient":
+        """Tworzy nakładkę z podsekcji `batching` sekcji `client` config.yaml."""
+        return cls(client, max_delay=config.get('max_delay_ms', 200) / 1000,
+                   max_messages=config.get('max_messages', 500), codec=config.get('codec', 'zlib'),
+                   decimals=config.get('decimals', 2))
+
+    def connect(self) -> None:
+        self.client.connect()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="batching-client")
+        self._thread.start()
+
+    def send(self, data: dict) -> bool:
+        """
+        Dodaje odczyt do bieżącej porcji (bez czekania na serwer). Pakiety, których nie da się
+        zapisać w ramce, wysyłane są od razu zwykłym send() po wcześniejszych odczytach.
+        """
+        if not frameable(data):
+            self.flush()
+            return self.client.send(data)
+        with self._cond:
+            first = not self._pending
+            if first:
+                self._first_arrival = time.monotonic()
+            self._pending.append(data)
+            # Pierwszy odczyt budzi bezczynny wątek wysyłający, który odlicza od niego max_delay
+            if first or len(self._pending) >= self.target_size():
+                self._cond.notify_all()
+        return True
+
+    def flush(self) -> None:
+        """Czeka, aż wszystkie zebrane odczyty zostaną wysłane."""
+        with self._cond:
+            self._first_arrival = 0.0  # Najstarszy odczyt "czeka już za długo" - wysyłka natychmiast
+            self._cond.notify_all()
+            while self._pending or self._sending:
+                self._cond.wait()
+
+    def close(self) -> None:
+        """Wysyła zebrane odczyty i zamyka połączenie."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.client.close()
+
+    def target_size(self) -> int:
+        """Docelowa liczba odczytów w ramce dla bieżącej przepustowości i RTT."""
+        if self._rate is None:
+            return self._limit
+        window = max(self.max_delay, self._rtt or 0.0)
+        return max(1, min(self._limit, round(self._rate * window)))
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._pending and (self._closing or len(self._pending) >= self.target_size()):
+                        break
+                    if not self._pending and self._closing:
+                        return
+                    timeout = None
+                    if self._pending:
+                        timeout = self._first_arrival + self.max_delay - time.monotonic()
+                        if timeout <= 0:
+                            break
+                    self._cond.wait(timeout)
+                batch = self._pending[:self._limit]
+                del self._pending[:len(batch)]
+                if self._pending:
+                    self._first_arrival = time.monotonic()
+                self._sending = True
+            try:
+                self._send_frame(batch)
+            except Exception as e:
+                # Błąd jednej ramki (np. kodowania) nie może zatrzymać wątku wysyłającego
+                _FRAME_FAILURES.inc()
+                self.logger.error(f"Ramka {len(batch)} odczytów nie została wysłana: {e}")
+            finally:
+                with self._cond:
+                    self._sending = False
+                    self._cond.notify_all()
+
+    def _send_frame(self, batch: List[dict]) -> None:
+        now = time.monotonic()
+        rate = len(batch) / max(now - self._last_flush, 1e-3)
+        self._last_flush = now
+        self._rate = rate if self._rate is None else 0.8 * self._rate + 0.2 * rate
+
+        frame = encode_frame(batch, self.codec, self.decimals)
+        for attempt in range(self.client.retries):
+            t0 = time.monotonic()
+            try:
+                result = self.client.exchange_bytes(frame, f"ramka {len(batch)} odczytów")
+            except OSError as e:
+                # Timeout albo zerwane połączenie: mniejsze ramki, ponowne połączenie i ponowienie
+                self._limit = max(1, self._limit // 2)
+                self.logger.error(f"Błąd wysyłki ramki: {e} (próba {attempt + 1}/{self.client.retries}).")
+                try:
+                    self.client.close()
+                    self.client.connect()
+                except ConnectionRefusedError:
+                    time.sleep(1)
+                continue
+            if result is None:
+                continue
+            rtt = time.monotonic() - t0
+            self._rtt = rtt if self._rtt is None else 0.8 * self._rtt + 0.2 * rtt
+            if result:
+                _FRAMES_SENT.inc()
+                _FRAME_READINGS.observe(len(batch))
+                _WIRE_BYTES.inc(len(frame))
+                if rtt < self.client.timeout / 4:
+                    self._limit = min(self.max_messages, self._limit + max(1, self._limit // 8))
+            return
+        _FRAME_FAILURES.inc()
+        self.logger.error(f"Ramka {len(batch)} odczytów nie została wysłana po wszystkich próbach.")
@@ -1,13 +1,28 @@
+import datetime
+import select
 import socket
 import json
 import logging
 import time
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional
 from network.config import load_client_config
+import timecodec
+from metrics import REGISTRY
+from sampled_log import SampledLog
 
-# Standardowy logger jest tutaj odpowiedniejszy do logowania stanu operacji sieciowych.
-# Logger z pliku jest przeznaczony do zapisu danych z sensorów w formacie CSV.
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_SEND_RTT = REGISTRY.histogram("client_send_rtt_seconds", "Czas od wysłania pakietu do otrzymania ACK")
+_MESSAGES_SENT = REGISTRY.counter("client_messages_sent_total", "Liczba pakietów potwierdzonych przez serwer")
+_RETRIES = REGISTRY.counter("client_retries_total", "Liczba ponowień wysyłki")
+_SEND_FAILURES = REGISTRY.counter("client_send_failures_total", "Liczba pakietów niewysłanych po wszystkich próbach")
+_BUSY_REPLIES = REGISTRY.counter("client_busy_total", "Odpowiedzi BUSY przeciążonego serwera (ponowienie po opóźnieniu)")
+
+
+def _busy_delay(response: str) -> float:
+    """Opóźnienie ponowienia w sekundach z odpowiedzi "BUSY <ms>" (domyślnie 0,1 s)."""
+    try:
+        return int(response.split()[1]) / 1000
+    except (IndexError, ValueError):
+        return 0.1
 
 
 class NetworkClient:
@@ -37,6 +52,8 @@ class NetworkClient:
         self.retries = retries
         self._socket: Optional[socket.socket] = None
         self.logger = logging.getLogger("NetworkClient")
+        # Zdarzenia per pakiet logowane zgodnie z trybem z sekcji `logging` config.yaml
+        self.events = SampledLog(self.logger)
 
     def connect(self) -> None:
         """
@@ -60,19 +77,13 @@ class NetworkClient:
             self.logger.error("Brak aktywnego połączenia. Użyj metody connect().")
             return False
 
-        serialized_data = self._serialize(data)
-
         for attempt in range(self.retries):
+            if attempt:
+                _RETRIES.inc()
             try:
-                self._socket.sendall(serialized_data)
-                self.logger.info(f"Wysłano pakiet: {data}")
-
-                response = self._socket.recv(1024).decode('utf-8').strip()
-                if response == "ACK":
-                    self.logger.info("Otrzymano potwierdzenie (ACK) od serwera.")
-                    return True
-                else:
-                    self.logger.warning(f"Otrzymano nieoczekiwaną odpowiedź: {response}")
+                result = self.exchange(data)
+                if result is not None:
+                    return result
 
             except socket.timeout:
                 self.logger.error(f"Timeout podczas oczekiwania na ACK (próba {attempt + 1}/{self.retries}).")
@@ -85,14 +96,166 @@ class NetworkClient:
                 except ConnectionRefusedError:
                     time.sleep(1)
 
+        _SEND_FAILURES.inc()
         self.logger.error("Wysłanie danych nie powiodło się po wszystkich próbach.")
         return False
 
+    def exchange(self, data: dict) -> Optional[bool]:
+        """
+        Jedna próba wysyłki bez ponowień: wysyła pakiet i czeka na odpowiedź serwera.
+
+        Odpowiedź "BUSY <ms>" (serwer przeciążony, wiadomość nie została przyjęta) powoduje ponowienie
+        na tym samym połączeniu po wskazanym czasie (podwajanym przy kolejnych BUSY), najwyżej
+        `retries` razy.
+
+        Returns:
+            True - ACK, False - NACK (serwer odrzucił odczyt), None - nieoczekiwana odpowiedź
+            lub serwer wciąż przeciążony.
+
+        Raises:
+            ConnectionError: Brak aktywnego połączenia.
+            socket.timeout, socket.error: Błąd sieci lub brak odpowiedzi w czasie timeout.
+        """
+        return self.exchange_bytes(self._serialize(data), data)
+
+    def exchange_bytes(self, message: bytes, description=None) -> Optional[bool]:
+        """
+        Jak exchange(), dla wiadomości już zakodowanej (np. ramki z network.batching).
+
+        Args:
+            message (bytes): Wiadomość z kończącym znakiem nowej linii lub ramka.
+            description: Opis wiadomości do logu zdarzeń.
+        """
+        if not self._socket:
+            raise ConnectionError("Brak aktywnego połączenia.")
+        t0 = time.perf_counter()
+        self._socket.sendall(message)
+        self.events.event("wysłano", "Wysłano pakiet: %s", description)
+
+        response = self._socket.recv(1024).decode('utf-8').strip()
+        busy_replies = 0
+        while response.startswith("BUSY"):
+            _BUSY_REPLIES.inc()
+            if busy_replies >= self.retries:
+                self.logger.warning(f"Serwer przeciążony - pakiet nie został przyjęty: {response}")
+                return None
+            time.sleep(min(_busy_delay(response) * 2 ** busy_replies, self.timeout))
+            busy_replies += 1
+            self._socket.sendall(message)
+            response = self._socket.recv(1024).decode('utf-8').strip()
+        if response == "ACK":
+            _SEND_RTT.observe(time.perf_counter() - t0)
+            _MESSAGES_SENT.inc()
+            self.events.event("ack", "Otrzymano potwierdzenie (ACK) od serwera.")
+            return True
+        if response.startswith("NACK"):
+            # Serwer odrzucił odczyt (np. niepoprawne dane) - ponowienie nic nie zmieni
+            _SEND_FAILURES.inc()
+            self.logger.warning(f"Serwer odrzucił pakiet: {response}")
+            return False
+        self.logger.warning(f"Otrzymano nieoczekiwaną odpowiedź: {response}")
+        return None
+
+    def is_alive(self) -> bool:
+        """
+        Sprawdza bez blokowania, czy bezczynne połączenie nadaje się do użycia.
+        Na bezczynnym gnieździe nie powinno być nic do odczytu - gotowość oznacza zamknięcie
+        połączenia przez serwer albo spóźnioną odpowiedź, po której protokół jest rozsynchronizowany.
+        """
+        if not self._socket:
+            return False
+        try:
+            readable, _, _ = select.select([self._socket], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def query(
+            self,
+            start: datetime.datetime,
+            end: datetime.datetime,
+            sensor_id: Optional[str] = None,
+            bucket_seconds: Optional[float] = None,
+            batch_size: int = 1000,
+            window: int = 4,
+            timeout: float = 60.0
+    ) -> Iterator[Dict]:
+        """
+        Pobiera z serwera odczyty z zakresu (jak Logger.read_logs) albo, z bucket_seconds,
+        agregaty (jak Logger.aggregate_logs). Wynik przychodzi strumieniowo porcjami po
+        batch_size wierszy; serwer wysyła najwyżej `window` porcji ponad potwierdzone.
+        Przerwanie iteracji (break/close) anuluje zapytanie po stronie serwera.
+
+        Args:
+            timeout (float): Maksymalny czas oczekiwania na kolejną porcję w sekundach
+                (filtrowanie dużych archiwów może trwać dłużej niż zwykły timeout klienta).
+
+        Raises:
+            ConnectionError: Brak połączenia lub zerwane połączenie w trakcie zapytania.
+            ValueError: Serwer odrzucił zapytanie.
+        """
+        if not self._socket:
+            raise ConnectionError("Brak aktywnego połączenia. Użyj metody connect().")
+        request = {
+            "command": "query",
+            "start": timecodec.format_datetime(start),
+            "end": timecodec.format_datetime(end),
+            "sensor_id": sensor_id,
+            "bucket_seconds": bucket_seconds,
+            "batch_size": batch_size,
+            "window": window,
+        }
+        self._socket.settimeout(timeout)
+        reader = self._socket.makefile('rb')
+        finished = False
+        try:
+            self._socket.sendall(self._serialize(request))
+            columns = []
+            for line in reader:
+                message = self._deserialize(line)
+                kind = message.get("type")
+                if kind == "batch":
+                    # Potwierdzenie od razu - serwer przygotowuje kolejną porcję, gdy ta jest przetwarzana
+                    self._socket.sendall(b"ACK\n")
+                    for row in message["rows"]:
+                        entry = dict(zip(columns, row))
+                        for key in ("timestamp", "start"):
+                            if key in entry:
+                                entry[key] = timecodec.parse_datetime(entry[key])
+                        yield entry
+                elif kind == "header":
+                    columns = message["columns"]
+                elif kind == "end":
+                    finished = True
+                    return
+                elif kind == "error":
+                    finished = True
+                    raise ValueError(f"Serwer odrzucił zapytanie: {message.get('message')}")
+            finished = True
+            raise ConnectionError("Serwer zamknął połączenie w trakcie zapytania.")
+        finally:
+            if not finished:
+                self._cancel_query(reader)
+            reader.close()
+            if self._socket:
+                self._socket.settimeout(self.timeout)
+
+    def _cancel_query(self, reader) -> None:
+        """Anuluje trwające zapytanie i pomija porcje wysłane przed anulowaniem."""
+        try:
+            self._socket.sendall(b"CANCEL\n")
+            for line in reader:
+                if self._deserialize(line).get("type") in ("end", "error"):
+                    return
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Nie udało się anulować zapytania: {e}")
+
     def close(self) -> None:
         """Zamyka połączenie z serwerem."""
         if self._socket:
             self._socket.close()
             self._socket = None
+            self.events.flush_summary()
             self.logger.info("Połączenie z serwerem zostało zamknięte.")
 
     def _serialize(self, data: dict) -> bytes:
@@ -102,6 +265,9 @@ class NetworkClient:
         return json.loads(raw.decode('utf-8'))
 
 if __name__ == "__main__":
+    import sampled_log
+
+    sampled_log.setup_console()
     config = load_client_config('../config.yaml')
     HOST = config['host']
     PORT = config['port']
@@ -1,5 +1,46 @@
-import yaml
-from typing import Dict, Any
+import copy
+import os
+import threading
+from typing import Dict, Any, Tuple
+
+import lazy_import
+
+# PyYAML importowany dopiero przy pierwszym wczytaniu konfiguracji
+yaml = lazy_import.lazy("yaml")
+
+# Sparsowane pliki konfiguracji: ścieżka -> ((mtime_ns, rozmiar), dokument); start aplikacji
+# wczytuje kilka sekcji tego samego pliku, więc YAML parsowany jest raz, dopóki plik się nie zmieni
+_documents: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_documents_lock = threading.Lock()
+
+
+def _load_document(config_path: str) -> Dict[str, Any]:
+    stat = os.stat(config_path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _documents_lock:
+        cached = _documents.get(config_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f) or {}
+    with _documents_lock:
+        _documents[config_path] = (version, config)
+    return config
+
+
+def load_config_section(section: str, config_path: str = 'config.yaml') -> Dict[str, Any]:
+    """
+    Wczytuje wskazaną sekcję konfiguracji z pliku YAML.
+
+    Args:
+        section (str): Nazwa sekcji (np. 'client', 'metrics').
+        config_path (str): Ścieżka do pliku config.yaml.
+
+    Returns:
+        Słownik z konfiguracją sekcji (pusty, jeśli sekcji nie ma); kopia - można ją modyfikować.
+    """
+    return copy.deepcopy(_load_document(config_path).get(section) or {})
+
 
 def load_client_config(config_path: str = 'config.yaml') -> Dict[str, Any]:
     """
@@ -11,6 +52,4 @@ def load_client_config(config_path: str = 'config.yaml') -> Dict[str, Any]:
     Returns:
         Słownik z konfiguracją klienta.
     """
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config.get('client', {})
\ No newline at end of file
+    return load_config_section('client', config_path)
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Wspólna warstwa odbioru wiadomości dla serwerów (server.server.NetworkServer, gui ThreadedServer).
+
+LineFramer czyta z gniazda przez recv_into do jednego, wcześniej zaalokowanego bufora
+(bytearray) i wydziela wiadomości jako widoki memoryview - bez sklejania i dzielenia
+napisów przy każdej wiadomości. parse_json_lines parsuje całą porcję linii po jednym
+dekodowaniu UTF-8, zachowując wynik (i błąd) każdej linii osobno.
+"""
+import json
+import re
+import socket
+from typing import List, NamedTuple, Optional
+
+# Największa wiadomość (linia lub treść ramki), jaką może pomieścić bufor
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024 + 64 * 1024
+
+_DECODER = json.JSONDecoder()
+_LINE_WHITESPACE = re.compile(r'[ \t\r]*')
+
+
+class LineFramer:
+    """
+    Bufor odbiorczy połączenia.
+
+    Widoki zwracane przez next_line() i read_exact() wskazują na wnętrze bufora, więc są
+    ważne tylko do następnego wywołania fill() - wiadomości trzeba obsłużyć (albo skopiować) wcześniej.
+    """
+
+    def __init__(self, sock: socket.socket, capacity: int = 64 * 1024, max_capacity: int = MAX_MESSAGE_BYTES):
+        self._socket = sock
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._max_capacity = max_capacity
+        self._start = 0  # Początek nieprzetworzonych danych
+        self._end = 0  # Koniec odebranych danych
+        self._scan = 0  # Do tego miejsca szukano już znaku nowej linii
+
+    def fill(self) -> int:
+        """
+        Odbiera kolejne dane z gniazda; zwraca liczbę odebranych bajtów (0 - połączenie zamknięte).
+
+        Raises:
+            ValueError: Wiadomość nie mieści się w maksymalnym rozmiarze bufora.
+        """
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+        elif self._end == len(self._buffer):
+            self._make_room()
+        received = self._socket.recv_into(self._view[self._end:])
+        self._end += received
+        return received
+
+    def _make_room(self) -> None:
+        unread = self._end - self._start
+        if self._start >= len(self._buffer) // 2:
+            # Przesunięcie nieprzetworzonej końcówki na początek bufora
+            self._buffer[:unread] = self._buffer[self._start:self._end]
+        else:
+            capacity = len(self._buffer) * 2
+            if capacity > self._max_capacity:
+                raise ValueError(f"wiadomość przekracza {self._max_capacity} bajtów")
+            buffer = bytearray(capacity)
+            buffer[:unread] = self._view[self._start:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        self._scan -= self._start
+        self._start, self._end = 0, unread
+
+    def next_line(self) -> Optional[memoryview]:
+        """Zwraca kolejną kompletną linię (bez znaku nowej linii) albo None, gdy trzeba odebrać więcej danych."""
+        newline = self._buffer.find(b"\n", self._scan, self._end)
+        if newline < 0:
+            self._scan = self._end
+            return None
+        line = self._view[self._start:newline]
+        self._start = self._scan = newline + 1
+        return line
+
+    def read_exact(self, size: int) -> Optional[memoryview]:
+        """Zwraca kolejne `size` bajtów (np. treść ramki) albo None, gdy jeszcze nie dotarły."""
+        if self._end - self._start < size:
+            if size > self._max_capacity:
+                raise ValueError(f"wiadomość przekracza {self._max_capacity} bajtów")
+            return None
+        data = self._view[self._start:self._start + size]
+        self._start = self._scan = self._start + size
+        return data
+
+    def remainder(self) -> memoryview:
+        """Zwraca i zdejmuje z bufora nieprzetworzone dane (np. ostatnią linię bez znaku nowej linii po EOF)."""
+        data = self._view[self._start:self._end]
+        self._start = self._scan = self._end
+        return data
+
+
+class BadLine(NamedTuple):
+    """Linia, której nie udało się sparsować jako JSON."""
+    text: str
+    error: str
+
+
+def parse_json_lines(lines: List[memoryview]) -> List[object]:
+    """
+    Parsuje linie JSON; zwraca listę wartości, a w miejscu niepoprawnych linii obiekty BadLine.
+
+    Porcja jest dekodowana z UTF-8 jednym wywołaniem, a każda linia parsowana od swojego
+    początku przez JSONDecoder.raw_decode - wynik jest taki jak json.loads osobno dla każdej linii.
+    """
+    text = b"\n".join(lines).decode('utf-8', errors='replace')
+    results = []
+    pos = 0
+    for _ in lines:
+        end = text.find("\n", pos)
+        if end < 0:
+            end = len(text)
+        try:
+            value, stop = _DECODER.raw_decode(text, _LINE_WHITESPACE.match(text, pos).end())
+            if _LINE_WHITESPACE.match(text, stop).end() != end:
+                raise ValueError("nadmiarowe dane lub wartość niezakończona w linii")
+            results.append(value)
+        except ValueError as e:
+            results.append(BadLine(text[pos:end], str(e)))
+        pos = end + 1
+    return results
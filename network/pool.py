@@ -0,0 +1,234 @@
+"""
+Pula trwałych połączeń klienta do jednego lub kilku serwerów.
+
+Każde połączenie to osobny NetworkClient z protokołem pakiet -> ACK; pula rozdziela
+pakiety na najmniej obciążone połączenie, więc wolne potwierdzenie na jednym gnieździe
+nie blokuje odczytów wysyłanych pozostałymi. Serwery z listy endpoints są uporządkowane
+według priorytetu: połączenie zerwane lub odrzucone przechodzi na kolejny dostępny serwer,
+a wątek kontroli stanu odnawia połączenia i wraca na serwery o wyższym priorytecie.
+"""
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from metrics import REGISTRY
+from network.client import NetworkClient
+
+_FAILOVERS = REGISTRY.counter("client_pool_failovers_total",
+                              "Liczba połączeń nawiązanych z serwerem zapasowym zamiast podstawowego")
+_CONNECTION_ERRORS = REGISTRY.counter("client_pool_connection_errors_total",
+                                      "Liczba połączeń puli zamkniętych po błędzie sieci lub kontroli stanu")
+_SEND_FAILURES = REGISTRY.counter("client_pool_send_failures_total",
+                                  "Liczba pakietów niewysłanych przez pulę po wszystkich próbach")
+
+Endpoint = Tuple[str, int]
+
+
+def parse_endpoints(config: dict) -> List[Endpoint]:
+    """
+    Zwraca listę serwerów z sekcji `client` config.yaml.
+
+    Args:
+        config (dict): Sekcja z listą endpoints (napisy "host:port" lub słowniki {host, port});
+            bez niej używane są pojedyncze host i port.
+    """
+    endpoints = []
+    for entry in config.get('endpoints') or []:
+        if isinstance(entry, str):
+            host, _, port = entry.rpartition(':')
+            endpoints.append((host, int(port)))
+        else:
+            endpoints.append((entry['host'], int(entry['port'])))
+    return endpoints or [(config['host'], int(config['port']))]
+
+
+class _Connection:
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.client: Optional[NetworkClient] = None
+        self.endpoint_index: Optional[int] = None
+        self.pending = 0  # Pakiety wysyłane lub czekające na to połączenie
+        self.lock = threading.Lock()
+
+
+class ClientPool:
+    """
+    Pula połączeń z interfejsem NetworkClient (connect/send/close) oraz submit() do wysyłki współbieżnej.
+    """
+
+    def __init__(
+            self,
+            endpoints: List[Endpoint],
+            size: int = 4,
+            timeout: float = 5.0,
+            retries: int = 3,
+            health_interval: float = 5.0,
+            endpoint_backoff: float = 5.0
+    ):
+        """
+        Args:
+            endpoints (list): Serwery (host, port) w kolejności priorytetu.
+            size (int): Liczba trwałych połączeń.
+            timeout (float): Czas oczekiwania na odpowiedź serwera w sekundach.
+            retries (int): Liczba prób wysłania pakietu (każda na dowolnym sprawnym połączeniu).
+            health_interval (float): Odstęp kontroli stanu połączeń w sekundach.
+            endpoint_backoff (float): Jak długo nie łączyć się z serwerem po nieudanej próbie.
+        """
+        if not endpoints:
+            raise ValueError("Pula wymaga co najmniej jednego serwera")
+        self.endpoints = list(endpoints)
+        self.size = size
+        self.timeout = timeout
+        self.retries = retries
+        self.health_interval = health_interval
+        self.endpoint_backoff = endpoint_backoff
+        self.logger = logging.getLogger("ClientPool")
+        self._connections = [_Connection(slot) for slot in range(size)]
+        self._lock = threading.Lock()
+        self._down_until: Dict[int, float] = {}
+        self._closed = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ClientPool":
+        """Tworzy pulę z sekcji `client` config.yaml (endpoints, pool_size, timeout, retries, health_interval)."""
+        return cls(parse_endpoints(config), size=config.get('pool_size', 4), timeout=config.get('timeout', 5.0),
+                   retries=config.get('retries', 3), health_interval=config.get('health_interval', 5.0))
+
+    def connect(self) -> None:
+        """
+        Otwiera połączenia puli i uruchamia kontrolę stanu.
+
+        Raises:
+            ConnectionRefusedError: Gdy nie udało się połączyć z żadnym serwerem.
+        """
+        self._closed.clear()
+        connected = sum(self._reconnect(conn) for conn in self._connections)
+        if not connected:
+            raise ConnectionRefusedError(f"Nie można połączyć się z żadnym z serwerów: {self.endpoints}")
+        self.logger.info(f"Pula: {connected}/{self.size} połączeń aktywnych")
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="client-pool")
+        self._health_thread = threading.Thread(target=self._health_loop, daemon=True, name="client-pool-health")
+        self._health_thread.start()
+
+    def send(self, data: dict) -> bool:
+        """
+        Wysyła pakiet najmniej obciążonym połączeniem i czeka na potwierdzenie.
+        Po błędzie sieci połączenie jest zamykane, a pakiet ponawiany innym połączeniem.
+        """
+        for _ in range(self.retries):
+            conn = self._acquire()
+            if conn is None:
+                time.sleep(min(1.0, self.health_interval))
+                continue
+            try:
+                with conn.lock:
+                    client = conn.client
+                    if client is None:
+                        continue  # Połączenie zamknięte, gdy pakiet czekał w kolejce
+                    try:
+                        result = client.exchange(data)
+                    except (socket.timeout, OSError) as e:
+                        self.logger.warning(f"Błąd połączenia {conn.slot} z {client.host}:{client.port}: {e}")
+                        self._drop(conn)
+                        continue
+                    if result is None:
+                        self._drop(conn)  # Odpowiedź spoza kolejności - gniazdo nie nadaje się do dalszej pracy
+                        continue
+                    return result
+            finally:
+                with self._lock:
+                    conn.pending -= 1
+        _SEND_FAILURES.inc()
+        self.logger.error("Wysłanie danych przez pulę nie powiodło się po wszystkich próbach.")
+        return False
+
+    def submit(self, data: dict) -> Future:
+        """Wysyła pakiet w tle; wynik (jak z send) dostępny przez Future.result()."""
+        if self._executor is None:
+            raise ConnectionError("Pula nie jest połączona. Użyj metody connect().")
+        return self._executor.submit(self.send, data)
+
+    def close(self) -> None:
+        """Czeka na wysyłki w toku i zamyka wszystkie połączenia."""
+        self._closed.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._health_thread is not None:
+            self._health_thread.join()
+            self._health_thread = None
+        for conn in self._connections:
+            with conn.lock:
+                self._drop(conn, error=False)
+
+    def active_connections(self) -> int:
+        return sum(conn.client is not None for conn in self._connections)
+
+    def _acquire(self) -> Optional[_Connection]:
+        """Wybiera połączone połączenie z najmniejszą liczbą oczekujących pakietów."""
+        with self._lock:
+            live = [conn for conn in self._connections if conn.client is not None]
+            if not live:
+                return None
+            conn = min(live, key=lambda c: c.pending)
+            conn.pending += 1
+            return conn
+
+    def _drop(self, conn: _Connection, error: bool = True) -> None:
+        """Zamyka połączenie (wywoływane z zablokowanym conn.lock); kontrola stanu otworzy je ponownie."""
+        if conn.client is None:
+            return
+        if error:
+            _CONNECTION_ERRORS.inc()
+        conn.client.close()
+        conn.client = None
+        conn.endpoint_index = None
+
+    def _reconnect(self, conn: _Connection, better_than: Optional[int] = None) -> bool:
+        """
+        Łączy połączenie z pierwszym dostępnym serwerem (z lepszym priorytetem niż better_than,
+        jeśli podano). Wywoływane przy zablokowanym conn.lock albo przed uruchomieniem puli.
+        """
+        limit = len(self.endpoints) if better_than is None else better_than
+        now = time.monotonic()
+        for index in range(limit):
+            if self._down_until.get(index, 0) > now:
+                continue
+            host, port = self.endpoints[index]
+            client = NetworkClient(host, port, timeout=self.timeout, retries=1)
+            try:
+                client.connect()
+            except ConnectionRefusedError:
+                self._down_until[index] = now + self.endpoint_backoff
+                continue
+            if conn.client is not None:
+                conn.client.close()
+            elif index > 0:
+                _FAILOVERS.inc()
+            conn.client = client
+            conn.endpoint_index = index
+            return True
+        return False
+
+    def _health_loop(self) -> None:
+        while not self._closed.wait(self.health_interval):
+            for conn in self._connections:
+                # Sprawdzane są tylko bezczynne połączenia - trwająca wysyłka sama wykryje błąd
+                if not conn.lock.acquire(blocking=False):
+                    continue
+                try:
+                    if conn.client is not None and not conn.client.is_alive():
+                        self.logger.warning(f"Połączenie {conn.slot} nie przeszło kontroli stanu")
+                        self._drop(conn)
+                    if conn.client is None:
+                        self._reconnect(conn)
+                    elif conn.endpoint_index > 0:
+                        # Powrót na serwer o wyższym priorytecie, gdy znów jest dostępny
+                        self._reconnect(conn, better_than=conn.endpoint_index)
+                finally:
+                    conn.lock.release()
@@ -0,0 +1,195 @@
+"""
+Partycjonowany układ plików logów: katalog na czujnik (lub grupę czujników) i plik na przedział czasu.
+
+    <log_dir>/partitions/<klucz>/<RRRRMMDDTHH>.csv
+
+Kluczem jest identyfikator czujnika (zakodowany jak w URL) albo numer grupy "group_NNN"
+(crc32 identyfikatora modulo liczba grup - przy setkach czujników mniej katalogów i otwartych plików).
+Przedziały czasu wyrównane są do EPOCH, a nazwa pliku to początek przedziału. Zapytanie o jeden
+czujnik czyta tylko jego katalog, a pliki spoza zakresu czasu pomijane są po samej nazwie.
+"""
+import csv
+import datetime
+import os
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+import timecodec
+
+PARTITION_DIRNAME = "partitions"
+_BUCKET_FORMAT = "%Y%m%dT%H"
+_BUCKET_NAME_LENGTH = len("20250101T00")
+
+
+class PartitionLayout:
+    """Nazewnictwo partycji i wyszukiwanie plików z zakresu zapytania."""
+
+    def __init__(self, root: str, by: str = "sensor", groups: int = 16, bucket_hours: int = 24):
+        """
+        :param root: Katalog partycji (zwykle log_dir/partitions)
+        :param by: "sensor" - katalog na czujnik, "group" - katalog na grupę czujników
+        :param groups: Liczba grup dla by="group"
+        :param bucket_hours: Długość przedziału czasu jednego pliku w godzinach
+        """
+        if by not in ("sensor", "group"):
+            raise ValueError(f"Nieznany układ partycji: {by}")
+        if bucket_hours <= 0 or groups <= 0:
+            raise ValueError("Długość przedziału i liczba grup muszą być dodatnie")
+        self.root = root
+        self.by = by
+        self.groups = groups
+        self.bucket_us = int(bucket_hours * 3600 * timecodec.MICROS_PER_SECOND)
+        self._keys: Dict[str, str] = {}
+
+    def key_for(self, sensor_id: str) -> str:
+        """Nazwa katalogu partycji czujnika."""
+        key = self._keys.get(sensor_id)
+        if key is None:
+            if self.by == "group":
+                key = f"group_{zlib.crc32(sensor_id.encode('utf-8')) % self.groups:03d}"
+            else:
+                # Kropki kodowane jawnie - identyfikator "." ani ".." nie może wskazać innego katalogu
+                key = quote(sensor_id, safe="-_").replace(".", "%2E") or "%00"
+            self._keys[sensor_id] = key
+        return key
+
+    def path_for(self, key: str, bucket: int) -> str:
+        name = timecodec.from_micros(bucket).strftime(_BUCKET_FORMAT) + ".csv"
+        return os.path.join(self.root, key, name)
+
+    def parse_bucket(self, filename: str) -> Optional[int]:
+        """Początek przedziału z nazwy pliku partycji (None dla innych plików)."""
+        if not filename.endswith(".csv") or len(filename) != _BUCKET_NAME_LENGTH + 4:
+            return None
+        try:
+            return timecodec.to_micros(datetime.datetime.strptime(filename[:_BUCKET_NAME_LENGTH], _BUCKET_FORMAT))
+        except ValueError:
+            return None
+
+    def files(self, start_us: int, end_us: int, sensor_id: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        Zwraca (początek przedziału, ścieżka) plików, które mogą zawierać wiersze z zakresu
+        [start_us, end_us], posortowane według przedziału.
+        """
+        if sensor_id is not None:
+            keys = [self.key_for(sensor_id)]
+        else:
+            try:
+                keys = os.listdir(self.root)
+            except FileNotFoundError:
+                return []
+        found = []
+        for key in keys:
+            directory = os.path.join(self.root, key)
+            try:
+                names = os.listdir(directory)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            for name in names:
+                bucket = self.parse_bucket(name)
+                if bucket is None or bucket + self.bucket_us <= start_us or bucket > end_us:
+                    continue
+                found.append((bucket, os.path.join(directory, name)))
+        found.sort()
+        return found
+
+    def expire(self, cutoff_us: int) -> List[str]:
+        """Usuwa pliki przedziałów zakończonych przed cutoff_us; zwraca usunięte ścieżki."""
+        removed = []
+        for _, path in self.files(-2 ** 62, cutoff_us - self.bucket_us):
+            try:
+                os.remove(path)
+                removed.append(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Błąd podczas usuwania starej partycji {path}: {e}")
+        for directory in {os.path.dirname(path) for path in removed}:
+            try:
+                os.rmdir(directory)  # Tylko pusty katalog (czujnik bez nowszych danych)
+            except OSError:
+                pass
+        return removed
+
+
+class PartitionWriter:
+    """
+    Dopisuje wiersze logu do plików partycji. Otwarte pliki trzymane są w LRU ograniczonym
+    do max_open_files; po rozpoczęciu nowego przedziału zamykane są pliki starszych przedziałów
+    (poza bezpośrednio poprzednim - na spóźnione odczyty).
+    """
+
+    def __init__(self, layout: PartitionLayout, max_open_files: int = 64):
+        self.layout = layout
+        self.max_open_files = max_open_files
+        self.newest_bucket: Optional[int] = None
+        self._handles: "OrderedDict[str, tuple]" = OrderedDict()  # ścieżka -> (plik, csv.writer, przedział)
+        self._paths: Dict[Tuple[str, int], str] = {}
+
+    def write(self, rows: List[list], micros: Iterable[int]) -> Set[str]:
+        """
+        Dopisuje wiersze [timestamp, sensor_id, value, unit] (z czasami w mikrosekundach) do ich partycji.
+        Zwraca ścieżki zmienionych plików.
+        """
+        layout = self.layout
+        groups: Dict[str, list] = {}
+        buckets: Dict[str, int] = {}
+        newest = self.newest_bucket
+        for row, row_us in zip(rows, micros):
+            bucket = row_us - row_us % layout.bucket_us
+            cache_key = (row[1], bucket)
+            path = self._paths.get(cache_key)
+            if path is None:
+                path = self._paths[cache_key] = layout.path_for(layout.key_for(row[1]), bucket)
+            part = groups.get(path)
+            if part is None:
+                part = groups[path] = []
+                buckets[path] = bucket
+                if newest is None or bucket > newest:
+                    newest = bucket
+            part.append(row)
+
+        if newest != self.newest_bucket:
+            self.newest_bucket = newest
+            self.close_before(newest - layout.bucket_us)
+        for path, part in groups.items():
+            handle, writer, _ = self._writer(path, buckets[path])
+            writer.writerows(part)
+            handle.flush()
+        return set(groups)
+
+    def close_before(self, bucket: int) -> None:
+        """Zamyka pliki przedziałów wcześniejszych niż `bucket`."""
+        for path, (handle, _, handle_bucket) in list(self._handles.items()):
+            if handle_bucket < bucket:
+                handle.close()
+                del self._handles[path]
+        self._paths = {k: p for k, p in self._paths.items() if k[1] >= bucket}
+
+    def sync(self) -> None:
+        for handle, _, _ in self._handles.values():
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def close(self) -> None:
+        for handle, _, _ in self._handles.values():
+            handle.close()
+        self._handles.clear()
+
+    def _writer(self, path: str, bucket: int) -> tuple:
+        entry = self._handles.get(path)
+        if entry is not None:
+            self._handles.move_to_end(path)
+            return entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle = open(path, 'a', newline='', encoding='utf-8')
+        writer = csv.writer(handle)
+        if handle.tell() == 0:
+            writer.writerow(["timestamp", "sensor_id", "value", "unit"])
+        entry = self._handles[path] = (handle, writer, bucket)
+        while len(self._handles) > self.max_open_files:
+            _, (old_handle, _, _) = self._handles.popitem(last=False)
+            old_handle.close()
+        return entry
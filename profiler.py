@@ -0,0 +1,188 @@
+"""
+Próbkujący profiler całego procesu (bez zewnętrznych narzędzi).
+
+Wątek profilera co `interval` sekund pobiera stosy wszystkich wątków (sys._current_frames)
+i zlicza je w formacie "collapsed stacks" (wątek;funkcja;...;funkcja liczba), z którego
+flamegraph.pl lub speedscope rysują wykres płomieniowy. Każda próbka przypisywana jest też
+do etapu przetwarzania (parsowanie JSON, zapis CSV, rotacja, GUI, ...) według funkcji na stosie,
+a podsumowanie zawiera udział etapów oraz histogramy czasów z rejestru metryk.
+
+Użycie: --profile [PREFIKS] w main_app.py, main.py, server/server.py i gui/server_gui.py -
+po zakończeniu programu powstają PREFIKS.folded i PREFIKS.summary.txt.
+"""
+import atexit
+import collections
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from metrics import REGISTRY
+
+# Etapy w kolejności pierwszeństwa: próbka należy do pierwszego etapu, którego funkcja jest na stosie.
+# Reguła to (końcówka ścieżki pliku, nazwa funkcji lub None - dowolna funkcja z pliku).
+STAGES: Tuple[Tuple[str, Tuple[Tuple[str, Optional[str]], ...]], ...] = (
+    ("rotacja i archiwizacja", (("Logger.py", "_rotate"), ("Logger.py", "_archive_file"),
+                                ("Logger.py", "_expire_archives"), ("Logger.py", "_expire_partitions"),
+                                ("log_maintenance.py", None))),
+    ("zapis CSV", (("Logger.py", "_flush_buffer"), ("partitions.py", None))),
+    ("odczyt logów", (("Logger.py", "_scan_file"), ("log_export.py", None))),
+    ("parsowanie JSON", (("json/decoder.py", None), ("json/__init__.py", "loads"),
+                         ("framing.py", "parse_json_lines"), ("batching.py", "decode_frame"))),
+    ("serializacja JSON", (("json/encoder.py", None), ("batching.py", "encode_frame"))),
+    ("alerty", (("alerts.py", None),)),
+    ("odczyt czujników", (("sensor.py", None),)),
+    ("GUI", (("tkinter/__init__.py", None), ("server_gui.py", "_update_table"), ("server_gui.py", "_poll_status"),
+             ("gui/backend.py", "add_many"), ("gui/backend.py", "_add"))),
+    ("sieć", (("socket.py", None), ("selectors.py", None), ("framing.py", "fill"),
+              ("client.py", None), ("pool.py", None), ("ssl.py", None))),
+    ("oczekiwanie", (("threading.py", "wait"), ("queue.py", "get"), ("asyncio/base_events.py", "_run_once"),
+                     ("selectors.py", "select"))),
+)
+_OTHER = "inne"
+_THREAD_NUMBER = re.compile(r"\d+")
+
+
+class SamplingProfiler:
+    """Próbkowanie stosów wszystkich wątków w osobnym wątku tła."""
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 128):
+        """
+        :param interval: Odstęp między próbkami w sekundach
+        :param max_depth: Maksymalna liczba ramek zapisywanych dla jednego stosu (od korzenia)
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Dict[str, int] = collections.Counter()
+        self.stage_samples: Dict[Tuple[str, str], int] = collections.Counter()  # (wątek, etap) -> liczba
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+        self._labels: Dict[object, Tuple[str, Optional[int]]] = {}  # obiekt kodu -> (etykieta, etap)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="profiler")
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed += time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self.sample(exclude=own)
+
+    def sample(self, exclude: Optional[int] = None) -> None:
+        """Pobiera jedną próbkę stosów wszystkich wątków (poza `exclude`)."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == exclude:
+                continue
+            labels: List[str] = []
+            stage = len(STAGES)
+            while frame is not None:
+                label, frame_stage = self._label(frame.f_code)
+                labels.append(label)
+                if frame_stage is not None and frame_stage < stage:
+                    stage = frame_stage
+                frame = frame.f_back
+            thread = _THREAD_NUMBER.sub("N", names.get(ident, "wątek"))
+            labels.append(thread)
+            labels.reverse()
+            self.stacks[";".join(labels[:self.max_depth])] += 1
+            self.stage_samples[thread, STAGES[stage][0] if stage < len(STAGES) else _OTHER] += 1
+        self.samples += 1
+
+    def _label(self, code) -> Tuple[str, Optional[int]]:
+        cached = self._labels.get(code)
+        if cached is None:
+            path = code.co_filename.replace("\\", "/")
+            name = getattr(code, "co_qualname", code.co_name)
+            stage = None
+            for index, (_, rules) in enumerate(STAGES):
+                if any(path.endswith(suffix) and (func is None or func == code.co_name) for suffix, func in rules):
+                    stage = index
+                    break
+            # Średnik rozdziela ramki w formacie collapsed
+            label = f"{name} ({os.path.basename(path)}:{code.co_firstlineno})".replace(";", ",")
+            cached = self._labels[code] = (label, stage)
+        return cached
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+    def summary(self) -> str:
+        """Podsumowanie: udział etapów (łącznie i dla wątków) oraz histogramy czasów z rejestru metryk."""
+        elapsed = self.elapsed or (time.perf_counter() - self.started_at if self.started_at else 0.0)
+        lines = [f"Czas profilowania: {elapsed:.1f} s, próbek: {self.samples} (co {self.interval * 1000:g} ms)", ""]
+        by_stage: Dict[str, int] = collections.Counter()
+        by_thread: Dict[str, Dict[str, int]] = collections.defaultdict(collections.Counter)
+        for (thread, stage), count in self.stage_samples.items():
+            by_stage[stage] += count
+            by_thread[thread][stage] += count
+        total = sum(by_stage.values()) or 1
+        lines.append("Etapy (wszystkie wątki; czas wątku ~ próbki x odstęp):")
+        for stage, count in sorted(by_stage.items(), key=lambda item: -item[1]):
+            lines.append(f"  {stage:<26} {count:>8} próbek  {count * self.interval:>9.2f} s  "
+                         f"{100 * count / total:5.1f}%")
+        for thread, stages in sorted(by_thread.items()):
+            thread_total = sum(stages.values())
+            parts = ", ".join(f"{stage} {100 * count / thread_total:.0f}%"
+                              for stage, count in sorted(stages.items(), key=lambda item: -item[1]))
+            lines.append(f"  [{thread}] {parts}")
+
+        histograms = [(name, m) for name, m in sorted(REGISTRY.snapshot().items())
+                      if m["type"] == "histogram" and m["count"]]
+        if histograms:
+            lines += ["", "Czasy etapów z metryk (liczba, suma, p50, p95, p99):"]
+            for name, m in histograms:
+                lines.append(f"  {name:<40} {m['count']:>9} {m['sum']:>10.3f} s  "
+                             f"{_format_bound(m['p50'])} {_format_bound(m['p95'])} {_format_bound(m['p99'])}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, prefix: str) -> None:
+        """Zapisuje PREFIKS.folded i PREFIKS.summary.txt."""
+        self.write_collapsed(prefix + ".folded")
+        with open(prefix + ".summary.txt", 'w', encoding='utf-8') as f:
+            f.write(self.summary())
+
+
+def _format_bound(value: Optional[float]) -> str:
+    return "    -   " if value is None else f"{value:>8g}"
+
+
+def add_arguments(parser) -> None:
+    """Dodaje do argparse opcje --profile [PREFIKS] i --profile-interval."""
+    parser.add_argument("--profile", nargs="?", const="profile", metavar="PREFIKS",
+                        help="Próbkuj stosy wątków; po zakończeniu zapisz PREFIKS.folded i PREFIKS.summary.txt")
+    parser.add_argument("--profile-interval", type=float, default=0.01, metavar="S",
+                        help="Odstęp próbkowania profilera w sekundach")
+
+
+def start_from_args(args) -> Optional[SamplingProfiler]:
+    """Uruchamia profiler, jeśli podano --profile; wyniki zapisywane są przy zakończeniu procesu."""
+    if not getattr(args, "profile", None):
+        return None
+    profiler = SamplingProfiler(interval=args.profile_interval)
+    profiler.start()
+
+    def finish():
+        profiler.stop()
+        profiler.write(args.profile)
+        print(f"Profil zapisany: {args.profile}.folded, {args.profile}.summary.txt")
+
+    atexit.register(finish)
+    return profiler
@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict
+
+# Tryby logowania zdarzeń ze ścieżki krytycznej (pakiety, odczyty):
+#   verbose - każde zdarzenie jest logowane (dotychczasowe zachowanie),
+#   sampled - logowane jest co N-te zdarzenie danego rodzaju, z limitem linii na sekundę,
+#   summary - tylko okresowe podsumowania liczby zdarzeń,
+#   off     - brak logów zdarzeń (liczniki nadal działają).
+MODES = ("verbose", "sampled", "summary", "off")
+
+
+class LogSettings:
+    """Wspólne ustawienia dla wszystkich instancji SampledLog (zmiana działa od razu)."""
+
+    def __init__(self):
+        self.mode = "verbose"
+        self.sample_every = 1000
+        self.max_per_second = 5
+        self.summary_interval = 10.0
+
+
+SETTINGS = LogSettings()
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def setup_console(level: int = logging.INFO) -> None:
+    """
+    Konfiguruje logowanie na konsolę. Wywoływane w punktach wejścia programów, a nie przy imporcie
+    modułów - import biblioteki nie zmienia wtedy konfiguracji logowania aplikacji ani testów.
+    """
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+
+def configure(config: Dict[str, Any]) -> None:
+    """
+    Ustawia tryb logowania zgodnie z sekcją `logging` z config.yaml.
+
+    Args:
+        config (dict): Klucze mode, level, sample_every, max_per_second, summary_interval.
+    """
+    mode = config.get("mode", SETTINGS.mode)
+    if mode not in MODES:
+        raise ValueError(f"Nieznany tryb logowania: {mode} (dostępne: {', '.join(MODES)})")
+    SETTINGS.mode = mode
+    SETTINGS.sample_every = max(1, int(config.get("sample_every", SETTINGS.sample_every)))
+    SETTINGS.max_per_second = int(config.get("max_per_second", SETTINGS.max_per_second))
+    SETTINGS.summary_interval = float(config.get("summary_interval", SETTINGS.summary_interval))
+    if config.get("level"):
+        logging.getLogger().setLevel(config["level"])
+
+
+class SampledLog:
+    """
+    Logowanie zdarzeń wysokiej częstotliwości z leniwym formatowaniem.
+
+    Komunikat jest formatowany (przez moduł logging) tylko wtedy, gdy faktycznie zostanie
+    zapisany. Niezależnie od trybu zliczane są wszystkie zdarzenia, a w trybach sampled
+    i summary co `summary_interval` sekund zapisywane jest jedno podsumowanie.
+    """
+
+    def __init__(self, logger: logging.Logger, level: int = logging.INFO, settings: LogSettings = SETTINGS):
+        self.logger = logger
+        self.level = level
+        self.settings = settings
+        self._counts = defaultdict(int)
+        self._window_counts = defaultdict(int)
+        self._window_start = time.monotonic()
+        self._second = 0
+        self._emitted_this_second = 0
+        self._lock = threading.Lock()
+
+    def event(self, key: str, msg: str, *args) -> None:
+        """
+        Rejestruje zdarzenie rodzaju `key`; `msg` i `args` jak w logging (formatowanie %).
+        """
+        mode = self.settings.mode
+        if mode == "verbose":
+            self._counts[key] += 1
+            self.logger.log(self.level, msg, *args)
+            return
+
+        now = time.monotonic()
+        emit = False
+        with self._lock:
+            self._counts[key] += 1
+            self._window_counts[key] += 1
+            if mode == "sampled" and (self._counts[key] - 1) % self.settings.sample_every == 0:
+                second = int(now)
+                if second != self._second:
+                    self._second = second
+                    self._emitted_this_second = 0
+                if self._emitted_this_second < self.settings.max_per_second:
+                    self._emitted_this_second += 1
+                    emit = True
+            summary = self._take_summary(now) if mode != "off" else None
+
+        if emit:
+            self.logger.log(self.level, msg + " [próbka, zdarzenie #%d]", *args, self._counts[key])
+        if summary:
+            self.logger.log(self.level, "%s", summary)
+
+    def _take_summary(self, now: float):
+        elapsed = now - self._window_start
+        if elapsed < self.settings.summary_interval or not self._window_counts:
+            return None
+        parts = ", ".join(f"{key}={count} ({count / elapsed:.1f}/s)"
+                          for key, count in sorted(self._window_counts.items()))
+        self._window_counts.clear()
+        self._window_start = now
+        return f"Podsumowanie z ostatnich {elapsed:.1f} s: {parts}"
+
+    def flush_summary(self) -> None:
+        """Zapisuje podsumowanie bieżącego okna (np. przy zamykaniu)."""
+        if self.settings.mode in ("sampled", "summary"):
+            with self._lock:
+                elapsed = time.monotonic() - self._window_start
+                summary = None
+                if self._window_counts:
+                    parts = ", ".join(f"{key}={count}" for key, count in sorted(self._window_counts.items()))
+                    summary = f"Podsumowanie z ostatnich {elapsed:.1f} s: {parts}"
+                    self._window_counts.clear()
+                    self._window_start = time.monotonic()
+            if summary:
+                self.logger.log(self.level, "%s", summary)
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        """Łączna liczba zdarzeń każdego rodzaju od utworzenia."""
+        return dict(self._counts)
@@ -1,13 +1,20 @@
 import datetime
 import random
 import time
-from typing import override, Callable
+from typing import Callable
+
+try:
+    from typing import override
+except ImportError:  # Python < 3.12
+    def override(func):
+        return func
 # Assuming Logger is defined elsewhere and importable
 # import Logger
 
 
 class sensor:
-    def __init__(self, sensor_id, name, unit, min_value, max_value, frequency=1):
+    def __init__(self, sensor_id, name, unit, min_value, max_value, frequency=1, clock=None, rng=None,
+                 calibration=None):
         """
         Inicjalizacja czujnika.
 
@@ -17,6 +24,12 @@ class sensor:
         :param min_value: Minimalna wartość odczytu
         :param max_value: Maksymalna wartość odczytu
         :param frequency: Częstotliwość odczytów (sekundy)
+        :param clock: Zegar z metodą now() (np. simulation.SimulationClock); domyślnie czas rzeczywisty
+        :param rng: Generator liczb losowych z metodą uniform() (np. numpy.random.Generator);
+                    domyślnie globalny moduł random
+        :param calibration: Opis kalibracji czujnika (słownik zgodny z JSON, np. {"gain": 1.02, "offset": -0.3},
+                            format w module calibration); zapisywany w konfiguracji floty (sensor_config)
+                            i stosowany przy odczycie logów, None - brak
         """
         self._callbacks = []
         self.sensor_id = sensor_id
@@ -28,6 +41,26 @@ class sensor:
         self.active = True
         self.last_value = None
         self._last_read_time = None
+        self.clock = clock
+        self.rng = rng
+        self.calibration = calibration
+
+    def _now(self):
+        """Bieżący czas według wstrzykniętego zegara (lub czasu rzeczywistego)."""
+        if self.clock is not None:
+            return self.clock.now()
+        return datetime.datetime.now()
+
+    def _uniform(self, a, b):
+        """Losuje wartość z przedziału [a, b) z generatora czujnika (lub globalnego random)."""
+        if self.rng is not None:
+            return self.rng.uniform(a, b)
+        return random.uniform(a, b)
+
+    def _notify(self, timestamp, value):
+        """Wywołuje zarejestrowane callbacki dla nowego odczytu."""
+        for callback in self._callbacks:
+            callback(self.sensor_id, timestamp, value, self.unit)
 
     def read_value(self):
         """
@@ -38,19 +71,41 @@ class sensor:
         if not self.active:
             raise Exception(f"Czujnik {self.name} jest wyłączony.")
 
-        now = datetime.datetime.now()
+        now = self._now()
         if self._last_read_time is not None and (now - self._last_read_time).total_seconds() < self.frequency:
             return self.last_value
         else:
-            value = random.uniform(self.min_value, self.max_value)
+            value = self._uniform(self.min_value, self.max_value)
             self.last_value = value
             self._last_read_time = now
+            self._notify(now, value)
             return value
 
+    def generate_batch(self, micros, rng):
+        """
+        Wektorowy odpowiednik read_value dla wielu chwil naraz (generatory danych syntetycznych).
+
+        :param micros: Tablica NumPy int64 - znaczniki czasu w mikrosekundach od 1970-01-01
+        :param rng: numpy.random.Generator
+        :return: Tablica NumPy float64 z wartościami odczytów
+        """
+        return rng.uniform(self.min_value, self.max_value, size=len(micros))
+
+    @staticmethod
+    def _batch_calendar(micros):
+        """Zwraca tablice (miesiąc 1-12, godzina 0-23) dla znaczników czasu w mikrosekundach."""
+        import numpy as np
+        moments = np.asarray(micros, dtype=np.int64).view('datetime64[us]')
+        month = moments.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        hour = (np.asarray(micros, dtype=np.int64) // 3_600_000_000) % 24
+        return month, hour
+
     def calibrate(self, calibration_factor):
         """
         Kalibruje ostatni odczyt przez przemnożenie go przez calibration_factor.
         Jeśli nie wykonano jeszcze odczytu, wykonuje go najpierw.
+        Zmienia tylko last_value; kalibrację zapisanych odczytów opisuje atrybut calibration
+        (moduł calibration).
         """
         if self.last_value is None:
             self.read_value()
@@ -93,7 +148,7 @@ class sensor:
 class TemperatureSensor(sensor):
     @override
     def read_value(self):
-        now = datetime.datetime.now()
+        now = self._now()
         if self._last_read_time is not None and (now - self._last_read_time).total_seconds() < self.frequency:
             return self.last_value
         else:
@@ -102,69 +157,124 @@ class TemperatureSensor(sensor):
             monthAvgDayTemp = [-1, 2, 6, 12, 18, 20, 22, 22, 18, 13, 5, 1]
             monthAvgNightTemp = [-9, -7, -4, 1, 5, 8, 10, 9, 6, 2, -2, -8]
             if currHour < 8 or currHour > 20:
-                value = monthAvgNightTemp[currMonth - 1] + random.uniform(-2, 2)
+                value = monthAvgNightTemp[currMonth - 1] + self._uniform(-2, 2)
             else:
-                value = monthAvgDayTemp[currMonth - 1] + random.uniform(-2, 2)
+                value = monthAvgDayTemp[currMonth - 1] + self._uniform(-2, 2)
             self.last_value = round(value, 2)
             self._last_read_time = now
+            self._notify(now, self.last_value)
             return self.last_value
 
+    @override
+    def generate_batch(self, micros, rng):
+        import numpy as np
+        month, hour = self._batch_calendar(micros)
+        monthAvgDayTemp = np.array([-1, 2, 6, 12, 18, 20, 22, 22, 18, 13, 5, 1], dtype=np.float64)
+        monthAvgNightTemp = np.array([-9, -7, -4, 1, 5, 8, 10, 9, 6, 2, -2, -8], dtype=np.float64)
+        night = (hour < 8) | (hour > 20)
+        base = np.where(night, monthAvgNightTemp[month - 1], monthAvgDayTemp[month - 1])
+        return np.round(base + rng.uniform(-2, 2, size=len(micros)), 2)
+
 
 class HumiditySensor(sensor):
     @override
     def read_value(self):
-        now = datetime.datetime.now()
+        now = self._now()
         if self._last_read_time is not None and (now - self._last_read_time).total_seconds() < self.frequency:
             return self.last_value
         else:
             currMonth = now.month
             currHour = now.hour
-            hourDiff = random.uniform(0, 5)
+            hourDiff = self._uniform(0, 5)
             if currHour < 20 or currHour > 6:
                 hourDiff = -hourDiff
             if currMonth in [3, 4, 5]:
-                value = 50 + random.uniform(-5, 5) + hourDiff
+                value = 50 + self._uniform(-5, 5) + hourDiff
             elif currMonth in [6, 7, 8]:
-                value = 60 + random.uniform(-5, 5) + hourDiff
+                value = 60 + self._uniform(-5, 5) + hourDiff
             elif currMonth in [9, 10, 11]:
-                value = 50 + random.uniform(-5, 5) + hourDiff
+                value = 50 + self._uniform(-5, 5) + hourDiff
             elif currMonth in [12, 1, 2]:
-                value = 40 + random.uniform(-5, 5) + hourDiff
+                value = 40 + self._uniform(-5, 5) + hourDiff
             else:
                 value = 0  # Should not happen
             self.last_value = round(value, 2)
             self._last_read_time = now
+            self._notify(now, self.last_value)
             return self.last_value
 
+    @override
+    def generate_batch(self, micros, rng):
+        import numpy as np
+        month, hour = self._batch_calendar(micros)
+        n = len(micros)
+        # Jak w read_value: warunek godzinowy jest zawsze spełniony, więc korekta jest zawsze ujemna
+        hourDiff = -rng.uniform(0, 5, size=n)
+        seasonBase = np.array([40, 40, 50, 50, 50, 60, 60, 60, 50, 50, 50, 40], dtype=np.float64)
+        return np.round(seasonBase[month - 1] + rng.uniform(-5, 5, size=n) + hourDiff, 2)
+
 
 class PressureSensor(sensor):
     @override
     def read_value(self):
-        now = datetime.datetime.now()
+        now = self._now()
         if self._last_read_time is not None and (now - self._last_read_time).total_seconds() < self.frequency:
             return self.last_value
         else:
-            if random.uniform(0, 1) > 0.5:
-                value = 950 + random.uniform(0, 50)
+            if self._uniform(0, 1) > 0.5:
+                value = 950 + self._uniform(0, 50)
             else:
-                value = 1000 + random.uniform(0, 50)
+                value = 1000 + self._uniform(0, 50)
             self.last_value = round(value, 2)
             self._last_read_time = now
+            self._notify(now, self.last_value)
             return self.last_value
 
+    @override
+    def generate_batch(self, micros, rng):
+        import numpy as np
+        n = len(micros)
+        high = rng.uniform(0, 1, size=n) > 0.5
+        return np.round(np.where(high, 950.0, 1000.0) + rng.uniform(0, 50, size=n), 2)
+
 
 class LightSensor(sensor):
     @override
     def read_value(self):
-        now = datetime.datetime.now()
+        now = self._now()
         if self._last_read_time is not None and (now - self._last_read_time).total_seconds() < self.frequency:
             return self.last_value
         else:
             currHour = now.hour
             if currHour <= 12:
-                value = currHour * 83 + random.uniform(-10, 4)
+                value = currHour * 83 + self._uniform(-10, 4)
             else:
-                value = (currHour - (currHour - 12)) * 83 + random.uniform(-10, 4)
+                value = (currHour - (currHour - 12)) * 83 + self._uniform(-10, 4)
             self.last_value = round(value, 2)
             self._last_read_time = now
-            return self.last_value
\ No newline at end of file
+            self._notify(now, self.last_value)
+            return self.last_value
+
+    @override
+    def generate_batch(self, micros, rng):
+        import numpy as np
+        _, hour = self._batch_calendar(micros)
+        # Jak w read_value: po południu (currHour - (currHour - 12)) daje zawsze 12
+        base = np.where(hour <= 12, hour, 12) * 83.0
+        return np.round(base + rng.uniform(-10, 4, size=len(micros)), 2)
+
+
+def default_sensors():
+    """
+    Zwraca domyślny zestaw czujników aplikacji (po jednym każdego typu).
+    """
+    return [
+        TemperatureSensor(sensor_id="temp_01", name="Czujnik temperatury", unit="°C", min_value=-20, max_value=40,
+                          frequency=5),
+        HumiditySensor(sensor_id="hum_01", name="Czujnik wilgotności", unit="%", min_value=0, max_value=100,
+                       frequency=7),
+        PressureSensor(sensor_id="press_01", name="Czujnik ciśnienia", unit="hPa", min_value=950, max_value=1050,
+                       frequency=10),
+        LightSensor(sensor_id="light_01", name="Czujnik światła", unit="lux", min_value=0, max_value=2000,
+                    frequency=6),
+    ]
@@ -0,0 +1,285 @@
+"""
+Zapis i odczyt konfiguracji floty czujników.
+
+Dwa formaty:
+    JSON Lines (.jsonl) - jeden czujnik na linię, czytelny i strumieniowy
+        {"type": "temperature", "sensor_id": "temp_01", "name": "...", "unit": "°C",
+         "min_value": -20, "max_value": 40, "frequency": 5, "calibration": null}
+    binarny (.bin) - nagłówek, tablica napisów i tablica rekordów stałej długości
+        (NumPy), wczytywana jednym frombuffer bez parsowania rekord po rekordzie.
+
+Oba formaty wczytywane są do kolumnowego SensorTable; obiekty czujników tworzone są
+dopiero na żądanie (SensorTable.sensor(i) / SensorTable.sensors()).
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m sensor_config fleet.bin --generate 100000
+    python -m sensor_config fleet.jsonl --convert fleet.bin
+"""
+import functools
+import json
+import struct
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import lazy_import
+from sensor import HumiditySensor, LightSensor, PressureSensor, TemperatureSensor, sensor as BaseSensor
+
+np = lazy_import.lazy("numpy")
+
+SENSOR_TYPES = {
+    "generic": BaseSensor,
+    "temperature": TemperatureSensor,
+    "humidity": HumiditySensor,
+    "pressure": PressureSensor,
+    "light": LightSensor,
+}
+_TYPE_NAMES = {cls: name for name, cls in SENSOR_TYPES.items()}
+_TYPE_CODES = {name: code for code, name in enumerate(SENSOR_TYPES)}
+
+_MAGIC = b"SNSRCFG1"
+# Nagłówek: magic, liczba czujników, rozmiar tablicy napisów w bajtach
+_HEADER = struct.Struct("<8sII")
+# Separator napisów w tablicy (nie może wystąpić w identyfikatorach, nazwach ani jednostkach)
+_SEPARATOR = "\x00"
+
+
+@functools.lru_cache(maxsize=None)
+def _record_dtype() -> "np.dtype":
+    """Typ rekordu czujnika w pliku binarnym (tworzony przy pierwszym użyciu - import NumPy)."""
+    return np.dtype([
+        ("type", "<u1"),
+        ("sensor_id", "<u4"),  # indeksy w tablicy napisów
+        ("name", "<u4"),
+        ("unit", "<u4"),
+        ("calibration", "<i4"),  # -1 - brak kalibracji, inaczej indeks napisu z JSON
+        ("min_value", "<f8"),
+        ("max_value", "<f8"),
+        ("frequency", "<f8"),
+    ])
+
+
+class SensorTable:
+    """
+    Kolumnowy rejestr floty czujników: napisy w listach, liczby w tablicach NumPy.
+    """
+
+    def __init__(self, types: List[str], sensor_ids: List[str], names: List[str], units: List[str],
+                 min_values, max_values, frequencies, calibrations: List[Optional[dict]]):
+        self.types = types
+        self.sensor_ids = sensor_ids
+        self.names = names
+        self.units = units
+        self.min_values = np.asarray(min_values, dtype=np.float64)
+        self.max_values = np.asarray(max_values, dtype=np.float64)
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        self.calibrations = calibrations
+        self._index: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_sensors(cls, sensors: Iterable[BaseSensor]) -> "SensorTable":
+        sensors = list(sensors)
+        return cls([_TYPE_NAMES.get(type(s), "generic") for s in sensors],
+                    [s.sensor_id for s in sensors], [s.name for s in sensors], [s.unit for s in sensors],
+                    [s.min_value for s in sensors], [s.max_value for s in sensors],
+                    [s.frequency for s in sensors], [getattr(s, "calibration", None) for s in sensors])
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "SensorTable":
+        records = records if isinstance(records, list) else list(records)
+        return cls([r.get("type") or "generic" for r in records],
+                   [r["sensor_id"] for r in records],
+                   [r.get("name") for r in records],
+                   [r.get("unit") for r in records],
+                   [r.get("min_value") for r in records],
+                   [r.get("max_value") for r in records],
+                   [r.get("frequency", 1) for r in records],
+                   [r.get("calibration") for r in records])
+
+    def __len__(self) -> int:
+        return len(self.sensor_ids)
+
+    def index_of(self, sensor_id: str) -> int:
+        """Zwraca numer wiersza czujnika (indeks budowany przy pierwszym użyciu)."""
+        if self._index is None:
+            self._index = {sid: i for i, sid in enumerate(self.sensor_ids)}
+        return self._index[sensor_id]
+
+    def record(self, i: int) -> dict:
+        return {
+            "type": self.types[i],
+            "sensor_id": self.sensor_ids[i],
+            "name": self.names[i],
+            "unit": self.units[i],
+            "min_value": _plain_number(self.min_values[i]),
+            "max_value": _plain_number(self.max_values[i]),
+            "frequency": _plain_number(self.frequencies[i]),
+            "calibration": self.calibrations[i],
+        }
+
+    def sensor(self, i: int) -> BaseSensor:
+        """Tworzy obiekt czujnika z wiersza i."""
+        cls = SENSOR_TYPES.get(self.types[i])
+        if cls is None:
+            raise ValueError(f"Nieznany typ czujnika: {self.types[i]}")
+        return cls(sensor_id=self.sensor_ids[i], name=self.names[i], unit=self.units[i],
+                   min_value=_plain_number(self.min_values[i]), max_value=_plain_number(self.max_values[i]),
+                   frequency=_plain_number(self.frequencies[i]), calibration=self.calibrations[i])
+
+    def sensors(self) -> List[BaseSensor]:
+        """Tworzy obiekty wszystkich czujników."""
+        min_values = [_plain_number(v) for v in self.min_values.tolist()]
+        max_values = [_plain_number(v) for v in self.max_values.tolist()]
+        frequencies = [_plain_number(v) for v in self.frequencies.tolist()]
+        fleet = []
+        for i, type_name in enumerate(self.types):
+            cls = SENSOR_TYPES.get(type_name)
+            if cls is None:
+                raise ValueError(f"Nieznany typ czujnika: {type_name}")
+            fleet.append(cls(self.sensor_ids[i], self.names[i], self.units[i], min_values[i], max_values[i],
+                             frequencies[i], calibration=self.calibrations[i]))
+        return fleet
+
+
+def _plain_number(value: float):
+    """Liczby całkowite zapisane jako float wracają jako int (jak w definicjach w kodzie)."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def iter_json(path: str) -> Iterator[dict]:
+    """Czyta plik JSON Lines rekord po rekordzie (puste linie są pomijane)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: niepoprawny JSON: {e}")
+
+
+def load_json(path: str) -> SensorTable:
+    """
+    Wczytuje cały plik JSON Lines naraz - linie łączone są w jedną tablicę JSON i parsowane
+    jednym wywołaniem json.loads; przy błędzie plik czytany jest ponownie linia po linii,
+    żeby wskazać numer błędnej linii.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+    try:
+        records = json.loads("[" + ",".join(lines) + "]")
+    except json.JSONDecodeError:
+        records = list(iter_json(path))
+    return SensorTable.from_records(records)
+
+
+def save_json(table: SensorTable, path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(len(table)):
+            f.write(json.dumps(table.record(i), ensure_ascii=False))
+            f.write("\n")
+
+
+def save_binary(table: SensorTable, path: str) -> None:
+    strings: Dict[str, int] = {}
+
+    def intern(text: Optional[str]) -> int:
+        text = "" if text is None else text
+        if _SEPARATOR in text:
+            raise ValueError(f"Napis zawiera niedozwolony znak NUL: {text!r}")
+        return strings.setdefault(text, len(strings))
+
+    records = np.zeros(len(table), dtype=_record_dtype())
+    records["type"] = [_TYPE_CODES[t] for t in table.types]
+    records["sensor_id"] = [intern(s) for s in table.sensor_ids]
+    records["name"] = [intern(s) for s in table.names]
+    records["unit"] = [intern(s) for s in table.units]
+    records["calibration"] = [-1 if c is None else intern(json.dumps(c, sort_keys=True)) for c in table.calibrations]
+    records["min_value"] = table.min_values
+    records["max_value"] = table.max_values
+    records["frequency"] = table.frequencies
+
+    blob = _SEPARATOR.join(strings).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(table), len(blob)))
+        f.write(blob)
+        f.write(records.tobytes())
+
+
+def load_binary(path: str) -> SensorTable:
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, count, blob_size = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError(f"{path}: to nie jest binarna konfiguracja czujników")
+    offset = _HEADER.size
+    strings = data[offset:offset + blob_size].decode('utf-8').split(_SEPARATOR)
+    records = np.frombuffer(data, dtype=_record_dtype(), count=count, offset=offset + blob_size)
+
+    type_names = list(SENSOR_TYPES)
+    # Napisy kalibracji dekodowane raz dla każdej unikalnej wartości
+    calibration_cache: Dict[int, Optional[dict]] = {-1: None}
+    calibrations = []
+    for index in records["calibration"].tolist():
+        if index not in calibration_cache:
+            calibration_cache[index] = json.loads(strings[index])
+        calibrations.append(calibration_cache[index])
+    return SensorTable([type_names[code] for code in records["type"].tolist()],
+                       [strings[i] for i in records["sensor_id"].tolist()],
+                       [strings[i] for i in records["name"].tolist()],
+                       [strings[i] for i in records["unit"].tolist()],
+                       records["min_value"].copy(), records["max_value"].copy(), records["frequency"].copy(),
+                       calibrations)
+
+
+def load(path: str) -> SensorTable:
+    """Wczytuje konfigurację floty w formacie binarnym lub JSON Lines (rozpoznawanym po zawartości)."""
+    with open(path, 'rb') as f:
+        magic = f.read(len(_MAGIC))
+    if magic == _MAGIC:
+        return load_binary(path)
+    return load_json(path)
+
+
+def save(table: SensorTable, path: str) -> None:
+    """Zapisuje konfigurację: rozszerzenie .bin - format binarny, w pozostałych przypadkach JSON Lines."""
+    if path.endswith(".bin"):
+        save_binary(table, path)
+    else:
+        save_json(table, path)
+
+
+def load_sensors(path: str) -> List[BaseSensor]:
+    """Wczytuje konfigurację i tworzy obiekty czujników."""
+    return load(path).sensors()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from sensor import default_sensors
+
+    parser = argparse.ArgumentParser(description="Zapis i konwersja konfiguracji floty czujników.")
+    parser.add_argument("path", help="Plik konfiguracji (.jsonl lub .bin)")
+    parser.add_argument("--generate", type=int, metavar="N",
+                        help="Zapisz flotę N czujników utworzoną z domyślnego zestawu")
+    parser.add_argument("--convert", metavar="OUTPUT", help="Zapisz wczytaną konfigurację w innym pliku/formacie")
+    args = parser.parse_args()
+
+    if args.generate:
+        templates = default_sensors()
+        fleet = SensorTable.from_sensors(templates)
+        rows = [i % len(templates) for i in range(args.generate)]
+        save(SensorTable([fleet.types[r] for r in rows],
+                         [f"{fleet.sensor_ids[r]}_{i:06d}" for i, r in enumerate(rows)],
+                         [fleet.names[r] for r in rows], [fleet.units[r] for r in rows],
+                         fleet.min_values[rows], fleet.max_values[rows], fleet.frequencies[rows],
+                         [None] * args.generate), args.path)
+        print(f"Zapisano {args.generate} czujników do {args.path}")
+    else:
+        t0 = time.perf_counter()
+        loaded = load(args.path)
+        print(f"Wczytano {len(loaded)} czujników w {time.perf_counter() - t0:.3f} s")
+        if args.convert:
+            save(loaded, args.convert)
+            print(f"Zapisano do {args.convert}")
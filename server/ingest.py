@@ -0,0 +1,199 @@
+import datetime
+import logging
+import math
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import timecodec
+from metrics import REGISTRY
+
+_BATCH_ROWS = REGISTRY.histogram("ingest_batch_rows", "Liczba odczytów w jednym zatwierdzeniu grupowym",
+                                 buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000))
+_COMMIT_SECONDS = REGISTRY.histogram("ingest_commit_seconds", "Czas zapisu i zatwierdzenia grupy odczytów")
+_ROWS_COMMITTED = REGISTRY.counter("ingest_rows_committed_total", "Liczba odczytów trwale zapisanych przez serwer")
+_COMMIT_FAILURES = REGISTRY.counter("ingest_commit_failures_total", "Liczba nieudanych zatwierdzeń grupy")
+_SUBMIT_WAIT_SECONDS = REGISTRY.histogram("ingest_submit_wait_seconds",
+                                          "Czas oczekiwania na miejsce w kolejce zapisu (opóźnienie ACK)")
+_SHED_ROWS = REGISTRY.counter("ingest_shed_rows_total",
+                              "Odczyty nieprzyjęte do zapisu - pełna kolejka po busy_timeout (odpowiedź BUSY)")
+
+Reading = Tuple[str, object, float, str]
+
+_STOP = object()
+
+
+def validate_reading(payload: dict) -> Reading:
+    """
+    Sprawdza pakiet z odczytem i zwraca krotkę (sensor_id, timestamp, value, unit) dla Loggera.
+
+    Args:
+        payload (dict): Pakiet w formacie NetworkClient
+            ({"sensor_id": ..., "timestamp": ..., "value": ..., "unit": ...}).
+
+    Raises:
+        ValueError: Gdy pakiet nie jest poprawnym odczytem.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("pakiet nie jest obiektem JSON")
+    sensor_id = payload.get("sensor_id")
+    if not isinstance(sensor_id, str) or not sensor_id:
+        raise ValueError("brak sensor_id")
+    value = payload.get("value")
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"niepoprawna wartość: {value!r}")
+    unit = payload.get("unit", "")
+    if not isinstance(unit, str):
+        raise ValueError(f"niepoprawna jednostka: {unit!r}")
+    ts = payload.get("timestamp")
+    if ts is None:
+        timestamp = datetime.datetime.now()
+    else:
+        try:
+            timestamp = timecodec.parse_datetime(ts)
+        except (TypeError, ValueError):
+            raise ValueError(f"niepoprawny timestamp: {ts!r}")
+    return sensor_id, timestamp, float(value), unit
+
+
+class CommitTicket:
+    """Potwierdzenie zapisu porcji odczytów - wątek obsługi klienta czeka na nie przed wysłaniem ACK."""
+    __slots__ = ("readings", "ok", "_done")
+
+    def __init__(self, readings: List[Reading]):
+        self.readings = readings
+        self.ok = False
+        self._done = threading.Event()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Czeka na zatwierdzenie grupy; zwraca True, jeśli odczyty zostały zapisane."""
+        self._done.wait(timeout)
+        return self.ok
+
+
+class IngestSink:
+    """
+    Wsadowy zapis odczytów z wielu połączeń do wspólnego Loggera (group commit).
+
+    Jeden wątek zapisujący pobiera z kolejki wszystkie oczekujące porcje, zapisuje je przez
+    Logger.log_reading, wykonuje jeden flush (opcjonalnie fsync) i dopiero wtedy zwalnia
+    oczekujących. Przy obciążeniu grupy rosną same, bez sztucznego opóźniania pojedynczych
+    wiadomości; max_delay pozwala dodatkowo poczekać na kolejne porcje.
+
+    Kolejka jest ograniczona do max_pending odczytów: gdy zapis nie nadąża, submit() czeka na
+    miejsce (wątek obsługi klienta nie czyta gniazda i opóźnia ACK, więc nadawca zwalnia),
+    a po busy_timeout odrzuca porcję (load shedding) - pamięć nie rośnie bez ograniczeń.
+    """
+
+    def __init__(self, logger, max_batch: int = 1000, max_delay: float = 0.0, fsync: bool = False,
+                 detector=None, max_pending: int = 100_000, busy_timeout: float = 1.0):
+        """
+        Args:
+            logger (Logger): Logger, do którego zapisywane są odczyty (używany tylko z wątku sinka).
+            max_batch (int): Maksymalna liczba odczytów w jednym zatwierdzeniu.
+            max_delay (float): Ile sekund czekać na dopełnienie grupy (0 - bez czekania).
+            fsync (bool): Czy po każdej grupie wymuszać zapis na nośnik.
+            detector (alerts.AnomalyDetector, optional): Detektor anomalii sprawdzający każdą
+                zatwierdzoną grupę (po wysłaniu potwierdzeń, więc nie wydłuża opóźnienia ACK).
+            max_pending (int): Maksymalna liczba odczytów oczekujących na zapis.
+            busy_timeout (float): Ile sekund submit() czeka na miejsce w kolejce przed odrzuceniem porcji.
+        """
+        self.logger = logger
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.detector = detector
+        self.max_pending = max_pending
+        self.busy_timeout = busy_timeout
+        self._pending_rows = 0
+        self._space = threading.Condition()
+        self._queue = queue.Queue()
+        self._log = logging.getLogger("IngestSink")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ingest-sink")
+        self._thread.start()
+
+    def submit(self, readings: List[Reading]) -> Optional[CommitTicket]:
+        """
+        Przekazuje porcję odczytów do zapisu; zwraca bilet, na który można czekać, albo None,
+        gdy kolejka była pełna dłużej niż busy_timeout (porcja nie została przyjęta).
+        """
+        rows = len(readings)
+
+        def has_space() -> bool:
+            # Porcja większa od limitu przyjmowana jest tylko do pustej kolejki
+            return self._pending_rows == 0 or self._pending_rows + rows <= self.max_pending
+
+        with self._space:
+            if not has_space():
+                t0 = time.perf_counter()
+                accepted = self._space.wait_for(has_space, self.busy_timeout)
+                _SUBMIT_WAIT_SECONDS.observe(time.perf_counter() - t0)
+                if not accepted:
+                    _SHED_ROWS.inc(rows)
+                    return None
+            self._pending_rows += rows
+        ticket = CommitTicket(readings)
+        self._queue.put(ticket)
+        return ticket
+
+    @property
+    def pending_rows(self) -> int:
+        """Liczba odczytów przyjętych, a jeszcze niezatwierdzonych."""
+        return self._pending_rows
+
+    def close(self) -> None:
+        """Zapisuje oczekujące odczyty, kończy wątek i zamyka Logger."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self.logger.stop()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            rows = len(item.readings)
+            deadline = time.monotonic() + self.max_delay
+            while rows < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                rows += len(item.readings)
+            self._commit(batch, rows)
+
+    def _commit(self, batch: List[CommitTicket], rows: int) -> None:
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            for ticket in batch:
+                for sensor_id, timestamp, value, unit in ticket.readings:
+                    self.logger.log_reading(sensor_id, timestamp, value, unit)
+            self.logger.flush(sync=self.fsync)
+        except Exception as e:
+            ok = False
+            _COMMIT_FAILURES.inc()
+            self._log.error(f"Błąd zapisu grupy {rows} odczytów: {e}")
+        _COMMIT_SECONDS.observe(time.perf_counter() - t0)
+        _BATCH_ROWS.observe(rows)
+        if ok:
+            _ROWS_COMMITTED.inc(rows)
+        for ticket in batch:
+            ticket.ok = ok
+            ticket._done.set()
+        with self._space:
+            self._pending_rows -= rows
+            self._space.notify_all()
+        if ok and self.detector is not None:
+            try:
+                self.detector.process_readings([r for ticket in batch for r in ticket.readings])
+            except Exception as e:
+                self._log.error(f"Błąd detektora anomalii: {e}")
@@ -0,0 +1,159 @@
+import itertools
+import json
+import socket
+from typing import Iterator, NamedTuple, Optional
+
+import timecodec
+from metrics import REGISTRY
+from network.framing import LineFramer
+
+_QUERIES = REGISTRY.counter("query_requests_total", "Liczba zapytań o logi obsłużonych przez serwer")
+_QUERY_ROWS = REGISTRY.counter("query_rows_sent_total", "Liczba wierszy wysłanych w odpowiedziach na zapytania")
+_QUERIES_ABORTED = REGISTRY.counter("query_aborted_total", "Liczba zapytań przerwanych (CANCEL lub rozłączenie)")
+
+RAW_COLUMNS = ["timestamp", "sensor_id", "value", "unit"]
+AGGREGATE_COLUMNS = ["start", "sensor_id", "count", "min", "max", "mean", "unit"]
+
+MAX_BATCH_SIZE = 10_000
+MAX_WINDOW = 64
+
+
+class QueryRequest(NamedTuple):
+    start: object
+    end: object
+    sensor_id: Optional[str]
+    bucket_seconds: Optional[float]
+    batch_size: int
+    window: int
+    raw: bool = False
+
+
+class QueryCancelled(Exception):
+    """Klient przerwał zapytanie (CANCEL) albo zamknął połączenie."""
+
+
+def parse_query(payload: dict) -> QueryRequest:
+    """
+    Sprawdza polecenie {"command": "query", ...} i zwraca parametry zapytania.
+
+    Args:
+        payload (dict): Polecenie z polami start, end (ISO 8601) oraz opcjonalnie
+            sensor_id, bucket_seconds (agregacja), batch_size, window (liczba
+            niepotwierdzonych porcji w drodze) i raw (true - wartości bez kalibracji).
+
+    Raises:
+        ValueError: Gdy parametry są niepoprawne.
+    """
+    try:
+        start = timecodec.parse_datetime(payload["start"])
+        end = timecodec.parse_datetime(payload["end"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("wymagane pola start i end w formacie ISO 8601")
+    sensor_id = payload.get("sensor_id")
+    if sensor_id is not None and not isinstance(sensor_id, str):
+        raise ValueError("sensor_id musi być napisem")
+    bucket_seconds = payload.get("bucket_seconds")
+    if bucket_seconds is not None and (not isinstance(bucket_seconds, (int, float)) or bucket_seconds <= 0):
+        raise ValueError("bucket_seconds musi być liczbą dodatnią")
+    batch_size = payload.get("batch_size", 1000)
+    window = payload.get("window", 4)
+    if not isinstance(batch_size, int) or not 0 < batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f"batch_size musi być z zakresu 1..{MAX_BATCH_SIZE}")
+    if not isinstance(window, int) or not 0 < window <= MAX_WINDOW:
+        raise ValueError(f"window musi być z zakresu 1..{MAX_WINDOW}")
+    raw = payload.get("raw", False)
+    if not isinstance(raw, bool):
+        raise ValueError("raw musi być wartością logiczną")
+    return QueryRequest(start, end, sensor_id, bucket_seconds, batch_size, window, raw)
+
+
+def _rows(logger, query: QueryRequest) -> Iterator[list]:
+    if query.bucket_seconds is None:
+        for entry in logger.read_logs(query.start, query.end, query.sensor_id, calibrated=not query.raw):
+            yield [timecodec.format_datetime(entry["timestamp"]), entry["sensor_id"], entry["value"], entry["unit"]]
+    else:
+        for entry in logger.aggregate_logs(query.start, query.end, query.sensor_id, query.bucket_seconds,
+                                           calibrated=not query.raw):
+            yield [timecodec.format_datetime(entry["start"]), entry["sensor_id"], entry["count"],
+                   entry["min"], entry["max"], entry["mean"], entry["unit"]]
+
+
+class _CreditReader:
+    """
+    Czyta od klienta potwierdzenia porcji ("ACK") i ewentualne "CANCEL" przez bufor odbiorczy
+    połączenia - dane odebrane po zapytaniu (np. kolejne wiadomości) zostają w nim dla serwera.
+    """
+
+    def __init__(self, framer: LineFramer):
+        self._framer = framer
+
+    def next_line(self) -> str:
+        line = self._framer.next_line()
+        while line is None:
+            if not self._framer.fill():
+                raise QueryCancelled("klient zamknął połączenie")
+            line = self._framer.next_line()
+        return bytes(line).decode('utf-8', errors='replace').strip()
+
+    def take_credit(self) -> None:
+        line = self.next_line()
+        if line == "CANCEL":
+            raise QueryCancelled("klient anulował zapytanie")
+        if line != "ACK":
+            raise QueryCancelled(f"nieoczekiwana wiadomość w trakcie zapytania: {line}")
+
+
+def _send(client_socket: socket.socket, message: dict) -> None:
+    client_socket.sendall((json.dumps(message) + "\n").encode('utf-8'))
+
+
+def stream_query(client_socket: socket.socket, logger, query: QueryRequest, framer: LineFramer = None) -> int:
+    """
+    Wysyła wynik zapytania porcjami z kontrolą przepływu i zwraca liczbę wysłanych wierszy.
+
+    Protokół (linie JSON): {"type": "header", "columns": [...]}, dalej porcje
+    {"type": "batch", "rows": [[...], ...]} i na końcu {"type": "end", "rows": N}.
+    Serwer ma w drodze co najwyżej `window` porcji - klient potwierdza każdą linią "ACK".
+    "CANCEL" albo rozłączenie przerywa odczyt logów; po CANCEL serwer kończy
+    wiadomością {"type": "end", ..., "cancelled": true}.
+
+    Args:
+        framer (LineFramer, optional): Bufor odbiorczy połączenia, z którego czytane są potwierdzenia
+            (domyślnie nowy - wtedy dane odebrane po zapytaniu nie wracają do wywołującego).
+    """
+    _QUERIES.inc()
+    columns = RAW_COLUMNS if query.bucket_seconds is None else AGGREGATE_COLUMNS
+    credits = _CreditReader(framer if framer is not None else LineFramer(client_socket))
+    rows = _rows(logger, query)
+    sent = 0
+    in_flight = 0
+    try:
+        _send(client_socket, {"type": "header", "columns": columns})
+        while True:
+            batch = list(itertools.islice(rows, query.batch_size))
+            if not batch:
+                break
+            if in_flight >= query.window:
+                credits.take_credit()
+                in_flight -= 1
+            _send(client_socket, {"type": "batch", "rows": batch})
+            in_flight += 1
+            sent += len(batch)
+            _QUERY_ROWS.inc(len(batch))
+        # Wszystkie porcje potwierdzone - po "end" na połączeniu nie zostają żadne potwierdzenia
+        while in_flight:
+            credits.take_credit()
+            in_flight -= 1
+        _send(client_socket, {"type": "end", "rows": sent})
+    except QueryCancelled:
+        _QUERIES_ABORTED.inc()
+        try:
+            _send(client_socket, {"type": "end", "rows": sent, "cancelled": True})
+        except OSError:
+            pass
+    except OSError:
+        _QUERIES_ABORTED.inc()
+        raise
+    finally:
+        rows.close()  # Zamyka otwarte pliki logów
+    return sent
@@ -1,31 +1,88 @@
 import socket
 import json
+import os
 import sys
 import threading
+import time
 import logging
 
-# Prosta konfiguracja loggera
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Katalog główny projektu musi być importowalny także przy uruchomieniu `python server/server.py`;
+# na początku ścieżki, żeby `server` oznaczał pakiet, a nie ten plik z katalogu skryptu
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if sys.path[0] != PROJECT_ROOT:
+    sys.path.insert(0, PROJECT_ROOT)
+CONFIG_FILE = os.path.join(PROJECT_ROOT, "config.yaml")
+LOGGER_CONFIG_FILE = os.path.join(PROJECT_ROOT, "config.json")
+
+from metrics import REGISTRY
+from network import batching
+from network.framing import BadLine, LineFramer, parse_json_lines
+from sampled_log import SampledLog
+from server.ingest import validate_reading
+from server.query import parse_query, stream_query
+
+_CONNECTIONS = REGISTRY.counter("server_connections_total", "Liczba przyjętych połączeń")
+_MESSAGES = REGISTRY.counter("server_messages_total", "Liczba poprawnie odebranych wiadomości")
+_PARSE_ERRORS = REGISTRY.counter("server_parse_errors_total", "Liczba wiadomości z błędnym JSON")
+_BYTES_RECEIVED = REGISTRY.counter("server_bytes_received_total", "Liczba odebranych bajtów")
+_HANDLE_SECONDS = REGISTRY.histogram("server_message_seconds", "Czas obsługi pojedynczej wiadomości")
+_FRAMES = REGISTRY.counter("server_frames_total", "Liczba odebranych ramek z porcjami odczytów")
+_FRAME_READINGS = REGISTRY.counter("server_frame_readings_total", "Liczba odczytów odebranych w ramkach")
+_REJECTED = REGISTRY.counter("server_rejected_total", "Liczba odczytów odrzuconych przy walidacji (NACK)")
+_BUSY = REGISTRY.counter("server_busy_total", "Liczba wiadomości nieprzyjętych z powodu przeciążenia (BUSY)")
+_CONNECTION_WAITS = REGISTRY.counter("server_connection_waits_total",
+                                     "Połączenia oczekujące na wolny wątek obsługi (limit max_connections)")
+_SLOT_WAIT_SECONDS = REGISTRY.histogram("server_connection_wait_seconds",
+                                        "Czas oczekiwania na wolny wątek obsługi przed przyjęciem połączenia")
+
+
+def project_path(path: str) -> str:
+    """Ścieżka z config.yaml: względna liczona od katalogu głównego projektu, nie od katalogu roboczego."""
+    return os.path.join(PROJECT_ROOT, path)
 
 
 class NetworkServer:
     """
     Prosty serwer TCP nasłuchujący na przychodzące dane w formacie JSON.
+
+    Oprócz linii JSON serwer przyjmuje skompresowane ramki odczytów (network.batching).
+    W trybie ingest (z podanym sinkiem) odczyty są walidowane i zapisywane przez IngestSink,
+    a ACK wysyłany jest dopiero po zatwierdzeniu grupy; odrzucone odczyty dostają "NACK <powód>".
+    Z podanym query_logger serwer obsługuje też polecenie {"command": "query", ...}
+    (zob. server.query.stream_query).
+
+    Kontrola przepływu: najwyżej max_connections połączeń obsługiwanych jest naraz (kolejne czekają
+    w kolejce nasłuchu systemu), a gdy kolejka zapisu sinka jest pełna, potwierdzenie czeka na miejsce
+    w kolejce; po busy_timeout sinka wiadomość dostaje "BUSY <ms>" - nie została przyjęta i klient
+    powinien ją ponowić po podanym czasie.
     """
 
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, sink=None, query_logger=None, max_connections: int = 64,
+                 busy_retry_ms: int = 200):
         """
         Inicjalizuje serwer na wskazanym hoście i porcie.
 
         Args:
             host (str): Host, na którym serwer będzie nasłuchiwał.
             port (int): Port nasłuchu.
+            sink (IngestSink, optional): Wspólny zapis odczytów; bez niego serwer tylko potwierdza odbiór.
+            query_logger (Logger, optional): Logger, z którego czytane są wyniki zapytań.
+            max_connections (int): Maksymalna liczba jednocześnie obsługiwanych połączeń (wątków).
+            busy_retry_ms (int): Sugerowane opóźnienie ponowienia przesyłane w odpowiedzi BUSY.
         """
         self.host = host
         self.port = port
+        self.sink = sink
+        self.query_logger = query_logger
+        self.max_connections = max_connections
+        self.busy_retry_ms = busy_retry_ms
+        self._slots = threading.BoundedSemaphore(max_connections)
         self.logger = logging.getLogger("NetworkServer")
+        # Odebrane wiadomości logowane zgodnie z trybem z sekcji `logging` config.yaml
+        self.events = SampledLog(self.logger)
         self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._running = False
 
     def start(self) -> None:
         """Uruchamia nasłuchiwanie na połączenia i obsługę klientów."""
@@ -33,10 +90,22 @@ class NetworkServer:
         self._server_socket.listen(5)
         self.logger.info(f"Serwer nasłuchuje na {self.host}:{self.port}")
 
+        self._running = True
         try:
-            while True:
-                client_socket, addr = self._server_socket.accept()
+            while self._running:
+                # Połączenie przyjmowane dopiero, gdy jest wolny wątek obsługi - pozostałe czekają
+                # w kolejce nasłuchu, a po jej zapełnieniu system spowalnia nawiązywanie połączeń
+                if not self._acquire_slot():
+                    break
+                try:
+                    client_socket, addr = self._server_socket.accept()
+                except OSError:
+                    self._slots.release()
+                    if not self._running:
+                        break  # Gniazdo zamknięte przez stop()
+                    raise
                 self.logger.info(f"Nowe połączenie od {addr}")
+                _CONNECTIONS.inc()
                 # Uruchomienie obsługi klienta w nowym wątku
                 client_thread = threading.Thread(target=self._handle_client, args=(client_socket,))
                 client_thread.start()
@@ -45,42 +114,225 @@ class NetworkServer:
         finally:
             self._server_socket.close()
 
+    def stop(self) -> None:
+        """Przerywa pętlę akceptowania połączeń (np. gdy serwer działa w osobnym wątku)."""
+        self._running = False
+        try:
+            self._server_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._server_socket.close()
+
+    def _acquire_slot(self) -> bool:
+        """Czeka na wolny wątek obsługi; False, jeśli serwer został w tym czasie zatrzymany."""
+        if self._slots.acquire(blocking=False):
+            return True
+        _CONNECTION_WAITS.inc()
+        t0 = time.perf_counter()
+        while self._running:
+            if self._slots.acquire(timeout=0.5):
+                _SLOT_WAIT_SECONDS.observe(time.perf_counter() - t0)
+                return True
+        return False
+
     def _handle_client(self, client_socket: socket.socket) -> None:
-        """Odbiera dane, wysyła ACK i wypisuje je na konsolę."""
-        buffer = ""
+        """Odbiera dane, wysyła ACK i rejestruje je w logu zdarzeń."""
+        framer = LineFramer(client_socket)
+        frame_header = None  # (kodek, rozmiar) ramki, której treść jeszcze nie dotarła
         try:
             with client_socket:
                 while True:
-                    data = client_socket.recv(1024).decode('utf-8')
-                    if not data:
+                    # Wiadomości są rozdzielane znakiem nowej linii; ramka to linia nagłówka i N bajtów treści.
+                    # Najpierw dane już zbuforowane - zapytanie mogło odebrać więcej niż swoje potwierdzenia
+                    messages = []
+                    consumed = False
+                    while True:
+                        if frame_header is not None:
+                            # Odpowiedzi na wcześniejsze wiadomości muszą wyprzedzić odpowiedź na ramkę
+                            # (obsłużone przed pobraniem widoku treści - zapytanie może odbierać dane do bufora)
+                            self._handle_messages(client_socket, framer, messages)
+                            messages = []
+                            payload = framer.read_exact(frame_header[1])
+                            if payload is None:
+                                break  # Niepełna ramka - czekaj na resztę treści
+                            self._handle_frame(client_socket, frame_header[0], payload)
+                            frame_header = None
+                            continue
+                        line = framer.next_line()
+                        if line is None:
+                            break
+                        consumed = True
+                        if line[:len(batching.FRAME_PREFIX)] == batching.FRAME_PREFIX:
+                            frame_header = batching.parse_header(line.tobytes())
+                        else:
+                            messages.append(line)
+                    self._handle_messages(client_socket, framer, messages)
+                    if consumed:
+                        continue  # Obsługa (np. zapytanie) mogła zostawić w buforze kolejne linie
+
+                    received = framer.fill()
+                    if not received:
                         break  # Połączenie zamknięte przez klienta
+                    _BYTES_RECEIVED.inc(received)
 
-                    buffer += data
-                    # Wiadomości są rozdzielane znakiem nowej linii
-                    while '\n' in buffer:
-                        message, buffer = buffer.split('\n', 1)
-                        try:
-                            payload = json.loads(message)
-                            print("\n--- Otrzymano dane ---")
-                            for key, value in payload.items():
-                                print(f"  {key}: {value}")
-                            print("-----------------------\n")
-
-                            # Wysłanie potwierdzenia ACK
-                            client_socket.sendall("ACK\n".encode('utf-8'))
-
-                        except json.JSONDecodeError:
-                            error_msg = f"Błąd parsowania JSON: {message}"
-                            self.logger.error(error_msg)
-                            sys.stderr.write(error_msg + '\n')
-
-        except socket.error as e:
+        except (socket.error, ValueError) as e:
             self.logger.error(f"Błąd komunikacji z klientem: {e}")
         finally:
+            self._slots.release()
             self.logger.info(f"Połączenie z klientem zostało zamknięte.")
+
+    def _handle_frame(self, client_socket: socket.socket, codec: str, payload: bytes) -> None:
+        """Obsługuje ramkę odczytów (network.batching) - jedna odpowiedź na całą ramkę."""
+        t0 = time.perf_counter()
+        try:
+            packets = batching.decode_frame(codec, payload)
+        except ValueError as e:
+            _PARSE_ERRORS.inc()
+            self.logger.error(f"Odrzucono ramkę: {e}")
+            self._reply(client_socket, [f"NACK {e}"], [], t0)
+            return
+        _FRAMES.inc()
+        _FRAME_READINGS.inc(len(packets))
+        self.events.event("ramka", "Otrzymano ramkę %s: %d odczytów", codec, len(packets))
+        readings = []
+        rejected = []
+        if self.sink is not None:
+            for payload_dict in packets:
+                try:
+                    readings.append(validate_reading(payload_dict))
+                except ValueError as e:
+                    rejected.append(str(e))
+        if rejected:
+            _REJECTED.inc(len(rejected))
+            self.logger.warning(f"Odrzucono {len(rejected)} odczytów z ramki: {rejected[0]}")
+            response = f"NACK {len(rejected)}/{len(packets)} odrzuconych: {rejected[0]}"
+        else:
+            response = "ACK"
+        self._reply(client_socket, [response], readings, t0)
+
+    def _handle_messages(self, client_socket: socket.socket, framer: LineFramer, messages: list) -> None:
+        """
+        Obsługuje wszystkie kompletne wiadomości z jednego odczytu gniazda (linie jako widoki
+        bufora LineFramer) i odpowiada na nie w kolejności.
+        W trybie ingest poprawne odczyty trafiają do sinka jedną porcją, więc potwierdzenia
+        kolejnych wiadomości czekają na to samo zatwierdzenie grupy.
+        """
+        if not messages:
+            return
+        t0 = time.perf_counter()
+        responses = []
+        readings = []
+        for payload in parse_json_lines(messages):
+            if isinstance(payload, BadLine) and payload.text.strip() == "CANCEL":
+                # Anulowanie zapytania, które zdążyło się zakończyć (klient dostanie już wysłane "end")
+                continue
+            if isinstance(payload, BadLine):
+                _PARSE_ERRORS.inc()
+                error_msg = f"Błąd parsowania JSON: {payload.text}"
+                self.logger.error(error_msg)
+                sys.stderr.write(error_msg + '\n')
+                continue
+            if isinstance(payload, dict) and payload.get("command") == "query":
+                # Odpowiedzi na wcześniejsze wiadomości muszą wyprzedzić wynik zapytania
+                self._reply(client_socket, responses, readings, t0)
+                responses, readings = [], []
+                self._handle_query(client_socket, framer, payload)
+                t0 = time.perf_counter()
+                continue
+            self.events.event("odebrano", "Otrzymano dane: %s", payload)
+            if self.sink is None:
+                responses.append("ACK")
+                continue
+            try:
+                readings.append(validate_reading(payload))
+                responses.append("ACK")
+            except ValueError as e:
+                _REJECTED.inc()
+                self.logger.warning(f"Odrzucono odczyt: {e}")
+                responses.append(f"NACK {e}")
+        self._reply(client_socket, responses, readings, t0)
+
+    def _reply(self, client_socket: socket.socket, responses: list, readings: list, t0: float) -> None:
+        """Zatwierdza zebrane odczyty (tryb ingest) i wysyła odpowiedzi na porcję wiadomości."""
+        if readings:
+            # Przy pełnej kolejce zapisu submit czeka na miejsce - potwierdzenia są opóźnione
+            ticket = self.sink.submit(readings)
+            if ticket is None:
+                busy = f"BUSY {self.busy_retry_ms}"
+                _BUSY.inc(responses.count("ACK"))
+                responses = [busy if r == "ACK" else r for r in responses]
+            elif not ticket.wait():
+                responses = ["NACK błąd zapisu" if r == "ACK" else r for r in responses]
+        if responses:
+            # Wysłanie potwierdzeń ACK (jednym wywołaniem dla całej porcji)
+            client_socket.sendall("".join(r + "\n" for r in responses).encode('utf-8'))
+            _MESSAGES.inc(responses.count("ACK"))
+            elapsed = (time.perf_counter() - t0) / len(responses)
+            for _ in responses:
+                _HANDLE_SECONDS.observe(elapsed)
+
+    def _handle_query(self, client_socket: socket.socket, framer: LineFramer, payload: dict) -> None:
+        """Strumieniuje wynik zapytania o logi (server.query.stream_query)."""
+        try:
+            if self.query_logger is None:
+                raise ValueError("zapytania nie są włączone")
+            query = parse_query(payload)
+        except ValueError as e:
+            client_socket.sendall((json.dumps({"type": "error", "message": str(e)}) + "\n").encode('utf-8'))
+            return
+        t0 = time.perf_counter()
+        rows = stream_query(client_socket, self.query_logger, query, framer)
+        self.logger.info(f"Zapytanie {query.start} - {query.end} (czujnik: {query.sensor_id or 'wszystkie'}): "
+                         f"{rows} wierszy w {time.perf_counter() - t0:.2f} s")
 if __name__ == "__main__":
-    HOST = "127.0.0.1"
-    PORT = 9999
+    import argparse
+
+    import metrics
+    import profiler
+    import sampled_log
+    from network.config import load_config_section
+
+    parser = argparse.ArgumentParser(description="Serwer odbierający odczyty czujników.")
+    profiler.add_arguments(parser)
+    profiler.start_from_args(parser.parse_args())
+    sampled_log.setup_console()
+
+    server_config = load_config_section('server', CONFIG_FILE)
+    metrics.start_from_config(load_config_section('metrics', CONFIG_FILE), port_key='server_http_port')
+    sampled_log.configure(load_config_section('logging', CONFIG_FILE))
 
-    server = NetworkServer(HOST, PORT)
-    server.start()
\ No newline at end of file
+    ingest_sink = None
+    ingest_config = server_config.get('ingest') or {}
+    if ingest_config.get('enabled'):
+        import alerts
+        from Logger import Logger
+        from sensor import default_sensors
+        from server.ingest import IngestSink
+        ingest_logger = Logger(project_path(ingest_config.get('logger_config', LOGGER_CONFIG_FILE)))
+        # Odczyty zapisywane są surowe; detektor sprawdza wartości po kalibracji loggera (calibration_file)
+        detector = alerts.from_config(load_config_section('alerts', CONFIG_FILE),
+                                      calibration=ingest_logger.calibration)
+        if detector is not None:
+            # Zakresy znanych czujników; pozostałe sprawdzane tylko regułami rate/zscore
+            detector.add_sensors(default_sensors())
+        ingest_sink = IngestSink(ingest_logger,
+                                 max_batch=ingest_config.get('max_batch', 1000),
+                                 max_delay=ingest_config.get('max_delay_ms', 0) / 1000,
+                                 fsync=ingest_config.get('fsync', False),
+                                 detector=detector,
+                                 max_pending=ingest_config.get('max_pending_rows', 100_000),
+                                 busy_timeout=ingest_config.get('busy_timeout_ms', 1000) / 1000)
+    query_logger = None
+    query_config = server_config.get('query') or {}
+    if query_config.get('enabled'):
+        from Logger import Logger
+        query_logger = Logger(project_path(query_config.get('logger_config', LOGGER_CONFIG_FILE)))
+    server = NetworkServer(server_config.get('host', '127.0.0.1'), server_config.get('port', 9999),
+                           sink=ingest_sink, query_logger=query_logger,
+                           max_connections=server_config.get('max_connections', 64),
+                           busy_retry_ms=server_config.get('busy_retry_ms', 200))
+    try:
+        server.start()
+    finally:
+        if ingest_sink is not None:
+            ingest_sink.close()
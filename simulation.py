@@ -0,0 +1,146 @@
+"""
+Deterministyczna symulacja czujników w czasie przyspieszonym.
+
+Zegar (WallClock lub SimulationClock) i generatory liczb losowych (NumPy Generator)
+wstrzykiwane są do czujników, Loggera i SensorApplication. Z zegarem symulacyjnym
+czas płynie tylko wtedy, gdy symulacja go przesuwa, więc miesiąc odczytów można
+odtworzyć w kilka sekund, a ten sam seed daje identyczne pliki wynikowe (logi i archiwa ZIP;
+manifest archiwum zapisuje czas rzeczywisty archiwizacji).
+"""
+import datetime
+import heapq
+import time
+import zlib
+from typing import Iterable, Optional, Union
+
+
+class WallClock:
+    """Zegar rzeczywisty - domyślne zachowanie czujników i Loggera."""
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class SimulationClock:
+    """
+    Zegar symulacyjny: now() zwraca czas symulacji, a sleep() przesuwa go natychmiast.
+    """
+
+    def __init__(self, start: datetime.datetime):
+        """
+        :param start: Początkowy czas symulacji
+        """
+        self._now = start
+
+    def now(self) -> datetime.datetime:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        """Przesuwa czas symulacji o podaną liczbę sekund."""
+        self._now += datetime.timedelta(seconds=seconds)
+
+    def set(self, moment: datetime.datetime) -> None:
+        """Ustawia czas symulacji (nie może cofać się w czasie)."""
+        if moment < self._now:
+            raise ValueError(f"Zegar symulacji nie może się cofnąć: {moment} < {self._now}")
+        self._now = moment
+
+
+def sensor_rng(seed: int, sensor_id: str):
+    """
+    Tworzy niezależny strumień liczb losowych dla czujnika.
+    Strumień zależy tylko od seeda i identyfikatora czujnika, nie od kolejności tworzenia.
+
+    :param seed: Ziarno całej symulacji
+    :param sensor_id: Identyfikator czujnika
+    :return: numpy.random.Generator
+    """
+    import numpy as np
+    return np.random.Generator(np.random.PCG64([seed, zlib.crc32(sensor_id.encode('utf-8'))]))
+
+
+def attach(sensors: Iterable, clock, seed: Optional[int] = None) -> None:
+    """Podłącza zegar (i opcjonalnie generatory z danego seeda) do istniejących czujników."""
+    for s in sensors:
+        s.clock = clock
+        if seed is not None:
+            s.rng = sensor_rng(seed, s.sensor_id)
+
+
+class SimulationEngine:
+    """
+    Sterowana zdarzeniami pętla symulacji: zegar przeskakuje od razu do najbliższego
+    zaplanowanego odczytu, zamiast czekać co sekundę jak w pętli aplikacji.
+    """
+
+    def __init__(self, sensors: list, clock: SimulationClock, logger=None):
+        """
+        :param sensors: Lista czujników (z podłączonym zegarem clock)
+        :param clock: Zegar symulacyjny
+        :param logger: Opcjonalny Logger, do którego trafiają wszystkie nowe odczyty
+        """
+        self.sensors = sensors
+        self.clock = clock
+        self.logger = logger
+        self.readings = 0
+
+    def run(self, duration: Union[float, datetime.timedelta]) -> int:
+        """
+        Wykonuje symulację przez zadany czas (sekundy lub timedelta).
+
+        :return: Liczba wygenerowanych odczytów
+        """
+        if not isinstance(duration, datetime.timedelta):
+            duration = datetime.timedelta(seconds=duration)
+        end = self.clock.now() + duration
+
+        # Kolejka (czas następnego odczytu, indeks czujnika) - indeks rozstrzyga remisy deterministycznie
+        queue = [(self.clock.now(), i) for i in range(len(self.sensors))]
+        heapq.heapify(queue)
+        steps = [datetime.timedelta(seconds=max(s.frequency, 0.001)) for s in self.sensors]
+        count = 0
+        while queue:
+            due, index = heapq.heappop(queue)
+            if due >= end:
+                break
+            self.clock.set(due)
+            s = self.sensors[index]
+            if s.active:
+                value = s.read_value()
+                count += 1
+                if self.logger is not None:
+                    self.logger.log_reading(s.sensor_id, due, value, s.unit)
+            heapq.heappush(queue, (due + steps[index], index))
+        self.clock.set(max(end, self.clock.now()))
+        self.readings += count
+        return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from Logger import Logger
+    from sensor import default_sensors
+
+    parser = argparse.ArgumentParser(description="Deterministyczna symulacja czujników w czasie przyspieszonym.")
+    parser.add_argument("--config", default="config.json", help="Plik konfiguracyjny Loggera")
+    parser.add_argument("--start", default="2025-01-01T00:00:00", help="Początek symulacji (ISO 8601)")
+    parser.add_argument("--days", type=float, default=30, help="Czas trwania symulacji w dniach")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno generatorów czujników")
+    args = parser.parse_args()
+
+    sim_clock = SimulationClock(datetime.datetime.fromisoformat(args.start))
+    sim_sensors = default_sensors()
+    attach(sim_sensors, sim_clock, args.seed)
+    sim_logger = Logger(args.config, clock=sim_clock)
+    sim_logger.start()
+    t0 = time.perf_counter()
+    total = SimulationEngine(sim_sensors, sim_clock, sim_logger).run(datetime.timedelta(days=args.days))
+    sim_logger.stop()
+    print(f"Wygenerowano {total} odczytów ({args.days} dni) w {time.perf_counter() - t0:.1f} s")
@@ -0,0 +1,72 @@
+import datetime
+import logging
+import types
+import unittest
+
+import numpy as np
+
+from alerts import AnomalyDetector
+from calibration import AffineCalibration, CalibrationTable
+
+START = datetime.datetime(2025, 1, 1)
+START_US = 1_735_689_600_000_000  # START w mikrosekundach od EPOCH
+
+
+class TestAnomalyDetector(unittest.TestCase):
+    def setUp(self):
+        logging.getLogger("alerts").setLevel(logging.CRITICAL)
+
+    def test_range_and_rate_rules(self):
+        detector = AnomalyDetector(cooldown_seconds=0)
+        detector.add_sensor("temp_01", -20, 40, max_rate=1.0)
+        micros = START_US + np.arange(4, dtype=np.int64) * 1_000_000
+        alerts = detector.process(["temp_01"] * 4, micros, np.array([20.0, 20.5, 25.0, 45.0]))
+        self.assertEqual(sorted((a.rule, a.value) for a in alerts), [("range", 45.0), ("rate", 25.0)])
+        self.assertEqual(alerts[0].timestamp, START + datetime.timedelta(seconds=3))
+
+    def test_sensor_ranges_follow_calibration(self):
+        # Surowy zakres -20..40 °C, sprawdzane wartości w kelwinach
+        calibration = CalibrationTable({"temp_01": AffineCalibration(1.0, 273.15)})
+        detector = AnomalyDetector(cooldown_seconds=0, calibration=calibration)
+        detector.add_sensors([types.SimpleNamespace(sensor_id="temp_01", min_value=-20, max_value=40)])
+        micros = START_US + np.arange(2, dtype=np.int64) * 1_000_000
+        alerts = detector.process(["temp_01"] * 2, micros, np.array([20.0, 50.0]))
+        self.assertEqual([(a.rule, round(a.value, 2)) for a in alerts], [("range", 323.15)])
+
+    def test_zscore_after_warmup_with_cooldown(self):
+        detector = AnomalyDetector(warmup=50, alpha=0.05, cooldown_seconds=60)
+        rng = np.random.default_rng(1)
+        micros = START_US + np.arange(200, dtype=np.int64) * 1_000_000
+        values = rng.normal(10.0, 0.5, 200)
+        self.assertEqual(detector.process(["s"] * 200, micros, values), [])
+
+        spikes = np.array([30.0, 30.0])
+        later = micros[-1] + np.array([1_000_000, 2_000_000])
+        alerts = detector.process(["s", "s"], later, spikes)
+        self.assertEqual([a.rule for a in alerts], ["zscore"])
+
+    def test_batched_ewma_matches_sequential_updates(self):
+        values = np.random.default_rng(2).normal(5.0, 1.0, 300)
+        micros = START_US + np.arange(300, dtype=np.int64)
+        batched = AnomalyDetector(alpha=0.1)
+        batched.process(["a", "b"] * 150, micros, values)
+        sequential = AnomalyDetector(alpha=0.1)
+        for i in range(300):
+            sequential.process(["a", "b"][i % 2:i % 2 + 1], micros[i:i + 1], values[i:i + 1])
+        np.testing.assert_allclose(batched._mean[:2], sequential._mean[:2])
+        np.testing.assert_allclose(batched._moment2[:2], sequential._moment2[:2])
+
+    def test_observe_collects_micro_batches(self):
+        detector = AnomalyDetector(batch_size=3)
+        detector.add_sensor("hum_01", 0, 100)
+        received = []
+        detector.add_handler(received.append)
+        detector.observe("hum_01", START, 50.0, "%")
+        detector.observe("hum_01", START + datetime.timedelta(seconds=1), 150.0, "%")
+        self.assertEqual(received, [])
+        detector.flush()
+        self.assertEqual([a.rule for a in received], ["range"])
+
+
+if __name__ == '__main__':
+    unittest.main()
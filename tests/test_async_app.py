@@ -0,0 +1,98 @@
+import datetime
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from simulation import SimulationClock
+
+START = datetime.datetime(2025, 1, 1)
+
+
+class TestAsyncSensorApplication(unittest.TestCase):
+    def setUp(self):
+        logging.getLogger("NetworkClient").setLevel(logging.CRITICAL)
+        logging.getLogger("AsyncSensorApplication").setLevel(logging.CRITICAL)
+        self.cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        # Serwer, który przyjmuje połączenie, ale nigdy nie odpowiada (zawieszone łącze)
+        self.stalled = socket.socket()
+        self.stalled.bind(("127.0.0.1", 0))
+        self.stalled.listen()
+        self.accepted = []
+        threading.Thread(target=lambda: self.accepted.append(self.stalled.accept()), daemon=True).start()
+        with open(os.path.join(self.temp_dir, "config.json"), 'w') as f:
+            json.dump({"log_dir": os.path.join(self.temp_dir, "logs"), "buffer_size": 50}, f)
+        with open(os.path.join(self.temp_dir, "config.yaml"), 'w') as f:
+            json.dump({"client": {"host": "127.0.0.1", "port": self.stalled.getsockname()[1],
+                                  "timeout": 0.2, "retries": 1},
+                       "logging": {"mode": "off"}}, f)
+        os.chdir(self.temp_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.stalled.close()
+        for conn, _ in self.accepted:
+            conn.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_sampling_and_logging_continue_when_uplink_stalls(self):
+        from async_app import AsyncSensorApplication, _UPLINK_DROPPED
+
+        dropped_before = _UPLINK_DROPPED.value
+        app = AsyncSensorApplication(clock=SimulationClock(START), seed=1, uplink_queue_size=5,
+                                     shutdown_timeout=0.3)
+        t0 = time.perf_counter()
+        app.run(ticks=120)
+        self.assertLess(time.perf_counter() - t0, 3.0)
+        self.assertGreater(_UPLINK_DROPPED.value, dropped_before)
+
+        entries = list(app.logger.read_logs(START, START + datetime.timedelta(minutes=5)))
+        self.assertGreater(len(entries), 50)
+        self.assertEqual(len(entries), len({(e["sensor_id"], e["timestamp"]) for e in entries}))
+
+    def test_repeated_values_reach_logger(self):
+        from async_app import AsyncSensorApplication
+        from sensor import sensor
+
+        clock = SimulationClock(START)
+        app = AsyncSensorApplication(clock=clock, seed=1, shutdown_timeout=0.3)
+        # Czujnik o stałej wartości - każdy odczyt musi trafić do Loggera (max_silence_s, reconstruct)
+        app.sensors = [sensor("const_01", "Stały", "C", 5.0, 5.0, frequency=1, clock=clock)]
+        app.run(ticks=30)
+
+        entries = list(app.logger.read_logs(START, START + datetime.timedelta(minutes=5)))
+        self.assertEqual(len(entries), 30)
+        self.assertEqual({e["value"] for e in entries}, {5.0})
+
+    def test_writer_failure_is_raised_instead_of_hanging(self):
+        from async_app import AsyncSensorApplication
+
+        app = AsyncSensorApplication(clock=SimulationClock(START), seed=1, log_queue_size=5, shutdown_timeout=0.3)
+
+        def failing_write(batch):
+            raise OSError("brak miejsca na dysku")
+
+        app._write_batch = failing_write
+        errors = []
+
+        def run():
+            try:
+                app.run(ticks=50)
+            except OSError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive(), "zamykanie zawisło na pełnej kolejce zapisu")
+        self.assertEqual([str(e) for e in errors], ["brak miejsca na dysku"])
+
+
+if __name__ == '__main__':
+    unittest.main()
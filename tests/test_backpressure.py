@@ -0,0 +1,173 @@
+import datetime
+import queue
+import socket
+import threading
+import time
+import unittest
+
+from gui.backend import StatusQueue, ThreadedServer, post_status
+from metrics import REGISTRY
+from network.client import NetworkClient
+from server.ingest import IngestSink
+from server.server import NetworkServer
+
+READING = ("temp_01", datetime.datetime(2025, 1, 1), 21.0, "C")
+
+
+class _SlowLogger:
+    """Logger, którego zapis czeka na zwolnienie `release` (wolny konsument)."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.rows = []
+
+    def log_reading(self, sensor_id, timestamp, value, unit):
+        self.release.wait()
+        self.rows.append((sensor_id, timestamp, value, unit))
+
+    def flush(self, sync=False):
+        pass
+
+    def stop(self):
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _connect(port: int) -> socket.socket:
+    for _ in range(50):
+        try:
+            return socket.create_connection(("127.0.0.1", port), timeout=5)
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    raise AssertionError("Serwer nie wystartował")
+
+
+class TestIngestBackpressure(unittest.TestCase):
+    def setUp(self):
+        self.logger = _SlowLogger()
+        self.sink = IngestSink(self.logger, max_pending=10, busy_timeout=0.1)
+
+    def tearDown(self):
+        self.logger.release.set()
+        self.sink.close()
+
+    def test_full_queue_sheds_after_timeout(self):
+        shed_before = REGISTRY.snapshot()["ingest_shed_rows_total"]["value"]
+        first = self.sink.submit([READING] * 10)
+        self.assertIsNotNone(first)
+        t0 = time.perf_counter()
+        self.assertIsNone(self.sink.submit([READING] * 5))
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.09)
+        self.assertEqual(REGISTRY.snapshot()["ingest_shed_rows_total"]["value"] - shed_before, 5)
+
+        self.logger.release.set()
+        self.assertTrue(first.wait(5))
+        self.assertEqual(self.sink.pending_rows, 0)
+        self.assertTrue(self.sink.submit([READING] * 5).wait(5))
+        self.assertEqual(len(self.logger.rows), 15)
+
+    def test_submit_waits_for_space(self):
+        self.sink.busy_timeout = 5.0
+        self.sink.submit([READING] * 10)
+        threading.Timer(0.1, self.logger.release.set).start()
+        ticket = self.sink.submit([READING] * 10)  # Czeka, aż zapis zwolni miejsce
+        self.assertIsNotNone(ticket)
+        self.assertTrue(ticket.wait(5))
+
+
+class TestServerFlowControl(unittest.TestCase):
+    MESSAGE = b'{"sensor_id": "temp_01", "value": 1.0, "unit": "C"}\n'
+
+    def _start_server(self, **kwargs) -> int:
+        port = _free_port()
+        self.server = NetworkServer("127.0.0.1", port, **kwargs)
+        threading.Thread(target=self.server.start, daemon=True).start()
+        self.addCleanup(self.server.stop)
+        return port
+
+    def test_busy_reply_and_client_retry(self):
+        logger = _SlowLogger()
+        sink = IngestSink(logger, max_pending=1, busy_timeout=0.05)
+        self.addCleanup(sink.close)
+        self.addCleanup(logger.release.set)
+        port = self._start_server(sink=sink, busy_retry_ms=20)
+        with _connect(port) as first, _connect(port) as second:
+            first.sendall(self.MESSAGE)  # Zajmuje jedyne miejsce w kolejce zapisu (zapis wstrzymany)
+            time.sleep(0.1)
+            second.sendall(self.MESSAGE)
+            self.assertEqual(second.recv(1024), b"BUSY 20\n")
+
+            # Klient ponawia wiadomość po BUSY, aż zapis nadąży
+            client = NetworkClient("127.0.0.1", port, timeout=5.0, retries=20)
+            client.connect()
+            threading.Timer(0.2, logger.release.set).start()
+            self.assertTrue(client.send({"sensor_id": "temp_01", "value": 2.0, "unit": "C"}))
+            client.close()
+            self.assertEqual(first.recv(1024), b"ACK\n")
+        self.assertEqual(sorted(row[2] for row in logger.rows), [1.0, 2.0])
+
+    def test_connection_limit_defers_new_connections(self):
+        port = self._start_server(max_connections=1)
+        first = _connect(port)
+        first.sendall(self.MESSAGE)
+        self.assertEqual(first.recv(1024), b"ACK\n")
+        with _connect(port) as second:
+            second.settimeout(0.3)
+            second.sendall(self.MESSAGE)
+            with self.assertRaises(socket.timeout):
+                second.recv(1024)  # Brak wolnego wątku obsługi - wiadomość czeka
+            first.close()
+            second.settimeout(5)
+            self.assertEqual(second.recv(1024), b"ACK\n")
+
+
+class TestStatusQueue(unittest.TestCase):
+    def test_full_queue_drops_and_counts(self):
+        status_queue = queue.Queue(maxsize=2)
+        dropped_before = REGISTRY.snapshot()["gui_status_dropped_total"]["value"]
+        results = [post_status(status_queue, "info", f"komunikat {i}") for i in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+        self.assertEqual(REGISTRY.snapshot()["gui_status_dropped_total"]["value"] - dropped_before, 3)
+        self.assertEqual(status_queue.get_nowait(), ("info", "komunikat 0"))
+
+    def test_overflowing_errors_are_coalesced(self):
+        status_queue = StatusQueue(maxsize=2)
+        post_status(status_queue, "info", "komunikat")
+        post_status(status_queue, "error", "błąd 0")
+        self.assertFalse(post_status(status_queue, "info", "odrzucony"))
+        # Zalew błędów nie powiększa kolejki - zostaje liczba i ostatni komunikat na poziom
+        for i in range(1, 1000):
+            self.assertTrue(post_status(status_queue, "error", f"błąd {i}"))
+        post_status(status_queue, "alert", "alert")
+        self.assertEqual(status_queue.qsize(), 2)
+        self.assertEqual(sorted(status_queue.take_overflow()),
+                         [("alert", "alert"), ("error", "999 komunikatów, ostatni: błąd 999")])
+        self.assertEqual(status_queue.take_overflow(), [])
+        self.assertEqual([status_queue.get_nowait() for _ in range(2)], [("info", "komunikat"), ("error", "błąd 0")])
+
+    def test_received_data_info_is_aggregated(self):
+        class _Client:
+            def sendall(self, data):
+                pass
+
+        status_queue = queue.Queue(maxsize=10)
+        received = []
+        server = ThreadedServer(0, lambda *reading: received.append(reading), status_queue)
+        for i in range(500):
+            server._handle_message(_Client(), {"sensor": "temp_01", "value": i, "unit": "C"})
+        server._handle_message(_Client(), {"sensor": "temp_01", "value": "x"})
+        self.assertEqual(len(received), 500)
+        messages = list(status_queue.queue)
+        # Pierwszy odczyt od razu, kolejne zbiorczo najwyżej raz na STATUS_INFO_INTERVAL; błąd zawsze
+        self.assertEqual(messages[0], ("info", "Odebrano dane z temp_01: 0.0 C"))
+        self.assertLessEqual(len(messages), 3)
+        self.assertEqual(messages[-1][0], "error")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import datetime
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+
+from Logger import Logger
+from network.batching import MAX_FRAME_BYTES, BatchingClient, decode_frame, encode_frame, frameable, parse_header
+from network.client import NetworkClient
+from server.ingest import IngestSink
+from server.server import NetworkServer
+from tests.test_pool import free_port
+
+START = datetime.datetime(2025, 1, 1)
+
+
+def readings(count: int) -> list:
+    return [{"sensor_id": f"s{i % 3}", "timestamp": (START + datetime.timedelta(seconds=i)).isoformat(),
+             "value": round(20 + (i % 7) * 0.25 - (i % 3), 2), "unit": "C"} for i in range(count)]
+
+
+class TestFrames(unittest.TestCase):
+    def test_round_trip_preserves_order_and_values(self):
+        packets = readings(200)
+        for codec in ("zlib", "lzma"):
+            frame = encode_frame(packets, codec)
+            header, payload = frame.split(b"\n", 1)
+            self.assertEqual(parse_header(header), (codec, len(payload)))
+            self.assertEqual([(p["sensor_id"], p["value"]) for p in decode_frame(codec, payload)],
+                             [(p["sensor_id"], p["value"]) for p in packets])
+        self.assertLess(len(frame), sum(len(json.dumps(p)) for p in packets) / 5)
+        with self.assertRaises(ValueError):
+            decode_frame("zlib", b"nie ramka")
+
+    def test_rejects_oversized_and_malformed_payloads(self):
+        # Kilkadziesiąt kB skompresowanych zer rozpakowuje się ponad limit ramki
+        bomb = zlib.compress(b"0" * (MAX_FRAME_BYTES + 1), 9)
+        self.assertLess(len(bomb), 100_000)
+        with self.assertRaisesRegex(ValueError, "uszkodzona ramka"):
+            decode_frame("zlib", bomb)
+        _, payload = encode_frame(readings(5), "zlib").split(b"\n", 1)
+        with self.assertRaises(ValueError):
+            decode_frame("zlib", payload + b"nadmiarowe")
+        for decimals in (-1, 10, 10 ** 9, 2.5, True, "2"):
+            body = {"keys": [["s0", "C"]], "k": [0], "t": [0], "v": [1], "d": decimals}
+            with self.assertRaises(ValueError):
+                decode_frame("zlib", zlib.compress(json.dumps(body).encode()))
+        with self.assertRaises(ValueError):
+            BatchingClient(None, decimals=12)
+
+
+class _FakeClient:
+    """Klient zapisujący wysłane ramki zamiast wysyłać je do serwera."""
+    retries = 1
+    timeout = 5.0
+
+    def __init__(self):
+        self.frames = []
+        self.sent = threading.Event()
+
+    def connect(self):
+        pass
+
+    def close(self):
+        pass
+
+    def exchange_bytes(self, frame, description=None):
+        self.frames.append(frame)
+        self.sent.set()
+        return True
+
+
+class TestBatchingSender(unittest.TestCase):
+    def test_single_reading_is_sent_within_max_delay(self):
+        fake = _FakeClient()
+        client = BatchingClient(fake, max_delay=0.2, max_messages=500)
+        client.connect()
+        try:
+            t0 = time.monotonic()
+            client.send(readings(1)[0])
+            self.assertTrue(fake.sent.wait(2), "odczyt czekał na zapełnienie porcji")
+            self.assertLess(time.monotonic() - t0, 1.0)
+        finally:
+            client.close()
+        header, payload = fake.frames[0].split(b"\n", 1)
+        self.assertEqual(len(decode_frame(parse_header(header)[0], payload)), 1)
+
+    def test_encoding_error_does_not_stop_sender(self):
+        self.assertFalse(frameable(dict(readings(1)[0], timestamp="wczoraj")))
+        fake = _FakeClient()
+        client = BatchingClient(fake, max_delay=0.05)
+        client.connect()
+        try:
+            # Wartość skończona, ale po przeskalowaniu do liczby całkowitej przepełnia się przy kodowaniu
+            client.send(dict(readings(1)[0], value=1e308))
+            client.flush()
+            client.send(readings(1)[0])
+            client.flush()
+        finally:
+            client.close()
+        self.assertEqual(len(fake.frames), 1)
+
+
+class TestBatchingUplink(unittest.TestCase):
+    def setUp(self):
+        logging.getLogger("NetworkServer").setLevel(logging.CRITICAL)
+        logging.getLogger("NetworkClient").setLevel(logging.CRITICAL)
+        self.temp_dir = tempfile.mkdtemp()
+        config_path = os.path.join(self.temp_dir, "config.json")
+        with open(config_path, 'w') as f:
+            json.dump({"log_dir": self.temp_dir, "buffer_size": 10_000}, f)
+        self.logger = Logger(config_path)
+        self.sink = IngestSink(self.logger)
+        self.port = free_port()
+        self.server = NetworkServer("127.0.0.1", self.port, sink=self.sink)
+        threading.Thread(target=self.server.start, daemon=True).start()
+        time.sleep(0.1)
+
+    def tearDown(self):
+        self.server.stop()
+        self.sink.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_frames_and_plain_lines_are_ingested_in_order(self):
+        client = BatchingClient(NetworkClient("127.0.0.1", self.port), max_delay=0.05, max_messages=64)
+        client.connect()
+        packets = readings(300)
+        try:
+            for packet in packets[:150]:
+                self.assertTrue(client.send(packet))
+            # Pakiet spoza formatu ramki idzie zwykłą linią JSON po zebranych odczytach
+            self.assertTrue(client.send(dict(packets[150], extra=1)))
+            for packet in packets[151:]:
+                client.send(packet)
+            client.flush()
+        finally:
+            client.close()
+        entries = list(self.logger.read_logs(START, START + datetime.timedelta(hours=1)))
+        self.assertEqual([(e["sensor_id"], e["value"]) for e in entries],
+                         [(p["sensor_id"], p["value"]) for p in packets])
+
+
+if __name__ == '__main__':
+    unittest.main()
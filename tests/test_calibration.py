@@ -0,0 +1,59 @@
+import datetime
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from calibration import AffineCalibration, CalibrationTable, PiecewiseLinearCalibration, from_dict
+from tests.test_query import START, write_sample_logs
+
+
+class TestCalibration(unittest.TestCase):
+    def test_piecewise_interpolates_and_extrapolates(self):
+        curve = PiecewiseLinearCalibration([[10, 20], [0, 0], [20, 30]])
+        values = np.array([-5.0, 5.0, 15.0, 30.0])
+        np.testing.assert_allclose(curve.apply(values), [-10.0, 10.0, 25.0, 40.0])
+        self.assertEqual([curve.apply(v) for v in values.tolist()], [-10.0, 10.0, 25.0, 40.0])
+        with self.assertRaises(ValueError):
+            PiecewiseLinearCalibration([[1, 1], [1, 2]])
+
+    def test_table_applies_mixed_batch_without_mutating_input(self):
+        table = CalibrationTable({
+            "a": AffineCalibration(2.0, 1.0),
+            "p": {"type": "piecewise", "points": [[0, 0], [10, 100]]},
+        })
+        values = np.array([1.0, 1.0, 1.0, 5.0])
+        out = table.apply(["a", "x", "p", "p"], values)
+        np.testing.assert_allclose(out, [3.0, 1.0, 10.0, 50.0])
+        np.testing.assert_array_equal(values, [1.0, 1.0, 1.0, 5.0])
+        self.assertEqual(table.apply(["a", "x"], [1.0, None]), [3.0, None])
+        self.assertEqual(from_dict({"gain": 1.5}).to_dict(), {"type": "affine", "gain": 1.5, "offset": 0.0})
+
+
+class TestLoggerCalibration(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.logger = write_sample_logs(self.temp_dir)
+        self.end = START + datetime.timedelta(minutes=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_read_and_aggregate_are_calibrated_on_the_fly(self):
+        raw = [e["value"] for e in self.logger.read_logs(START, self.end, "temp_01")]
+        self.logger.calibration = CalibrationTable({"temp_01": AffineCalibration(1.0, 100.0)})
+        calibrated = [e["value"] for e in self.logger.read_logs(START, self.end, "temp_01")]
+        self.assertEqual(calibrated, [v + 100.0 for v in raw])
+        # Pamięć podręczna i pliki zawierają nadal surowe wartości
+        self.assertEqual([e["value"] for e in self.logger.read_logs(START, self.end, "temp_01", calibrated=False)],
+                         raw)
+
+        buckets = self.logger.aggregate_logs(START, self.end, bucket_seconds=600)
+        by_sensor = {b["sensor_id"]: b for b in buckets}
+        self.assertAlmostEqual(by_sensor["temp_01"]["mean"], sum(raw) / len(raw) + 100.0)
+        self.assertEqual(by_sensor["hum_01"]["max"], 58.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
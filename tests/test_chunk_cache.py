@@ -0,0 +1,80 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from Logger import LogChunk, Logger
+from chunk_cache import ChunkCache, compact_chunk
+
+START = datetime.datetime(2025, 1, 1)
+
+
+def make_chunk(rows: int) -> LogChunk:
+    return LogChunk(np.arange(rows, dtype=np.int64), ["temp_01"] * rows, np.zeros(rows), ["C"] * rows)
+
+
+class TestChunkCache(unittest.TestCase):
+    def test_lru_eviction_keeps_memory_bound(self):
+        _, size = compact_chunk(make_chunk(100))
+        cache = ChunkCache(size * 3)
+        file_key = ("a.csv.zip", 1, 1)
+        for block in range(3):
+            cache.put(file_key, block, make_chunk(100))
+        self.assertIsNotNone(cache.get(file_key, 0))  # Blok 0 staje się najświeższy
+        cache.put(file_key, 3, make_chunk(100))
+
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertIsNone(cache.get(file_key, 1))
+        self.assertIsNotNone(cache.get(file_key, 0))
+
+    def test_invalidate_removes_file_entries(self):
+        cache = ChunkCache(10 ** 6)
+        cache.put(("a.csv", 1, 10), 0, make_chunk(10))
+        cache.set_block_count(("a.csv", 1, 10), 1)
+        cache.put(("b.csv", 1, 10), 0, make_chunk(10))
+        cache.invalidate("a.csv")
+        self.assertIsNone(cache.block_count(("a.csv", 1, 10)))
+        self.assertEqual(len(cache), 1)
+
+
+class TestLoggerCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config_path = os.path.join(self.temp_dir, "config.json")
+        with open(config_path, 'w') as f:
+            json.dump({"log_dir": self.temp_dir, "buffer_size": 50, "rotate_after_lines": 101}, f)
+        self.logger = Logger(config_path)
+        for i in range(150):
+            self.logger.log_reading("temp_01", START + datetime.timedelta(seconds=i), float(i), "C")
+        self.logger.flush()
+        self.logger.wait_for_maintenance()
+
+    def tearDown(self):
+        self.logger.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_archived_chunks_served_from_memory(self):
+        end = START + datetime.timedelta(hours=1)
+        first = list(self.logger.read_logs(START, end))
+        self.assertEqual(len(first), 150)
+
+        read_files = []
+        original = self.logger._iter_row_blocks
+        self.logger._iter_row_blocks = lambda path: read_files.append(path) or original(path)
+        self.assertEqual(list(self.logger.read_logs(START, end)), first)
+        # Archiwum pochodzi z pamięci - czytany jest tylko aktywny plik, unieważniany przy zapisie
+        self.assertEqual(read_files, [])
+
+        for i in range(150, 160):
+            self.logger.log_reading("temp_01", START + datetime.timedelta(seconds=i), float(i), "C")
+        self.logger.flush()
+        self.assertEqual(len(list(self.logger.read_logs(START, end))), 160)
+        self.assertEqual(read_files, [self.logger.current_file_path])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import log_export
+from Logger import Logger
+
+START = datetime.datetime(2025, 1, 1)
+
+
+class TestLogExport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config_path = os.path.join(self.temp_dir, "config.json")
+        with open(config_path, 'w') as f:
+            json.dump({"log_dir": self.temp_dir, "buffer_size": 100, "rotate_after_lines": 301}, f)
+        self.logger = Logger(config_path)
+        for i in range(1000):
+            sensor_id = "temp_01" if i % 2 else "hum_01"
+            self.logger.log_reading(sensor_id, START + datetime.timedelta(seconds=i), i / 10,
+                                    "C" if i % 2 else "%")
+        self.logger.stop()
+        self.end = START + datetime.timedelta(seconds=799)
+
+    def tearDown(self):
+        self.logger.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def assert_matches_read_logs(self, columns, sensor_id=None):
+        expected = list(self.logger.read_logs(START, self.end, sensor_id))
+        self.assertEqual(len(columns["value"]), len(expected))
+        self.assertEqual(columns["timestamp"].tolist(), [e["timestamp"] for e in expected])
+        self.assertEqual(columns["sensor_id"].tolist(), [e["sensor_id"] for e in expected])
+        self.assertEqual(columns["unit"].tolist(), [e["unit"] for e in expected])
+        np.testing.assert_array_equal(columns["value"], [e["value"] for e in expected])
+
+    def test_export_columns_matches_read_logs(self):
+        # Mała pojemność początkowa wymusza kilkukrotne powiększenie buforów
+        columns = log_export.export_columns(self.logger, 0, 2 ** 62, initial_capacity=16)
+        self.assertEqual(len(columns["value"]), 1000)
+        self.assert_matches_read_logs(self.logger.export_columns(START, self.end))
+        self.assert_matches_read_logs(self.logger.export_columns(START, self.end, "temp_01"), "temp_01")
+        self.assertEqual(self.logger.export_columns(START, self.end, "missing")["value"].dtype, np.float64)
+
+    def test_export_npz_round_trip(self):
+        path = os.path.join(self.temp_dir, "export.npz")
+        rows = self.logger.export_npz(path, START, self.end, compress=True)
+        self.assertEqual(rows, 800)
+        self.assert_matches_read_logs(log_export.load_npz(path))
+        with np.load(path) as data:
+            self.assertEqual(data["sensor_code"].dtype, np.int32)
+            self.assertEqual(sorted(data["sensor_ids"].tolist()), ["hum_01", "temp_01"])
+        self.assertEqual([n for n in os.listdir(self.temp_dir) if n.startswith(".export-")], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
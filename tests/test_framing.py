@@ -0,0 +1,59 @@
+import json
+import socket
+import unittest
+
+from network.framing import BadLine, LineFramer, parse_json_lines
+
+
+class TestLineFramer(unittest.TestCase):
+    def setUp(self):
+        self.sender, self.receiver = socket.socketpair()
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def test_lines_split_across_reads_and_buffer_growth(self):
+        framer = LineFramer(self.receiver, capacity=16)
+        long_line = b"x" * 100
+        self.sender.sendall(b"ab")
+        framer.fill()
+        self.assertIsNone(framer.next_line())
+        self.sender.sendall(b"c\n" + long_line + b"\nrest")
+        received = []
+        while len(received) < 2:
+            framer.fill()
+            line = framer.next_line()
+            while line is not None:
+                received.append(line.tobytes())
+                line = framer.next_line()
+        self.assertEqual(received, [b"abc", long_line])
+        self.assertEqual(framer.read_exact(2).tobytes(), b"re")
+        self.assertIsNone(framer.read_exact(3))
+        self.sender.close()
+        self.assertEqual(framer.fill(), 0)
+        self.assertEqual(framer.remainder().tobytes(), b"st")
+
+    def test_message_limit(self):
+        framer = LineFramer(self.receiver, capacity=8, max_capacity=16)
+        self.sender.sendall(b"y" * 40)
+        with self.assertRaises(ValueError):
+            for _ in range(5):
+                framer.fill()
+
+
+class TestParseJsonLines(unittest.TestCase):
+    def test_matches_per_line_json_loads(self):
+        lines = [b'{"a": 1}', b'  [1, 2] \r', b'{"a":', b'1}', b'', b'"za\xc5\xbc\xc3\xb3\xc5\x82\xc4\x87"', b'1 2']
+        results = parse_json_lines([memoryview(line) for line in lines])
+        for line, result in zip(lines, results):
+            try:
+                expected = json.loads(line)
+            except ValueError:
+                self.assertIsInstance(result, BadLine)
+            else:
+                self.assertEqual(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from Logger import Logger
+from tools import generate
+
+DAY = datetime.datetime(2025, 1, 1)
+
+
+class TestGenerate(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def run_generator(self, name: str, seed: int) -> Logger:
+        log_dir = os.path.join(self.temp_dir, name)
+        config_path = os.path.join(self.temp_dir, f"{name}.json")
+        with open(config_path, 'w') as f:
+            json.dump({"log_dir": log_dir, "filename_pattern": "sensors_%Y%m%d.csv"}, f)
+        generate.main(["--config", config_path, "--start", DAY.date().isoformat(), "--days", "1",
+                       "--sensors", "4", "--shard-sensors", "2", "--workers", "2", "--seed", str(seed)])
+        return Logger(config_path)
+
+    @staticmethod
+    def archive_digests(logger: Logger) -> dict:
+        digests = {}
+        for name in sorted(os.listdir(logger.archive_dir)):
+            with open(os.path.join(logger.archive_dir, name), 'rb') as f:
+                digests[name] = hashlib.sha256(f.read()).hexdigest()
+        return digests
+
+    def test_sharded_output_is_readable_and_deterministic(self):
+        logger = self.run_generator("a", seed=3)
+        self.assertEqual(sorted(os.listdir(logger.archive_dir)),
+                         ["sensors_20250101_g0000.csv.zip", "sensors_20250101_g0001.csv.zip"])
+        rows = list(logger.read_logs(DAY, DAY + datetime.timedelta(days=1)))
+        # Odczyty co `frequency` sekund przez dobę: temp 5 s, hum 7 s, press 10 s, light 6 s
+        self.assertEqual(len(rows), 17280 + 12343 + 8640 + 14400)
+        times = [row["timestamp"] for row in rows]
+        self.assertEqual((min(times), max(times)), (DAY, DAY + datetime.timedelta(seconds=86395)))
+        self.assertEqual(len({row["sensor_id"] for row in rows}), 4)
+
+        self.assertEqual(self.archive_digests(self.run_generator("b", seed=3)), self.archive_digests(logger))
+        self.assertNotEqual(self.archive_digests(self.run_generator("c", seed=4)), self.archive_digests(logger))
+
+
+if __name__ == "__main__":
+    unittest.main()
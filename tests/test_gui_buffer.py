@@ -0,0 +1,85 @@
+import datetime
+import json
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+
+from Logger import Logger
+from gui.backend import SensorBuffer, LogBackfiller
+
+
+class TestSensorBuffer(unittest.TestCase):
+    def test_avg_uses_aggregates_beyond_raw_history(self):
+        buf = SensorBuffer()
+        now = datetime.datetime.now()
+        # Więcej odczytów niż mieści deque z surowymi danymi
+        for i in range(3000):
+            buf.add("s1", 1.0 if i < 1500 else 3.0, "C", now - datetime.timedelta(seconds=3000 - i))
+        self.assertAlmostEqual(buf.get_avg("s1", 12), 2.0)
+
+    def test_historical_data_does_not_replace_last_value(self):
+        buf = SensorBuffer()
+        now = datetime.datetime.now()
+        buf.add("s1", 10.0, "C", now)
+        buf.add_many([("s1", 5.0, "C", now - datetime.timedelta(hours=2))])
+        self.assertEqual(buf.get_last("s1"), (10.0, "C", now))
+        self.assertAlmostEqual(buf.get_avg("s1", 12), 7.5)
+        self.assertAlmostEqual(buf.get_avg("s1", 1), 10.0)
+
+
+class TestLogBackfiller(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.temp_dir, "config.json")
+        with open(self.config_path, 'w') as f:
+            json.dump({"log_dir": self.temp_dir, "buffer_size": 5}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_backfill_populates_buffer(self):
+        logger = Logger(self.config_path)
+        logger.start()
+        now = datetime.datetime.now()
+        for i in range(10):
+            logger.log_reading("temp_01", now - datetime.timedelta(minutes=i), 20.0 + i, "°C")
+        logger.stop()
+
+        buf = SensorBuffer()
+        status = queue.Queue()
+        LogBackfiller(self.config_path, buf, status, hours=1, batch_size=3).run()
+
+        self.assertAlmostEqual(buf.get_avg("temp_01", 1), 24.5)
+        self.assertEqual(buf.get_last("temp_01")[0], 20.0)
+        level, _ = list(status.queue)[-1]
+        self.assertEqual(level, "info")
+
+    def test_relative_log_dir_follows_config_file_not_cwd(self):
+        # Jak config.json projektu: log_dir "./logs", a GUI uruchomione z innego katalogu
+        with open(self.config_path, 'w') as f:
+            json.dump({"log_dir": "./logs", "buffer_size": 5}, f)
+        cwd = os.getcwd()
+        other_dir = os.path.join(self.temp_dir, "gui")
+        os.makedirs(other_dir)
+        try:
+            os.chdir(other_dir)
+            logger = Logger(self.config_path)
+            logger.start()
+            now = datetime.datetime.now()
+            for i in range(10):
+                logger.log_reading("temp_01", now - datetime.timedelta(minutes=i), 20.0 + i, "°C")
+            logger.stop()
+            buf = SensorBuffer()
+            LogBackfiller(os.path.relpath(self.config_path), buf, queue.Queue(), hours=1).run()
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(logger.log_dir, os.path.join(self.temp_dir, "logs"))
+        self.assertFalse(os.path.exists(os.path.join(other_dir, "logs")))
+        self.assertAlmostEqual(buf.get_avg("temp_01", 1), 24.5)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
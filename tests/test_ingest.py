@@ -0,0 +1,81 @@
+import datetime
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from Logger import Logger
+from server.ingest import IngestSink, validate_reading
+from server.server import NetworkServer
+
+
+class TestValidateReading(unittest.TestCase):
+    def test_valid_reading(self):
+        sensor_id, ts, value, unit = validate_reading(
+            {"sensor_id": "temp_01", "timestamp": "2025-01-01T12:00:00", "value": 21, "unit": "C"})
+        self.assertEqual(sensor_id, "temp_01")
+        self.assertEqual(ts, datetime.datetime(2025, 1, 1, 12))
+        self.assertEqual(value, 21.0)
+        self.assertEqual(unit, "C")
+
+    def test_invalid_readings(self):
+        for payload in ([1, 2], {"value": 1.0}, {"sensor_id": "s", "value": "x"},
+                        {"sensor_id": "s", "value": float("nan")},
+                        {"sensor_id": "s", "value": 1.0, "timestamp": "wczoraj"}):
+            with self.assertRaises(ValueError):
+                validate_reading(payload)
+
+
+class TestIngestServer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config_path = os.path.join(self.temp_dir, "config.json")
+        with open(config_path, 'w') as f:
+            json.dump({"log_dir": self.temp_dir, "buffer_size": 10_000}, f)
+        self.logger = Logger(config_path)
+        self.sink = IngestSink(self.logger)
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.server = NetworkServer("127.0.0.1", self.port, sink=self.sink)
+        threading.Thread(target=self.server.start, daemon=True).start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.sink.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _connect(self) -> socket.socket:
+        for _ in range(50):
+            try:
+                return socket.create_connection(("127.0.0.1", self.port), timeout=5)
+            except ConnectionRefusedError:
+                time.sleep(0.05)
+        self.fail("Serwer nie wystartował")
+
+    def test_pipelined_messages_are_committed_before_ack(self):
+        start = datetime.datetime(2025, 1, 1)
+        lines = [json.dumps({"sensor_id": "temp_01", "timestamp": (start + datetime.timedelta(seconds=i)).isoformat(),
+                             "value": float(i), "unit": "C"}) for i in range(100)]
+        lines.insert(50, json.dumps({"sensor_id": "temp_01", "value": "zła"}))
+        with self._connect() as conn:
+            conn.sendall(("\n".join(lines) + "\n").encode('utf-8'))
+            received = b""
+            while received.count(b"\n") < len(lines):
+                received += conn.recv(4096)
+            responses = received.decode('utf-8').splitlines()
+
+            # Odpowiedzi w kolejności wiadomości; dane z ACK są już w pliku (buffer_size go nie wymusił)
+            self.assertEqual(len(responses), 101)
+            self.assertTrue(responses[50].startswith("NACK"))
+            self.assertEqual(responses.count("ACK"), 100)
+            entries = list(self.logger.read_logs(start, start + datetime.timedelta(hours=1)))
+            self.assertEqual([e["value"] for e in entries], [float(i) for i in range(100)])
+
+
+if __name__ == '__main__':
+    unittest.main()
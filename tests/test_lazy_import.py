@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import lazy_import
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("numpy", "yaml", "tkinter", "http.server")
+
+
+def _loaded_after_import(module: str):
+    """Ciężkie moduły obecne w sys.modules po samym imporcie `module` w nowym interpreterze."""
+    code = (f"import sys; import {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True, capture_output=True,
+                         text=True, env=dict(os.environ, PYTHONPATH=PROJECT_ROOT))
+    return [name for name in out.stdout.strip().split(",") if name]
+
+
+class TestLazyModule(unittest.TestCase):
+    def test_imports_on_first_attribute_access(self):
+        module = lazy_import.lazy("colorsys")
+        self.assertFalse(lazy_import.is_loaded(module))
+        self.assertEqual(module.rgb_to_hsv(1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+        self.assertTrue(lazy_import.is_loaded(module))
+        # Po imporcie atrybuty są w słowniku obiektu - bez ponownego __getattr__
+        self.assertIn("rgb_to_hsv", vars(module))
+
+    def test_optional_missing_module_is_none(self):
+        self.assertIsNone(lazy_import.optional("module_that_does_not_exist_xyz"))
+        self.assertIsNotNone(lazy_import.optional("colorsys"))
+
+    def test_missing_required_module_fails_on_use(self):
+        module = lazy_import.lazy("module_that_does_not_exist_xyz")
+        with self.assertRaises(ImportError):
+            module.anything
+
+
+class TestEntryPointImports(unittest.TestCase):
+    def test_entry_points_do_not_import_heavy_dependencies(self):
+        for module in ("main_app", "server.server", "tools.replay", "tools.export", "gui.backend"):
+            with self.subTest(module=module):
+                self.assertEqual(_loaded_after_import(module), [])
+
+    def test_import_does_not_configure_logging(self):
+        code = "import logging, network.client, server.server; print(len(logging.getLogger().handlers))"
+        out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True, capture_output=True,
+                             text=True, env=dict(os.environ, PYTHONPATH=PROJECT_ROOT))
+        self.assertEqual(out.stdout.strip(), "0")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from Logger import Logger
+from log_maintenance import ArchiveManifest
+
+START = datetime.datetime(2025, 1, 1)
+
+
+class TestArchiveMaintenance(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.temp_dir, "config.json")
+        with open(self.config_path, 'w') as f:
+            json.dump({"log_dir": self.temp_dir, "buffer_size": 10, "rotate_after_lines": 51,
+                       "retention_days": 1}, f)
+        self.logger = Logger(self.config_path)
+
+    def tearDown(self):
+        self.logger.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def log(self, count: int, first: int = 0, sensor_id: str = "temp_01") -> None:
+        for i in range(first, first + count):
+            self.logger.log_reading(sensor_id, START + datetime.timedelta(seconds=i), float(i), "C")
+
+    def test_rotation_defers_compression_to_worker(self):
+        release = threading.Event()
+        self.logger.start()
+        self.logger._maintenance.submit(release.wait)  # Wątek utrzymania zajęty
+        try:
+            t0 = time.perf_counter()
+            self.log(120)
+            self.assertLess(time.perf_counter() - t0, 1.0)
+
+            # Zamknięte pliki czekają w pending/ i nadal są widoczne dla odczytu
+            self.assertEqual(len(os.listdir(self.logger.pending_dir)), 2)
+            self.assertEqual(len(list(self.logger.read_logs(START, START + datetime.timedelta(hours=1)))), 120)
+        finally:
+            release.set()
+        self.logger.wait_for_maintenance()
+        self.assertEqual(os.listdir(self.logger.pending_dir), [])
+        self.assertEqual(len(list(self.logger.read_logs(START, START + datetime.timedelta(hours=1)))), 120)
+
+    def test_same_day_rotations_get_unique_archives(self):
+        self.log(160)
+        self.logger.stop()
+        archives = sorted(n for n in os.listdir(self.logger.archive_dir) if n.endswith(".zip"))
+        self.assertEqual(len(archives), 3)
+        self.assertEqual(len(set(archives)), 3)
+        self.assertEqual(len(self.logger.manifest), 3)
+        self.assertEqual(len(list(self.logger.read_logs(START, START + datetime.timedelta(hours=1)))), 160)
+
+    def test_manifest_rollup_skips_unrelated_archives(self):
+        self.log(60)
+        self.logger.stop()
+        name = next(n for n in os.listdir(self.logger.archive_dir) if n.endswith(".zip"))
+        rollup = self.logger.manifest.get(name)
+        self.assertEqual(rollup["rows"], 50)
+        self.assertEqual(rollup["sensors"]["temp_01"][0], 50)
+        self.assertEqual(rollup["sensors"]["temp_01"][3], 49.0)
+
+        # Świeży Logger zna zakres archiwum z manifestu - bez otwierania pliku
+        reader = Logger(self.config_path)
+        read_files = []
+        original = reader._iter_row_blocks
+        reader._iter_row_blocks = lambda path: read_files.append(path) or original(path)
+        end = START + datetime.timedelta(hours=1)
+        self.assertEqual(list(reader.read_logs(START, end, sensor_id="hum_01")), [])
+        self.assertEqual(list(reader.read_logs(START + datetime.timedelta(days=1), end + datetime.timedelta(days=1))),
+                         [])
+        self.assertFalse(any(path.endswith(".zip") for path in read_files))
+
+    def test_retention_uses_manifest_without_listing(self):
+        self.log(60)
+        self.logger.stop()
+        manifest = ArchiveManifest(self.logger.archive_dir)
+        manifest.refresh()
+        (entry,) = [manifest.get(n) for n in os.listdir(self.logger.archive_dir) if n.endswith(".zip")]
+        manifest.add(dict(entry, archived_at=time.time() - 3 * 86400))
+
+        with mock.patch("os.listdir", side_effect=AssertionError("listdir podczas retencji")):
+            self.logger._expire_archives()
+        self.assertEqual(len(self.logger.manifest), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.logger.archive_dir, entry["name"])))
+
+    def test_pending_file_archived_after_restart(self):
+        with open(os.path.join(self.logger.pending_dir, "sensors_20250101.csv"), 'w', encoding='utf-8') as f:
+            f.write("timestamp,sensor_id,value,unit\n2025-01-01T00:00:00,temp_01,1.0,C\n")
+        self.logger.start()
+        self.logger.wait_for_maintenance()
+        self.assertEqual(os.listdir(self.logger.pending_dir), [])
+        self.assertIn("sensors_20250101.csv.zip", self.logger.manifest)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import unittest
+import urllib.request
+
+from metrics import MetricsRegistry, start_from_config, start_http_server
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_and_histogram_snapshot(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("messages_total")
+        counter.inc()
+        counter.inc(4)
+        hist = registry.histogram("latency_seconds", buckets=(0.001, 0.01, 0.1))
+        for value in (0.0005, 0.005, 0.005, 0.05):
+            hist.observe(value)
+
+        snap = registry.snapshot()
+        self.assertEqual(snap["messages_total"]["value"], 5)
+        self.assertEqual(snap["latency_seconds"]["count"], 4)
+        self.assertEqual(snap["latency_seconds"]["p50"], 0.01)
+        self.assertIs(registry.counter("messages_total"), counter)
+
+    def test_http_endpoint(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Liczba zapytań").inc(3)
+        registry.histogram("flush_seconds", buckets=(0.1,)).observe(0.05)
+        httpd = start_http_server(0, registry=registry)
+        try:
+            port = httpd.server_address[1]
+            text = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+            self.assertIn("requests_total 3", text)
+            self.assertIn('flush_seconds_bucket{le="0.1"} 1', text)
+            data = json.loads(urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics.json").read())
+            self.assertEqual(data["flush_seconds"]["count"], 1)
+        finally:
+            httpd.shutdown()
+
+    def test_busy_port_logs_warning(self):
+        registry = MetricsRegistry()
+        httpd = start_http_server(0, registry=registry)
+        try:
+            port = httpd.server_address[1]
+            with self.assertLogs("Metrics", level="WARNING"):
+                start_from_config({"http_port": None, "server_http_port": port}, registry,
+                                  port_key="server_http_port")
+        finally:
+            httpd.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
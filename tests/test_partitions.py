@@ -0,0 +1,85 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from Logger import Logger
+
+START = datetime.datetime(2025, 1, 1)
+SENSORS = ["temp_01", "temp_02", "hum_01", "press.01"]
+
+
+class FixedClock:
+    def __init__(self, now: datetime.datetime):
+        self.current = now
+
+    def now(self) -> datetime.datetime:
+        return self.current
+
+
+class TestPartitionedLogger(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def make_logger(self, **config) -> Logger:
+        config_path = os.path.join(self.temp_dir, "config.json")
+        with open(config_path, 'w') as f:
+            json.dump(dict({"log_dir": self.temp_dir, "buffer_size": 25}, **config), f)
+        return Logger(config_path, clock=FixedClock(START + datetime.timedelta(days=2)))
+
+    def write_two_days(self, logger: Logger) -> None:
+        # Co 10 minut przez dwa dni, czujniki z przesunięciem - wiersze przeplatane
+        for step in range(288):
+            for i, sensor_id in enumerate(SENSORS):
+                logger.log_reading(sensor_id, START + datetime.timedelta(minutes=10 * step, seconds=i),
+                                   float(step), "C")
+        logger.stop()
+
+    def test_sensor_layout_reads_only_own_partitions(self):
+        logger = self.make_logger(partition_by="sensor")
+        self.write_two_days(logger)
+        root = os.path.join(self.temp_dir, "partitions")
+        self.assertEqual(sorted(os.listdir(root)), sorted(["temp_01", "temp_02", "hum_01", "press%2E01"]))
+        self.assertEqual(sorted(os.listdir(os.path.join(root, "hum_01"))), ["20250101T00.csv", "20250102T00.csv"])
+
+        read_files = []
+        original = logger._iter_row_blocks
+        logger._iter_row_blocks = lambda path: read_files.append(path) or original(path)
+        rows = list(logger.read_logs(START, START + datetime.timedelta(hours=12), sensor_id="press.01"))
+        self.assertEqual(len(rows), 72)
+        self.assertEqual({r["sensor_id"] for r in rows}, {"press.01"})
+        self.assertEqual(read_files, [os.path.join(root, "press%2E01", "20250101T00.csv")])
+
+    def test_all_sensor_query_merges_partitions_in_time_order(self):
+        logger = self.make_logger(partition_by="sensor")
+        self.write_two_days(logger)
+        rows = list(logger.read_logs(START, START + datetime.timedelta(days=3)))
+        self.assertEqual(len(rows), 288 * len(SENSORS))
+        timestamps = [r["timestamp"] for r in rows]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+        stats = logger.aggregate_logs(START, START + datetime.timedelta(days=3), sensor_id="temp_02",
+                                      bucket_seconds=86400)
+        self.assertEqual([s["count"] for s in stats], [144, 144])
+
+    def test_group_layout_limits_directories(self):
+        logger = self.make_logger(partition_by="group", partition_groups=2, partition_hours=6)
+        self.write_two_days(logger)
+        groups = os.listdir(os.path.join(self.temp_dir, "partitions"))
+        self.assertLessEqual(len(groups), 2)
+        self.assertEqual(len(list(logger.read_logs(START, START + datetime.timedelta(days=3), "temp_01"))), 288)
+
+    def test_retention_removes_expired_buckets(self):
+        logger = self.make_logger(partition_by="sensor", retention_days=1)
+        self.write_two_days(logger)
+        logger._expire_partitions()
+        self.assertEqual(os.listdir(os.path.join(self.temp_dir, "partitions", "temp_01")), ["20250102T00.csv"])
+
+
+if __name__ == '__main__':
+    unittest.main()
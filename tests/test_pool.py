@@ -0,0 +1,54 @@
+import logging
+import socket
+import threading
+import time
+import unittest
+
+from network.pool import ClientPool, parse_endpoints
+from server.server import NetworkServer
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestClientPool(unittest.TestCase):
+    def setUp(self):
+        logging.getLogger("NetworkClient").setLevel(logging.CRITICAL)
+        logging.getLogger("NetworkServer").setLevel(logging.CRITICAL)
+        self.port = free_port()
+        self.server = NetworkServer("127.0.0.1", self.port)
+        threading.Thread(target=self.server.start, daemon=True).start()
+        time.sleep(0.1)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_parse_endpoints(self):
+        self.assertEqual(parse_endpoints({"host": "a", "port": 1, "endpoints": ["b:2", {"host": "c", "port": 3}]}),
+                         [("b", 2), ("c", 3)])
+        self.assertEqual(parse_endpoints({"host": "a", "port": 1, "endpoints": []}), [("a", 1)])
+
+    def test_failover_and_concurrent_sends(self):
+        pool = ClientPool([("127.0.0.1", free_port()), ("127.0.0.1", self.port)], size=3, health_interval=0.05)
+        pool.connect()
+        try:
+            self.assertEqual(pool.active_connections(), 3)
+            futures = [pool.submit({"sensor_id": f"s{i}", "value": i}) for i in range(60)]
+            self.assertTrue(all(f.result(timeout=5) for f in futures))
+
+            # Połączenie zamknięte po stronie serwera wykrywa kontrola stanu i otwiera je ponownie
+            with pool._connections[0].lock:
+                pool._connections[0].client._socket.shutdown(socket.SHUT_RDWR)
+            time.sleep(0.3)
+            self.assertEqual(pool.active_connections(), 3)
+            self.assertTrue(pool.send({"sensor_id": "s", "value": 1}))
+        finally:
+            pool.close()
+        self.assertEqual(pool.active_connections(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import profiler
+
+
+def _busy_parser(stop: threading.Event) -> None:
+    text = json.dumps([{"sensor_id": f"temp_{i}", "value": i / 3} for i in range(200)])
+    while not stop.is_set():
+        json.loads(text)
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_samples_all_threads_and_attributes_stages(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy_parser, args=(stop,), name="parser-7")
+        worker.start()
+        sampler = profiler.SamplingProfiler(interval=0.002)
+        try:
+            for _ in range(50):
+                time.sleep(0.002)  # Wątek roboczy musi dostać GIL między próbkami
+                sampler.sample()
+        finally:
+            stop.set()
+            worker.join()
+
+        self.assertEqual(sampler.samples, 50)
+        parser_stacks = {stack: n for stack, n in sampler.stacks.items() if stack.startswith("parser-N;")}
+        self.assertTrue(parser_stacks)
+        self.assertTrue(any("_busy_parser" in stack for stack in parser_stacks))
+        self.assertGreater(sampler.stage_samples["parser-N", "parsowanie JSON"], 10)
+
+        prefix = os.path.join(self.temp_dir, "profile")
+        sampler.write(prefix)
+        with open(prefix + ".folded", encoding='utf-8') as f:
+            for line in f:
+                stack, count = line.rsplit(" ", 1)
+                self.assertGreater(int(count), 0)
+                self.assertIn(";", stack)
+        with open(prefix + ".summary.txt", encoding='utf-8') as f:
+            self.assertIn("parsowanie JSON", f.read())
+
+    def test_background_thread_and_arguments(self):
+        parser = argparse.ArgumentParser()
+        profiler.add_arguments(parser)
+        self.assertIsNone(profiler.start_from_args(parser.parse_args([])))
+        args = parser.parse_args(["--profile", "--profile-interval", "0.001"])
+        self.assertEqual(args.profile, "profile")
+
+        sampler = profiler.SamplingProfiler(interval=0.001)
+        sampler.start()
+        threading.Event().wait(0.05)
+        sampler.stop()
+        self.assertGreater(sampler.samples, 0)
+        # Wątek profilera nie próbkuje samego siebie
+        self.assertFalse(any(stack.startswith("profiler;") for stack in sampler.stacks))
+
+
+if __name__ == '__main__':
+    unittest.main()
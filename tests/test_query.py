@@ -0,0 +1,125 @@
+import datetime
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from Logger import Logger
+from network.client import NetworkClient
+from server.server import NetworkServer
+
+START = datetime.datetime(2025, 1, 1)
+
+
+def write_sample_logs(temp_dir: str) -> Logger:
+    """10 minut odczytów co sekundę, na przemian hum_01 i temp_01."""
+    config_path = os.path.join(temp_dir, "config.json")
+    with open(config_path, 'w') as f:
+        json.dump({"log_dir": temp_dir, "buffer_size": 100}, f)
+    logger = Logger(config_path)
+    for i in range(600):
+        sensor_id = "temp_01" if i % 2 else "hum_01"
+        logger.log_reading(sensor_id, START + datetime.timedelta(seconds=i), float(i % 60), "C")
+    logger.stop()
+    return logger
+
+
+class TestLoggerQueries(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.logger = write_sample_logs(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_aggregate_logs(self):
+        buckets = self.logger.aggregate_logs(START, START + datetime.timedelta(hours=1), "temp_01", 120)
+        self.assertEqual(len(buckets), 5)
+        first = buckets[0]
+        self.assertEqual(first["start"], START)
+        self.assertEqual(first["count"], 60)
+        self.assertEqual((first["min"], first["max"]), (1.0, 59.0))
+        self.assertAlmostEqual(first["mean"], 30.0)
+
+        everything = self.logger.aggregate_logs(START, START + datetime.timedelta(hours=1), bucket_seconds=3600)
+        self.assertEqual({b["sensor_id"]: b["count"] for b in everything}, {"hum_01": 300, "temp_01": 300})
+
+    def test_file_index_skips_files_outside_range(self):
+        all_rows = list(self.logger.read_logs(START, START + datetime.timedelta(hours=1)))
+        self.assertEqual(len(all_rows), 600)
+        self.assertEqual(len(self.logger._file_ranges), 1)
+
+        later = START + datetime.timedelta(days=1)
+        self.logger._iter_row_blocks = None  # Odczyt pliku spoza zakresu zakończyłby się błędem
+        self.assertEqual(list(self.logger.read_logs(later, later + datetime.timedelta(hours=1))), [])
+
+
+class TestQueryOverNetwork(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.logger = write_sample_logs(self.temp_dir)
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+        self.server = NetworkServer("127.0.0.1", self.port, query_logger=self.logger)
+        threading.Thread(target=self.server.start, daemon=True).start()
+        self.client = NetworkClient("127.0.0.1", self.port, timeout=5.0, retries=1)
+        logging.getLogger("NetworkClient").setLevel(logging.CRITICAL)
+        for _ in range(50):
+            try:
+                self.client.connect()
+                break
+            except ConnectionRefusedError:
+                time.sleep(0.05)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def test_streamed_query_matches_read_logs(self):
+        end = START + datetime.timedelta(hours=1)
+        remote = list(self.client.query(START, end, "temp_01", batch_size=7, window=2))
+        self.assertEqual(remote, list(self.logger.read_logs(START, end, "temp_01")))
+
+        aggregated = list(self.client.query(START, end, bucket_seconds=300))
+        self.assertEqual([(b["sensor_id"], b["count"]) for b in aggregated], [("hum_01", 150), ("temp_01", 150)] * 2)
+
+    def test_cancelled_query_leaves_connection_usable(self):
+        rows = self.client.query(START, START + datetime.timedelta(hours=1), batch_size=10, window=2)
+        self.assertEqual(len([row for row, _ in zip(rows, range(25))]), 25)
+        rows.close()
+        self.assertTrue(self.client.send({"sensor_id": "temp_01", "value": 1.0, "unit": "C"}))
+
+    def test_data_after_credits_and_late_cancel_are_handled(self):
+        request = {"command": "query", "start": START.isoformat(),
+                   "end": (START + datetime.timedelta(hours=1)).isoformat(),
+                   "sensor_id": "temp_01", "batch_size": 100, "window": 1}
+        reading = b'{"sensor_id": "temp_01", "value": 1.0, "unit": "C"}\n'
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+            reader = sock.makefile('rb')
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            batches = 0
+            while True:
+                message = json.loads(reader.readline())
+                if message["type"] == "batch":
+                    batches += 1
+                    # Ostatnie potwierdzenie w jednym pakiecie z kolejną wiadomością
+                    sock.sendall(b"ACK\n" + (reading if batches == 3 else b""))
+                elif message["type"] == "end":
+                    break
+            self.assertEqual((batches, message["rows"]), (3, 300))
+            self.assertEqual(reader.readline(), b"ACK\n")
+            # Anulowanie spóźnione względem "end" nie jest błędem ani odpowiedzią
+            with self.assertNoLogs("NetworkServer", level="ERROR"):
+                sock.sendall(b"CANCEL\n" + reading)
+                self.assertEqual(reader.readline(), b"ACK\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import datetime
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from Logger import Logger
+from server.ingest import IngestSink
+from server.server import NetworkServer
+from tests.test_pool import free_port
+from tools import replay
+
+START = datetime.datetime(2025, 1, 1)
+
+
+def entries(count: int) -> list:
+    return [{"sensor_id": f"temp_{i % 4:02d}", "timestamp": START + datetime.timedelta(seconds=i),
+             "value": float(i), "unit": "C"} for i in range(count)]
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        logging.getLogger("NetworkServer").setLevel(logging.CRITICAL)
+        logging.getLogger("NetworkClient").setLevel(logging.CRITICAL)
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_config(self, name: str) -> str:
+        log_dir = os.path.join(self.temp_dir, name)
+        config_path = os.path.join(self.temp_dir, f"{name}.json")
+        with open(config_path, 'w') as f:
+            json.dump({"log_dir": log_dir, "buffer_size": 100}, f)
+        return config_path
+
+    def test_replays_all_readings_to_server(self):
+        logger = Logger(self.write_config("received"))
+        sink = IngestSink(logger)
+        port = free_port()
+        server = NetworkServer("127.0.0.1", port, sink=sink)
+        threading.Thread(target=server.start, daemon=True).start()
+        time.sleep(0.1)
+        try:
+            streamer = replay.ReplayStreamer("127.0.0.1", port, speed=None, connections=3, queue_size=16)
+            stats = streamer.run(entries(400))
+        finally:
+            server.stop()
+            sink.close()
+        self.assertEqual((stats.sent, stats.failed), (400, 0))
+        rows = list(logger.read_logs(START, START + datetime.timedelta(hours=1)))
+        self.assertEqual(len(rows), 400)
+        # Kolejność w obrębie czujnika zachowana mimo kilku połączeń
+        per_sensor = [r["value"] for r in rows if r["sensor_id"] == "temp_01"]
+        self.assertEqual(per_sensor, sorted(per_sensor))
+
+    def test_unreachable_server_fails_fast(self):
+        port = free_port()
+        streamer = replay.ReplayStreamer("127.0.0.1", port, speed=None, connections=2, retries=1, queue_size=4)
+        done = threading.Event()
+        errors = []
+
+        def run():
+            try:
+                streamer.run(entries(100))
+            except ConnectionRefusedError as e:
+                errors.append(e)
+            done.set()
+
+        threading.Thread(target=run, daemon=True).start()
+        self.assertTrue(done.wait(10), "run() zablokowało się na pełnej kolejce")
+        self.assertEqual(len(errors), 1)
+
+        source = self.write_config("source")
+        writer = Logger(source)
+        writer.start()
+        for entry in entries(10):
+            writer.log_reading(entry["sensor_id"], entry["timestamp"], entry["value"], entry["unit"])
+        writer.stop()
+        exit_code = replay.main(["--config", source, "--start", START.isoformat(),
+                                 "--end", (START + datetime.timedelta(hours=1)).isoformat(),
+                                 "--port", str(port), "--speed", "max"])
+        self.assertEqual(exit_code, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
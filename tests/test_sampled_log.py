@@ -0,0 +1,57 @@
+import logging
+import unittest
+
+from sampled_log import SampledLog, LogSettings
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestSampledLog(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("test_sampled_log")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handler = _ListHandler()
+        self.logger.addHandler(self.handler)
+        self.settings = LogSettings()
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_verbose_logs_every_event(self):
+        log = SampledLog(self.logger, settings=self.settings)
+        for i in range(5):
+            log.event("pakiet", "Wysłano pakiet %d", i)
+        self.assertEqual(self.handler.messages, [f"Wysłano pakiet {i}" for i in range(5)])
+
+    def test_sampled_logs_every_nth_event(self):
+        self.settings.mode = "sampled"
+        self.settings.sample_every = 10
+        self.settings.summary_interval = 3600
+        log = SampledLog(self.logger, settings=self.settings)
+        for i in range(25):
+            log.event("pakiet", "Wysłano pakiet %d", i)
+        self.assertEqual(len(self.handler.messages), 3)
+        self.assertTrue(self.handler.messages[1].startswith("Wysłano pakiet 10"))
+        self.assertEqual(log.counts["pakiet"], 25)
+
+    def test_summary_mode_only_summarizes(self):
+        self.settings.mode = "summary"
+        log = SampledLog(self.logger, settings=self.settings)
+        for i in range(100):
+            log.event("ack", "ACK %d", i)
+        self.assertEqual(self.handler.messages, [])
+        log.flush_summary()
+        self.assertEqual(len(self.handler.messages), 1)
+        self.assertIn("ack=100", self.handler.messages[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
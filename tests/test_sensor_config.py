@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import sensor_config
+from sensor import TemperatureSensor, default_sensors
+
+
+class TestSensorConfig(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.fleet = default_sensors()
+        self.fleet[0].calibration = {"gain": 1.02, "offset": -0.5}
+        self.fleet[1].frequency = 2.5
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _round_trip(self, filename: str):
+        path = os.path.join(self.temp_dir, filename)
+        sensor_config.save(sensor_config.SensorTable.from_sensors(self.fleet), path)
+        return sensor_config.load_sensors(path)
+
+    def test_json_and_binary_round_trip(self):
+        for filename in ("fleet.jsonl", "fleet.bin"):
+            loaded = self._round_trip(filename)
+            self.assertEqual([type(s) for s in loaded], [type(s) for s in self.fleet])
+            for original, copy in zip(self.fleet, loaded):
+                self.assertEqual(
+                    (copy.sensor_id, copy.name, copy.unit, copy.min_value, copy.max_value, copy.frequency,
+                     copy.calibration),
+                    (original.sensor_id, original.name, original.unit, original.min_value, original.max_value,
+                     original.frequency, original.calibration))
+
+    def test_table_lookup_without_instantiating(self):
+        path = os.path.join(self.temp_dir, "fleet.bin")
+        sensor_config.save(sensor_config.SensorTable.from_sensors(self.fleet), path)
+        table = sensor_config.load(path)
+        row = table.index_of("press_01")
+        self.assertEqual(table.max_values[row], 1050)
+        self.assertIsInstance(table.sensor(0), TemperatureSensor)
+
+    def test_invalid_json_line_is_reported(self):
+        path = os.path.join(self.temp_dir, "fleet.jsonl")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"type": "light", "sensor_id": "l1", "min_value": 0, "max_value": 10}\n{niepoprawny\n')
+        with self.assertRaisesRegex(ValueError, ":2:"):
+            sensor_config.load(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
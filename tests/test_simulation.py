@@ -0,0 +1,70 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from Logger import Logger
+from sensor import default_sensors
+from simulation import SimulationClock, SimulationEngine, attach
+
+
+class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        self.temp_dirs = []
+
+    def tearDown(self):
+        for d in self.temp_dirs:
+            shutil.rmtree(d)
+
+    def _simulate(self, seed: int, hours: float) -> tuple:
+        temp_dir = tempfile.mkdtemp()
+        self.temp_dirs.append(temp_dir)
+        config_path = os.path.join(temp_dir, "config.json")
+        with open(config_path, 'w') as f:
+            json.dump({"log_dir": temp_dir, "buffer_size": 100, "rotate_every_hours": 24}, f)
+
+        clock = SimulationClock(datetime.datetime(2025, 1, 1))
+        sensors = default_sensors()
+        attach(sensors, clock, seed)
+        logger = Logger(config_path, clock=clock)
+        logger.start()
+        count = SimulationEngine(sensors, clock, logger).run(datetime.timedelta(hours=hours))
+        logger.stop()
+        self.assertGreater(count, 0)
+
+        # Pliki bieżące i archiwa (bez manifestu - zawiera czas rzeczywisty archiwizacji)
+        paths = [os.path.join(temp_dir, name) for name in sorted(os.listdir(temp_dir)) if name.endswith(".csv")]
+        paths += [os.path.join(logger.archive_dir, name) for name in sorted(os.listdir(logger.archive_dir))
+                  if name.endswith(".zip")]
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(os.path.basename(path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest(), len(paths)
+
+    def test_same_seed_gives_identical_logs(self):
+        # Ponad dobę - rotacja dnia archiwizuje pierwszy plik
+        first, files = self._simulate(7, 26)
+        self.assertEqual(files, 2)
+        self.assertEqual(first, self._simulate(7, 26)[0])
+        self.assertNotEqual(first, self._simulate(8, 26)[0])
+
+    def test_simulated_time_drives_sensors_and_callbacks(self):
+        clock = SimulationClock(datetime.datetime(2025, 7, 1, 12, 0))
+        sensors = default_sensors()
+        attach(sensors, clock, seed=1)
+        received = []
+        sensors[0].register_callback(lambda sid, ts, value, unit: received.append(ts))
+        SimulationEngine(sensors, clock).run(60)
+        # Czujnik temperatury odczytuje co 5 s: 12:00:00, 12:00:05, ..., 12:00:55
+        self.assertEqual(len(received), 12)
+        self.assertEqual(received[1] - received[0], datetime.timedelta(seconds=5))
+        self.assertEqual(clock.now(), datetime.datetime(2025, 7, 1, 12, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import timecodec
+from Logger import Logger
+
+
+class TestTimecodec(unittest.TestCase):
+    def test_micros_round_trip(self):
+        dt = datetime.datetime(2025, 5, 28, 13, 29, 48, 661555)
+        micros = timecodec.to_micros(dt)
+        self.assertEqual(timecodec.from_micros(micros), dt)
+        self.assertEqual(timecodec.format_micros(micros), dt.isoformat())
+        self.assertEqual(timecodec.format_micros_column([micros]), [dt.isoformat()])
+
+    def test_parse_column_matches_fromisoformat(self):
+        texts = ["2025-05-28T13:29:48.661555", "2025-05-28T13:29:48", "2024-02-29T00:00:00.000001"]
+        expected = [timecodec.to_micros(datetime.datetime.fromisoformat(t)) for t in texts]
+        self.assertEqual(list(timecodec.parse_column(texts)), expected)
+        self.assertEqual(timecodec.parse_column_lenient(texts + ["zły"]), expected + [None])
+
+    def test_parse_column_ignores_utc_offset(self):
+        texts = ["2025-05-28T13:29:48+02:00", "2025-05-28T13:29:48.5-05:00", "2025-05-28T13:29:48Z",
+                 "2025-05-28T13:29:48"]
+        # Czas ścienny z tekstu, jak w to_micros(fromisoformat(...)) - bez przeliczania na UTC
+        wall = timecodec.to_micros(datetime.datetime(2025, 5, 28, 13, 29, 48))
+        expected = [wall, wall + 500_000, wall, wall]
+        self.assertEqual([timecodec.to_micros(datetime.datetime.fromisoformat(t)) for t in texts], expected)
+        self.assertEqual(list(timecodec.parse_column(texts)), expected)
+        self.assertEqual(timecodec.parse_column_lenient(texts), expected)
+        with mock.patch.object(timecodec, "np", None):
+            self.assertEqual(timecodec.parse_column(texts), expected)
+
+    def test_format_datetime_matches_isoformat(self):
+        dt = datetime.datetime(2025, 1, 1, 0, 0, 0)
+        self.assertEqual(timecodec.format_datetime(dt), dt.isoformat())
+        self.assertEqual(timecodec.format_datetime(dt), dt.isoformat())
+        offset = datetime.timezone(datetime.timedelta(hours=2))
+        for dt in (datetime.datetime(2025, 5, 28, 13, 29, 48, 661555), datetime.datetime(2024, 2, 29, 23, 59, 59),
+                   datetime.datetime(999, 12, 31, 0, 0, 0, 1), datetime.datetime(2025, 1, 1, 12, tzinfo=offset)):
+            self.assertEqual(timecodec.format_datetime(dt), dt.isoformat())
+
+    def test_day_prefix_cache_is_bounded(self):
+        for day in range(3 * timecodec.DAY_PREFIX_CACHE_SIZE):
+            dt = datetime.datetime(2025, 1, 1) + datetime.timedelta(days=day, seconds=day)
+            self.assertEqual(timecodec.format_datetime(dt), dt.isoformat())
+            self.assertEqual(timecodec.format_micros(timecodec.to_micros(dt)),
+                             dt.isoformat(timespec='microseconds'))
+        self.assertLessEqual(timecodec._day_prefix.cache_info().currsize, timecodec.DAY_PREFIX_CACHE_SIZE)
+
+
+class TestReadLogsRobustness(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.temp_dir, "config.json")
+        with open(self.config_path, 'w') as f:
+            json.dump({"log_dir": self.temp_dir}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_invalid_rows_are_skipped(self):
+        with open(os.path.join(self.temp_dir, "sensors_20250101.csv"), 'w', encoding='utf-8') as f:
+            f.write("timestamp,sensor_id,value,unit\n"
+                    "2025-01-01T10:00:00,s1,1.5,C\n"
+                    ",s1,2.0,C\n"
+                    "nie-data,s1,3.0,C\n"
+                    "2025-01-01T10:00:02,s2,abc,C\n"
+                    "2025-01-01T10:00:03,s2\n"
+                    "2025-01-01T10:00:04,s1,4.5,C\n")
+        logger = Logger(self.config_path)
+        rows = list(logger.read_logs(datetime.datetime(2025, 1, 1), datetime.datetime(2025, 1, 2)))
+        self.assertEqual([(r["sensor_id"], r["value"]) for r in rows], [("s1", 1.5), ("s1", 4.5)])
+        self.assertEqual(rows[0]["timestamp"], datetime.datetime(2025, 1, 1, 10, 0, 0))
+        only_s1 = list(logger.read_logs(datetime.datetime(2025, 1, 1, 10, 0, 1),
+                                        datetime.datetime(2025, 1, 2), sensor_id="s1"))
+        self.assertEqual(len(only_s1), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import datetime
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from Logger import Logger
+from server.ingest import IngestSink
+from write_policy import WriteFilter, WritePolicy
+
+START = datetime.datetime(2025, 1, 1)
+
+
+class FixedClock:
+    def __init__(self, now: datetime.datetime):
+        self.current = now
+
+    def now(self) -> datetime.datetime:
+        return self.current
+
+
+def slow_signal(count: int, seed: int = 7) -> list:
+    """Wolno zmienny przebieg z szumem: odczyt co 10 s."""
+    rng = random.Random(seed)
+    return [(START + datetime.timedelta(seconds=10 * i), 20 + 5 * math.sin(i / 200) + rng.uniform(-0.2, 0.2))
+            for i in range(count)]
+
+
+class TestWritePolicy(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def make_logger(self, **config) -> Logger:
+        config_path = os.path.join(self.temp_dir, "config.json")
+        with open(config_path, 'w') as f:
+            json.dump(dict({"log_dir": self.temp_dir, "buffer_size": 50}, **config), f)
+        return Logger(config_path, clock=FixedClock(START))
+
+    def write(self, logger: Logger, sensor_id: str, readings: list) -> None:
+        for ts, value in readings:
+            logger.log_reading(sensor_id, ts, value, "C")
+        logger.stop()
+
+    def assert_reconstructed(self, logger: Logger, sensor_id: str, readings: list) -> None:
+        restored = logger.reconstruct(sensor_id, [ts for ts, _ in readings])
+        bound = logger.error_bound(sensor_id)
+        self.assertNotIn(None, restored)
+        for (ts, value), got in zip(readings, restored):
+            self.assertLessEqual(abs(got - value), bound + 1e-9, ts)
+
+    def test_deadband_reduces_rows_within_bound(self):
+        logger = self.make_logger(write_policies={"temp_*": {"deadband": 0.5}})
+        readings = slow_signal(2000)
+        self.write(logger, "temp_01", readings)
+        stored = list(logger.read_logs(START, START + datetime.timedelta(days=1)))
+        stats = logger.write_stats()["temp_01"]
+        self.assertEqual(stats["received"], 2000)
+        self.assertEqual(stats["stored"], len(stored))
+        self.assertLess(len(stored), 200)
+        self.assert_reconstructed(logger, "temp_01", readings)
+
+    def test_swinging_door_reconstructs_linearly_within_bound(self):
+        logger = self.make_logger(write_policies={"temp_01": {"swinging_door": 0.5}, "*": {"deadband": 100}})
+        readings = slow_signal(2000)
+        self.write(logger, "temp_01", readings)
+        self.assertLess(logger.write_stats()["temp_01"]["stored"], 100)
+        self.assert_reconstructed(logger, "temp_01", readings)
+        self.assertEqual(logger.error_bound("temp_01"), 0.5)
+        self.assertEqual(logger.error_bound("hum_01"), 100)
+
+    def test_max_silence_forces_writes_and_marks_gaps(self):
+        logger = self.make_logger(write_policies={"press_01": {"deadband": 10, "max_silence_s": 60},
+                                                  "light_01": {"swinging_door": 10, "max_silence_s": 60}})
+        # Stała wartość przez 10 minut, przerwa w odczytach 10 minut, potem znowu odczyty
+        readings = [(START + datetime.timedelta(seconds=10 * i), 1000.0) for i in range(60)]
+        readings += [(START + datetime.timedelta(minutes=20, seconds=10 * i), 1000.0) for i in range(6)]
+        for sensor_id in ("press_01", "light_01"):
+            for ts, value in readings:
+                logger.log_reading(sensor_id, ts, value, "hPa")
+        logger.stop()
+        for sensor_id in ("press_01", "light_01"):
+            rows = [r["timestamp"] for r in logger.read_logs(START, START + datetime.timedelta(hours=1), sensor_id)]
+            gaps = [(b - a).total_seconds() for a, b in zip(rows, rows[1:])]
+            self.assertTrue(all(gap <= 60 or gap >= 600 for gap in gaps), gaps)
+            self.assert_reconstructed(logger, sensor_id, readings)
+            # W przerwie odczytów (dłuższej niż max_silence_s) wartość nie jest odtwarzana
+            self.assertEqual(logger.reconstruct(sensor_id, [START + datetime.timedelta(minutes=15)]), [None])
+
+    def test_acknowledged_readings_survive_crash(self):
+        policies = {"temp_01": {"swinging_door": 0.5}, "hum_01": {"deadband": 0.5}}
+        logger = self.make_logger(write_policies=policies)
+        logger.start()
+        sink = IngestSink(logger)
+        readings = slow_signal(500)
+        try:
+            for sensor_id in ("temp_01", "hum_01"):
+                ticket = sink.submit([(sensor_id, ts, value, "C") for ts, value in readings])
+                self.assertTrue(ticket.wait(5))
+            self.assertTrue(os.path.exists(logger.policy_journal_path))
+            # Awaria po ACK: bez stop() - wstrzymane odczyty są tylko w dzienniku
+            restarted = self.make_logger(write_policies=policies)
+            restarted.start()
+            self.assertFalse(os.path.exists(restarted.policy_journal_path))
+            for sensor_id in ("temp_01", "hum_01"):
+                self.assert_reconstructed(restarted, sensor_id, readings)
+            restarted.stop()
+        finally:
+            sink.close()
+
+    def test_journal_rows_written_after_flush_are_not_duplicated(self):
+        policies = {"temp_01": {"swinging_door": 0.5}, "hum_01": {"deadband": 0.5}}
+        logger = self.make_logger(write_policies=policies, buffer_size=1)
+        logger.start()
+        for sensor_id in ("temp_01", "hum_01"):
+            logger.log_reading(sensor_id, START, 0.0, "C")
+            logger.log_reading(sensor_id, START + datetime.timedelta(seconds=1), 0.1, "C")
+        logger.flush()  # Wstrzymane odczyty z 1 s trafiają do dziennika
+        for sensor_id in ("temp_01", "hum_01"):
+            # Wyjście poza korytarz zapisuje wstrzymany punkt (swinging door) albo go zastępuje (deadband)
+            logger.log_reading(sensor_id, START + datetime.timedelta(seconds=2), 10.0, "C")
+        # Awaria przed kolejnym flush(): dziennik wskazuje punkty już zapisane lub zastąpione
+        restarted = self.make_logger(write_policies=policies)
+        restarted.start()
+        restarted.stop()
+        rows = [(e["sensor_id"], e["timestamp"]) for e in
+                restarted.read_logs(START, START + datetime.timedelta(minutes=1), calibrated=False)]
+        self.assertEqual(len(rows), len(set(rows)))
+        self.assertEqual(sorted(rows), [("hum_01", START), ("hum_01", START + datetime.timedelta(seconds=2)),
+                                        ("temp_01", START), ("temp_01", START + datetime.timedelta(seconds=1))])
+
+    def test_sensor_without_policy_is_stored_unchanged(self):
+        write_filter = WriteFilter({"temp_*": {"deadband": 1.0}})
+        kept = [write_filter.offer("hum_01", i, 50.0, ["t", "hum_01", 50.0, "%"]) for i in range(5)]
+        self.assertTrue(all(len(rows) == 1 for rows in kept))
+        self.assertEqual(write_filter.stats(), {})
+        with self.assertRaises(ValueError):
+            WritePolicy(deadband=1.0, swinging_door=1.0)
+        with self.assertRaises(ValueError):
+            WritePolicy.from_dict({"deadbnd": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Kodowanie i dekodowanie znaczników czasu na granicy CSV/sieci.
+
+Wewnętrzną reprezentacją jest liczba całkowita mikrosekund od 1970-01-01 (czas lokalny,
+bez strefy), a na zewnątrz - tekst ISO 8601 zgodny z datetime.isoformat(). Przesunięcie
+strefy w tekście (+HH:MM, -HH:MM, Z) jest pomijane we wszystkich ścieżkach parsowania -
+liczy się zapisany czas ścienny, bez przeliczania na UTC.
+
+Pojedyncze wartości formatowane są z zapamiętanego prefiksu dnia "RRRR-MM-DDT" (mała pamięć
+LRU według numeru dnia) i części czasu z implementacji C (time.isoformat), a parsowane przez
+datetime.fromisoformat; powtarzające się obiekty są zapamiętywane. Całe kolumny (odczyt porcji pliku, zapis wygenerowanych danych) są
+przetwarzane wektorowo przez NumPy datetime64, jeśli NumPy jest dostępne.
+"""
+import datetime
+import functools
+from typing import List, Sequence
+
+import lazy_import
+
+# NumPy jest opcjonalne (bez niego kolumny przetwarzane są wiersz po wierszu) i importowane przy pierwszym użyciu
+np = lazy_import.optional("numpy")
+
+EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+MICROS_PER_SECOND = 1_000_000
+MICROS_PER_DAY = 86_400 * MICROS_PER_SECOND
+
+# Ostatnio sformatowany obiekt datetime - odczyty z jednego cyklu często dzielą znacznik czasu
+_last_formatted = (None, "")
+# Liczba zapamiętanych prefiksów dni - zapis dotyczy zwykle bieżącego dnia, odczyt kilku sąsiednich
+DAY_PREFIX_CACHE_SIZE = 64
+
+
+@functools.lru_cache(maxsize=DAY_PREFIX_CACHE_SIZE)
+def _day_prefix(ordinal: int) -> str:
+    """Prefiks "RRRR-MM-DDT" dnia o podanym numerze (date.toordinal), jak w isoformat()."""
+    day = datetime.date.fromordinal(ordinal)
+    return f"{day.year:04d}-{day.month:02d}-{day.day:02d}T"
+
+
+def to_micros(dt: datetime.datetime) -> int:
+    """Zamienia datetime (czas ścienny, strefa ignorowana) na mikrosekundy od EPOCH."""
+    return (((dt.toordinal() - _EPOCH_ORDINAL) * 86_400 + dt.hour * 3600 + dt.minute * 60 + dt.second)
+            * MICROS_PER_SECOND + dt.microsecond)
+
+
+def from_micros(micros: int) -> datetime.datetime:
+    """Zamienia mikrosekundy od EPOCH na datetime (bez strefy)."""
+    return EPOCH + datetime.timedelta(microseconds=micros)
+
+
+def format_datetime(dt: datetime.datetime) -> str:
+    """
+    Formatuje datetime tak jak dt.isoformat() (część ułamkowa pomijana przy 0 mikrosekund,
+    przesunięcie strefy zachowane), z prefiksu dnia i zapamiętując ostatni wynik.
+    """
+    global _last_formatted
+    last = _last_formatted
+    if last[0] is dt:
+        return last[1]
+    text = _day_prefix(dt.toordinal()) + dt.timetz().isoformat()
+    _last_formatted = (dt, text)
+    return text
+
+
+def parse_datetime(text: str) -> datetime.datetime:
+    """Parsuje pojedynczy znacznik czasu ISO 8601 (ValueError przy błędnym formacie)."""
+    return datetime.datetime.fromisoformat(text)
+
+
+def format_micros(micros: int) -> str:
+    """
+    Formatuje mikrosekundy od EPOCH jako tekst ISO, korzystając z zapamiętanego prefiksu dnia.
+    Część ułamkowa jest zawsze zapisywana (6 cyfr), tak jak w wersji wektorowej.
+    """
+    day, rest = divmod(micros, MICROS_PER_DAY)
+    prefix = _day_prefix(_EPOCH_ORDINAL + day)
+    seconds, micro = divmod(rest, MICROS_PER_SECOND)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return f"{prefix}{hour:02d}:{minute:02d}:{second:02d}.{micro:06d}"
+
+
+def format_micros_column(micros: Sequence[int]) -> List[str]:
+    """Formatuje całą kolumnę mikrosekund jako teksty ISO (wektorowo przez NumPy, jeśli dostępne)."""
+    if np is not None:
+        values = np.asarray(micros, dtype=np.int64).view('datetime64[us]')
+        return values.astype('U26').tolist()
+    return [format_micros(int(m)) for m in micros]
+
+
+def _strip_offset(text: str) -> str:
+    """Usuwa z tekstu ISO przesunięcie strefy (+HH:MM, -HH:MM, Z), zostawiając czas ścienny."""
+    time_part = text[10:]  # Za częścią "RRRR-MM-DD" znak '-' oznacza już tylko przesunięcie
+    for sign in ('+', '-', 'Z'):
+        i = time_part.find(sign)
+        if i >= 0:
+            return text[:10 + i]
+    return text
+
+
+def parse_column(texts: Sequence[str]):
+    """
+    Parsuje kolumnę tekstów ISO do mikrosekund od EPOCH (przesunięcie strefy pomijane, jak w to_micros).
+
+    Zwraca tablicę NumPy int64 (lub listę int bez NumPy). Jeśli którykolwiek wpis jest
+    niepoprawny, zgłasza ValueError - wywołujący może wtedy przejść na parse_column_lenient.
+    """
+    if np is not None:
+        try:
+            # NumPy przelicza przesunięcie na UTC - przed parsowaniem jest usuwane. Sprawdzenie
+            # całej kolumny naraz: poza przesunięciem '-' występuje tylko w dacie (dwa razy na wpis).
+            joined = "".join(texts)
+            if '+' in joined or 'Z' in joined or joined.count('-') != 2 * len(texts):
+                texts = [_strip_offset(t) for t in texts]
+            return np.array(texts, dtype='datetime64[us]').astype(np.int64)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Niepoprawny znacznik czasu w kolumnie: {e}") from e
+    return [to_micros(datetime.datetime.fromisoformat(t)) for t in texts]
+
+
+def parse_column_lenient(texts: Sequence[str]) -> List:
+    """Parsuje kolumnę wiersz po wierszu; niepoprawne wpisy zamieniane są na None."""
+    result = []
+    for text in texts:
+        try:
+            result.append(to_micros(datetime.datetime.fromisoformat(text)))
+        except (ValueError, TypeError):
+            result.append(None)
+    return result
+
+
+def micros_to_datetimes(micros) -> List[datetime.datetime]:
+    """Zamienia kolumnę mikrosekund na listę obiektów datetime."""
+    if np is not None and isinstance(micros, np.ndarray):
+        return micros.astype(np.int64).view('datetime64[us]').tolist()
+    return [from_micros(m) for m in micros]
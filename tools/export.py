@@ -0,0 +1,41 @@
+"""
+Eksport zakresu logów do pliku kolumnowego .npz dla notebooka analitycznego.
+
+Wiersze czytane są porcjami przez Logger.export_npz i zapisywane strumieniowo, bez tworzenia
+słownika na wiersz. W notebooku:
+    import pandas as pd, log_export
+    df = pd.DataFrame(log_export.load_npz("logs.npz"))
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m tools.export --start 2025-01-01 --end 2025-02-01 --out logs.npz
+"""
+import argparse
+import datetime
+import time
+
+from Logger import Logger
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Eksport logów czujników do pliku .npz.")
+    parser.add_argument("--config", default="config.json", help="Plik konfiguracyjny Loggera")
+    parser.add_argument("--start", required=True, help="Początek zakresu (ISO 8601)")
+    parser.add_argument("--end", required=True, help="Koniec zakresu (ISO 8601)")
+    parser.add_argument("--sensor", help="Tylko wskazany czujnik")
+    parser.add_argument("--out", required=True, help="Plik wynikowy .npz")
+    parser.add_argument("--raw", action="store_true", help="Surowe wartości (bez kalibracji)")
+    parser.add_argument("--compress", action="store_true", help="Kompresuj kolumny (mniejszy plik, wolniej)")
+    args = parser.parse_args(argv)
+
+    logger = Logger(args.config)
+    t0 = time.perf_counter()
+    rows = logger.export_npz(args.out, datetime.datetime.fromisoformat(args.start),
+                             datetime.datetime.fromisoformat(args.end), args.sensor,
+                             calibrated=not args.raw, compress=args.compress)
+    elapsed = time.perf_counter() - t0
+    print(f"Wyeksportowano {rows} wierszy do {args.out} w {elapsed:.1f} s "
+          f"({rows / elapsed if elapsed else 0:,.0f} wierszy/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Równoległy generator syntetycznej historii odczytów w formacie Loggera.
+
+Praca dzielona jest na zadania (dzień x grupa czujników) wykonywane w puli procesów.
+Każde zadanie generuje dane wektorowo (sensor.generate_batch) i zapisuje własny shard
+w katalogu archiwum Loggera, np. archive/sensors_20250101_g0003.csv.zip, więc wynik
+można od razu czytać przez Logger.read_logs.
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m tools.generate --config config.json --start 2025-01-01 --days 30 --sensors 1000 --workers 8
+"""
+import argparse
+import csv
+import datetime
+import io
+import os
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, NamedTuple
+
+import numpy as np
+
+import timecodec
+from Logger import Logger
+from sensor import default_sensors
+
+
+class ShardTask(NamedTuple):
+    day: datetime.date
+    group: int
+    first_sensor: int
+    sensor_count: int
+    seed: int
+    archive_dir: str
+    filename_pattern: str
+    compress: bool
+    batch_seconds: int
+
+
+def build_fleet(first: int, count: int) -> list:
+    """
+    Tworzy czujniki o indeksach [first, first + count) - kolejne typy i parametry
+    z domyślnego zestawu aplikacji, z unikalnymi identyfikatorami.
+    """
+    templates = default_sensors()
+    fleet = []
+    for i in range(first, first + count):
+        t = templates[i % len(templates)]
+        fleet.append(type(t)(sensor_id=f"{t.sensor_id}_{i:06d}", name=t.name, unit=t.unit,
+                             min_value=t.min_value, max_value=t.max_value, frequency=t.frequency))
+    return fleet
+
+
+def shard_name(filename_pattern: str, day: datetime.date, group: int) -> str:
+    """Nazwa pliku shardu: nazwa dnia według wzorca Loggera z dopiskiem grupy przed rozszerzeniem."""
+    base = datetime.datetime.combine(day, datetime.time()).strftime(filename_pattern)
+    stem, ext = os.path.splitext(base)
+    return f"{stem}_g{group:04d}{ext}"
+
+
+def generate_shard(task: ShardTask) -> int:
+    """Generuje i zapisuje jeden shard; zwraca liczbę zapisanych wierszy."""
+    fleet = build_fleet(task.first_sensor, task.sensor_count)
+    day_start = timecodec.to_micros(datetime.datetime.combine(task.day, datetime.time()))
+    day_end = day_start + timecodec.MICROS_PER_DAY
+    batch_us = task.batch_seconds * timecodec.MICROS_PER_SECOND
+    # Strumień losowy zależy od seeda, czujnika i dnia - wynik nie zależy od podziału na procesy
+    rngs = [np.random.Generator(np.random.PCG64([task.seed, zlib.crc32(s.sensor_id.encode('utf-8')),
+                                                 task.day.toordinal()]))
+            for s in fleet]
+    steps = [max(int(s.frequency * timecodec.MICROS_PER_SECOND), 1000) for s in fleet]
+    id_column = np.array([s.sensor_id for s in fleet], dtype=object)
+    unit_column = np.array([s.unit for s in fleet], dtype=object)
+
+    name = shard_name(task.filename_pattern, task.day, task.group)
+    path = os.path.join(task.archive_dir, name + (".zip" if task.compress else ""))
+    tmp_path = path + ".tmp"
+    rows = 0
+    with open(tmp_path, 'wb') as raw:
+        if task.compress:
+            zipf = zipfile.ZipFile(raw, 'w', zipfile.ZIP_DEFLATED)
+            # Data wpisu z dnia shardu, nie z zegara - ten sam seed daje identyczne bajtowo archiwa
+            info = zipfile.ZipInfo(name, date_time=task.day.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            target = zipf.open(info, 'w', force_zip64=True)
+        else:
+            zipf = None
+            target = raw
+        with io.TextIOWrapper(target, encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "sensor_id", "value", "unit"])
+            for batch_start in range(day_start, day_end, batch_us):
+                batch_end = min(batch_start + batch_us, day_end)
+                times, indices, values = [], [], []
+                for i, (s, rng, step) in enumerate(zip(fleet, rngs, steps)):
+                    # Odczyty co `frequency` sekund od początku dnia
+                    first = batch_start + (-(batch_start - day_start) % step)
+                    t = np.arange(first, batch_end, step, dtype=np.int64)
+                    if not len(t):
+                        continue
+                    times.append(t)
+                    values.append(s.generate_batch(t, rng))
+                    indices.append(np.full(len(t), i, dtype=np.int32))
+                if not times:
+                    continue
+                # Scalenie czujników grupy w kolejności czasu (stabilnie - remisy według indeksu czujnika)
+                t_all = np.concatenate(times)
+                order = np.argsort(t_all, kind='stable')
+                idx_all = np.concatenate(indices)[order]
+                timestamps = timecodec.format_micros_column(t_all[order])
+                writer.writerows(zip(timestamps, id_column[idx_all].tolist(),
+                                     np.concatenate(values)[order].tolist(), unit_column[idx_all].tolist()))
+                rows += len(timestamps)
+        if zipf is not None:
+            zipf.close()
+    os.replace(tmp_path, path)
+    return rows
+
+
+def plan_tasks(logger: Logger, start: datetime.date, days: int, sensors: int, shard_sensors: int,
+               seed: int, batch_seconds: int) -> List[ShardTask]:
+    tasks = []
+    for d in range(days):
+        day = start + datetime.timedelta(days=d)
+        for group, first in enumerate(range(0, sensors, shard_sensors)):
+            tasks.append(ShardTask(day, group, first, min(shard_sensors, sensors - first), seed,
+                                   logger.archive_dir, logger.filename_pattern, logger.compress_archive,
+                                   batch_seconds))
+    return tasks
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Równoległy generator syntetycznych logów czujników.")
+    parser.add_argument("--config", default="config.json", help="Plik konfiguracyjny Loggera (log_dir, wzorzec nazw)")
+    parser.add_argument("--start", default="2025-01-01", help="Pierwszy dzień (RRRR-MM-DD)")
+    parser.add_argument("--days", type=int, default=1, help="Liczba dni")
+    parser.add_argument("--sensors", type=int, default=100, help="Liczba czujników we flocie")
+    parser.add_argument("--shard-sensors", type=int, default=100, help="Liczba czujników w jednym shardzie")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Liczba procesów")
+    parser.add_argument("--seed", type=int, default=0, help="Ziarno generatorów")
+    parser.add_argument("--batch-seconds", type=int, default=3600, help="Zakres czasu generowany naraz w shardzie")
+    args = parser.parse_args(argv)
+
+    logger = Logger(args.config)
+    tasks = plan_tasks(logger, datetime.date.fromisoformat(args.start), args.days, args.sensors,
+                       args.shard_sensors, args.seed, args.batch_seconds)
+    print(f"Generowanie {len(tasks)} shardów ({args.sensors} czujników x {args.days} dni) "
+          f"w {args.workers} procesach do {logger.archive_dir}")
+
+    t0 = time.perf_counter()
+    total = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(generate_shard, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            total += future.result()
+            if done % max(1, len(tasks) // 10) == 0:
+                print(f"  {done}/{len(tasks)} shardów, {total} wierszy")
+    elapsed = time.perf_counter() - t0
+    print(f"Zapisano {total} wierszy w {elapsed:.1f} s ({total / elapsed:,.0f} wierszy/s)")
+
+
+if __name__ == "__main__":
+    main()
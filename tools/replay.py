@@ -0,0 +1,210 @@
+"""
+Odtwarzanie historycznych logów przez stos sieciowy (generator obciążenia).
+
+Odczyty są czytane strumieniowo przez Logger.read_logs (pliki CSV i archiwa zip)
+i wysyłane przez NetworkClient do NetworkServer lub serwera GUI (ThreadedServer)
+w tempie wyznaczonym przez ich znaczniki czasu, przyspieszonym --speed razy
+(lub bez opóźnień przy --speed max). Odczyty rozdzielane są na --connections
+równoległych połączeń według czujnika, więc kolejność w obrębie czujnika jest zachowana.
+Kod wyjścia 1, gdy nie udało się połączyć z serwerem lub część pakietów nie została wysłana.
+
+Uruchomienie (z katalogu głównego projektu):
+    python -m tools.replay --start 2025-01-01 --end 2025-01-02 --speed 100 --connections 4
+"""
+import argparse
+import datetime
+import logging
+import queue
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Optional
+
+import sampled_log
+import timecodec
+from Logger import Logger
+from network.client import NetworkClient
+
+# Ostatni fragment oczekiwania realizowany aktywnie - time.sleep bywa niedokładny o ~1 ms
+_SPIN_SECONDS = 0.001
+_STOP = object()
+
+
+class ReplayStats:
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.max_lag = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+
+
+class _Connection(threading.Thread):
+    """Wątek z własnym NetworkClient, wysyłający pakiety z ograniczonej kolejki."""
+
+    def __init__(self, index: int, host: str, port: int, timeout: float, retries: int,
+                 stats: ReplayStats, queue_size: int):
+        super().__init__(daemon=True, name=f"replay-{index}")
+        self.client = NetworkClient(host, port, timeout=timeout, retries=retries)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = stats
+        self.connected = threading.Event()
+        self.failed = False
+
+    def run(self):
+        try:
+            self.client.connect()
+        except OSError:
+            self.failed = True  # Błąd zalogowany przez NetworkClient; ReplayStreamer pomija to połączenie
+            return
+        finally:
+            self.connected.set()
+        try:
+            while True:
+                packet = self.queue.get()
+                if packet is _STOP:
+                    break
+                self.stats.record(self.client.send(packet))
+        finally:
+            self.client.close()
+
+
+class ReplayStreamer:
+    """
+    Wysyła odczyty do serwera w tempie z historii.
+
+    Args:
+        host (str): Adres serwera.
+        port (int): Port serwera.
+        speed (float | None): Przyspieszenie względem czasu rzeczywistego; None - bez opóźnień.
+        connections (int): Liczba równoległych połączeń.
+        target (str): "server" (pakiety z kluczem sensor_id) lub "gui" (klucz sensor).
+        retime (bool): Czy zastąpić historyczne znaczniki czasu bieżącym czasem wysyłki.
+    """
+
+    def __init__(self, host: str, port: int, speed: Optional[float] = 1.0, connections: int = 1,
+                 target: str = "server", retime: bool = False, timeout: float = 5.0, retries: int = 3,
+                 queue_size: int = 10_000):
+        self.speed = speed
+        self.target = target
+        self.retime = retime
+        self.stats = ReplayStats()
+        self.connections = [_Connection(i, host, port, timeout, retries, self.stats, queue_size)
+                            for i in range(connections)]
+
+    def _packet(self, entry: Dict, now: datetime.datetime) -> Dict:
+        key = "sensor" if self.target == "gui" else "sensor_id"
+        return {
+            key: entry["sensor_id"],
+            "timestamp": timecodec.format_datetime(now if self.retime else entry["timestamp"]),
+            "value": entry["value"],
+            "unit": entry["unit"],
+        }
+
+    def run(self, entries: Iterable[Dict]) -> ReplayStats:
+        """
+        Odtwarza odczyty i czeka na wysłanie wszystkich pakietów.
+        Połączenia, których nie udało się nawiązać, są pomijane (czujniki rozdzielane są na pozostałe).
+
+        Raises:
+            ConnectionRefusedError: Gdy nie udało się nawiązać żadnego połączenia.
+        """
+        for conn in self.connections:
+            conn.start()
+        for conn in self.connections:
+            conn.connected.wait()
+        connections = [conn for conn in self.connections if not conn.failed]
+        if not connections:
+            raise ConnectionRefusedError("Nie udało się nawiązać żadnego połączenia z serwerem")
+
+        first_ts = None
+        wall_start = time.perf_counter()
+        for entry in entries:
+            if self.speed is not None:
+                if first_ts is None:
+                    first_ts = entry["timestamp"]
+                target = wall_start + (entry["timestamp"] - first_ts).total_seconds() / self.speed
+                self._wait_until(target)
+            packet = self._packet(entry, datetime.datetime.now())
+            index = zlib.crc32(entry["sensor_id"].encode('utf-8')) % len(connections)
+            # Pełna kolejka blokuje odczyt logów - tempo dopasowuje się do najwolniejszego połączenia
+            if not self._enqueue(connections[index], packet):
+                self.stats.record(False)
+
+        for conn in connections:
+            self._enqueue(conn, _STOP)
+        for conn in connections:
+            conn.join()
+        return self.stats
+
+    @staticmethod
+    def _enqueue(conn: _Connection, item) -> bool:
+        """Wstawia pakiet do kolejki połączenia; False, gdy wątek połączenia zakończył się (nikt jej nie opróżni)."""
+        while True:
+            try:
+                conn.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if not conn.is_alive():
+                    return False
+
+    def _wait_until(self, target: float) -> None:
+        now = time.perf_counter()
+        if now > target:
+            self.stats.max_lag = max(self.stats.max_lag, now - target)
+            return
+        if target - now > _SPIN_SECONDS:
+            time.sleep(target - now - _SPIN_SECONDS)
+        while time.perf_counter() < target:
+            pass
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Odtwarzanie logów czujników przez sieć.")
+    parser.add_argument("--config", default="config.json", help="Plik konfiguracyjny Loggera")
+    parser.add_argument("--start", required=True, help="Początek zakresu (ISO 8601)")
+    parser.add_argument("--end", required=True, help="Koniec zakresu (ISO 8601)")
+    parser.add_argument("--sensor", help="Tylko wskazany czujnik")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9999)
+    parser.add_argument("--target", choices=("server", "gui"), default="server",
+                        help="server - NetworkServer, gui - serwer w gui/server_gui.py")
+    parser.add_argument("--speed", default="1", help="Przyspieszenie (np. 1, 100) lub 'max'")
+    parser.add_argument("--connections", type=int, default=1, help="Liczba równoległych połączeń")
+    parser.add_argument("--retime", action="store_true", help="Wysyłaj bieżący czas zamiast historycznego")
+    args = parser.parse_args(argv)
+
+    sampled_log.setup_console()
+    # Logi per pakiet klientów zagłuszyłyby wynik
+    logging.getLogger("NetworkClient").setLevel(logging.WARNING)
+
+    speed = None if args.speed == "max" else float(args.speed)
+    logger = Logger(args.config)
+    entries = logger.read_logs(datetime.datetime.fromisoformat(args.start),
+                               datetime.datetime.fromisoformat(args.end), args.sensor)
+    streamer = ReplayStreamer(args.host, args.port, speed=speed, connections=args.connections,
+                              target=args.target, retime=args.retime)
+    t0 = time.perf_counter()
+    try:
+        stats = streamer.run(entries)
+    except ConnectionRefusedError as e:
+        print(f"{e} ({args.host}:{args.port}).", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - t0
+    total = stats.sent + stats.failed
+    skipped = sum(conn.failed for conn in streamer.connections)
+    print(f"Wysłano {stats.sent} pakietów (błędy: {stats.failed}) w {elapsed:.1f} s "
+          f"({total / elapsed if elapsed else 0:,.0f} pakietów/s), maks. opóźnienie względem planu "
+          f"{stats.max_lag * 1000:.1f} ms" + (f", pominięte połączenia: {skipped}" if skipped else ""))
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+"""
+Polityki zapisu odczytów (downsampling przy zapisie) dla wolno zmiennych sygnałów.
+
+Polityka czujnika (klucz config.json "write_policies": identyfikator lub wzorzec fnmatch):
+    {"deadband": 0.5, "max_silence_s": 300}
+        odczyt zapisywany, gdy różni się od ostatnio zapisanego o więcej niż deadband;
+        odtworzenie: wartość ostatniego zapisanego odczytu (schodkowo), błąd <= deadband
+    {"swinging_door": 2.0, "max_silence_s": 600}
+        kompresja "swinging door": zapisywane są punkty załamania (wartość może być przesunięta
+        o <= swinging_door, aby leżała w korytarzu), a prosta między kolejnymi zapisanymi punktami
+        przechodzi w odległości <= swinging_door od każdego pominiętego odczytu;
+        odtworzenie: interpolacja liniowa, błąd <= swinging_door
+    max_silence_s (opcjonalnie): odstęp między zapisanymi punktami czujnika, który raportuje
+        bez przerw, nie przekracza max_silence_s (wymuszany jest zapis ostatniego odczytu) - dłuższa
+        przerwa w logu oznacza brak danych, a nie stałą wartość.
+
+Błąd dotyczy surowych wartości (przed kalibracją). Odrzucony odczyt "swinging door" zapisywany
+jest z opóźnieniem - dopiero gdy następny odczyt wyjdzie poza korytarz - więc wiersze czujnika
+mogą trafić do pliku po nowszych wierszach innych czujników; ostatnie odczyty zapisywane są
+przy Logger.stop(). Logger.flush() zapisuje wstrzymane odczyty w dzienniku (write_policy.journal),
+z którego po awarii przenoszone są do logu przy następnym Logger.start() - odczyt przekazany
+do log_reading przed flush() nie ginie, a granica błędu obowiązuje także dla ostatniego odcinka.
+"""
+import bisect
+import fnmatch
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import timecodec
+from metrics import REGISTRY
+
+_READINGS_OFFERED = REGISTRY.counter("logger_policy_readings_total", "Odczyty sprawdzone przez politykę zapisu")
+_READINGS_SUPPRESSED = REGISTRY.counter("logger_policy_suppressed_total",
+                                        "Odczyty pominięte przez politykę zapisu (deadband, swinging door)")
+
+MODES = ("deadband", "swinging_door")
+
+
+class WritePolicy:
+    """Ustawienia polityki zapisu jednego czujnika."""
+
+    def __init__(self, deadband: Optional[float] = None, swinging_door: Optional[float] = None,
+                 max_silence_s: Optional[float] = None):
+        """
+        :param deadband: Próg zmiany wartości względem ostatniego zapisu (odtwarzanie schodkowe)
+        :param swinging_door: Dopuszczalne odchylenie od prostej między zapisanymi punktami (odtwarzanie liniowe)
+        :param max_silence_s: Maksymalny odstęp między zapisanymi punktami (None - bez ograniczenia)
+        """
+        if (deadband is None) == (swinging_door is None):
+            raise ValueError("Polityka zapisu wymaga dokładnie jednego z parametrów: deadband, swinging_door")
+        tolerance = deadband if deadband is not None else swinging_door
+        if tolerance < 0 or (max_silence_s is not None and max_silence_s <= 0):
+            raise ValueError("Parametry polityki zapisu nie mogą być ujemne")
+        self.mode = "deadband" if deadband is not None else "swinging_door"
+        self.tolerance = float(tolerance)
+        self.max_silence_s = max_silence_s
+        self.max_silence_us = (int(max_silence_s * timecodec.MICROS_PER_SECOND)
+                               if max_silence_s is not None else None)
+
+    @property
+    def error_bound(self) -> float:
+        """Maksymalny błąd odtworzenia surowej wartości (reconstruct) w jednostkach czujnika."""
+        return self.tolerance
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "WritePolicy":
+        unknown = set(spec) - {"deadband", "swinging_door", "max_silence_s"}
+        if unknown:
+            raise ValueError(f"Nieznane parametry polityki zapisu: {', '.join(sorted(unknown))}")
+        return cls(spec.get("deadband"), spec.get("swinging_door"), spec.get("max_silence_s"))
+
+    def to_dict(self) -> dict:
+        spec = {self.mode: self.tolerance}
+        if self.max_silence_s is not None:
+            spec["max_silence_s"] = self.max_silence_s
+        return spec
+
+
+class _SensorState:
+    __slots__ = ("policy", "last_us", "last_value", "held", "slope_low", "slope_high", "received", "stored")
+
+    def __init__(self, policy: WritePolicy):
+        self.policy = policy
+        self.last_us: Optional[int] = None  # Ostatni zapisany punkt (kotwica korytarza)
+        self.last_value = 0.0
+        self.held: Optional[Tuple[list, int, float]] = None  # Ostatni pominięty odczyt (wiersz, czas, wartość)
+        self.slope_low = -math.inf  # Korytarz "swinging door" (jednostki na mikrosekundę)
+        self.slope_high = math.inf
+        self.received = 0
+        self.stored = 0
+
+
+class WriteFilter:
+    """
+    Stosuje polityki zapisu do strumienia odczytów Loggera (po jednym stanie na czujnik).
+    Czujniki bez pasującej polityki zapisywane są bez zmian.
+    """
+
+    def __init__(self, policies: Dict[str, dict]):
+        """
+        :param policies: Słownik identyfikator lub wzorzec fnmatch -> opis polityki; dokładny identyfikator
+                         ma pierwszeństwo, potem pierwszy pasujący wzorzec
+        """
+        self.policies = {key: WritePolicy.from_dict(spec) for key, spec in policies.items() if spec}
+        self._resolved: Dict[str, Optional[WritePolicy]] = {}
+        self._states: Dict[str, _SensorState] = {}
+
+    def policy_for(self, sensor_id: str) -> Optional[WritePolicy]:
+        try:
+            return self._resolved[sensor_id]
+        except KeyError:
+            pass
+        policy = self.policies.get(sensor_id)
+        if policy is None:
+            policy = next((p for pattern, p in self.policies.items() if fnmatch.fnmatchcase(sensor_id, pattern)),
+                          None)
+        self._resolved[sensor_id] = policy
+        return policy
+
+    def offer(self, sensor_id: str, row_us: int, value: float, row: list) -> List[Tuple[list, int]]:
+        """
+        Przekazuje odczyt do polityki czujnika; zwraca wiersze (wiersz, czas w mikrosekundach)
+        do zapisania teraz - pusta lista, bieżący odczyt lub wcześniej pominięty odczyt.
+        """
+        state = self._states.get(sensor_id)
+        if state is None:
+            policy = self.policy_for(sensor_id)
+            if policy is None:
+                return [(row, row_us)]
+            state = self._states[sensor_id] = _SensorState(policy)
+        state.received += 1
+        _READINGS_OFFERED.inc()
+        if value is None or not math.isfinite(value):
+            # Wartości spoza polityki (puste, NaN) zapisywane bez zmian i nie przesuwają kotwicy
+            state.stored += 1
+            return [(row, row_us)]
+
+        out: List[Tuple[list, int]] = []
+        policy = state.policy
+        if state.last_us is not None and policy.max_silence_us is not None \
+                and row_us - state.last_us > policy.max_silence_us and state.held is not None:
+            # Ostatni pominięty odczyt zamyka odcinek - odstępy między zapisami nie przekraczają max_silence
+            self._store_held(state, out)
+        if state.last_us is None or (policy.max_silence_us is not None
+                                     and row_us - state.last_us > policy.max_silence_us):
+            self._store(state, row, row_us, value, out)
+        elif policy.mode == "deadband":
+            if abs(value - state.last_value) > policy.tolerance:
+                self._store(state, row, row_us, value, out)
+            else:
+                state.held = (row, row_us, value)
+        else:
+            self._swinging_door(state, row, row_us, value, out)
+        if not out:
+            _READINGS_SUPPRESSED.inc()
+        return out
+
+    def _swinging_door(self, state: _SensorState, row: list, row_us: int, value: float,
+                       out: List[Tuple[list, int]]) -> None:
+        tolerance = state.policy.tolerance
+        dt = max(row_us - state.last_us, 1)
+        low = max(state.slope_low, (value - tolerance - state.last_value) / dt)
+        high = min(state.slope_high, (value + tolerance - state.last_value) / dt)
+        if low <= high:
+            state.slope_low, state.slope_high = low, high
+            state.held = (row, row_us, value)
+            return
+        # Odczyt wychodzi poza korytarz: zapisujemy poprzedni odczyt (prosta do niego mieści wszystkie
+        # pominięte) i otwieramy nowy korytarz od niego
+        if state.held is None:
+            self._store(state, row, row_us, value, out)
+            return
+        self._store_held(state, out)
+        dt = max(row_us - state.last_us, 1)
+        state.slope_low = (value - tolerance - state.last_value) / dt
+        state.slope_high = (value + tolerance - state.last_value) / dt
+        state.held = (row, row_us, value)
+
+    def _store_held(self, state: _SensorState, out: List[Tuple[list, int]]) -> None:
+        self._store(state, *self._held_point(state), out)
+
+    @staticmethod
+    def _held_point(state: _SensorState) -> Tuple[list, int, float]:
+        row, row_us, value = state.held
+        if state.policy.mode == "swinging_door":
+            # Punkt rzutowany na korytarz: prosta od kotwicy mieści wszystkie pominięte odczyty, a sam punkt
+            # różni się od odczytu najwyżej o tolerancję (nachylenie odczytu może leżeć poza korytarzem)
+            dt = max(row_us - state.last_us, 1)
+            slope = min(max((value - state.last_value) / dt, state.slope_low), state.slope_high)
+            projected = state.last_value + slope * dt
+            if projected != value:
+                row = list(row)
+                row[2] = value = projected
+        return row, row_us, value
+
+    @staticmethod
+    def _store(state: _SensorState, row: list, row_us: int, value: float, out: List[Tuple[list, int]]) -> None:
+        out.append((row, row_us))
+        state.last_us = row_us
+        state.last_value = value
+        state.held = None
+        state.slope_low = -math.inf
+        state.slope_high = math.inf
+        state.stored += 1
+
+    def drain(self) -> List[Tuple[list, int]]:
+        """Zwraca pominięte ostatnie odczyty wszystkich czujników (zapis przy zatrzymaniu Loggera)."""
+        out: List[Tuple[list, int]] = []
+        for state in self._states.values():
+            if state.held is not None:
+                self._store_held(state, out)
+        out.sort(key=lambda item: item[1])
+        return out
+
+    def pending(self) -> List[Tuple[list, int]]:
+        """
+        Zwraca wiersze, które zamknęłyby bieżące odcinki (jak drain), bez zmiany stanu polityk -
+        Logger zapisuje je w dzienniku przy flush(), żeby potwierdzony odczyt przetrwał awarię.
+        """
+        out = []
+        for state in self._states.values():
+            if state.held is not None:
+                row, row_us, _ = self._held_point(state)
+                out.append((row, row_us))
+        out.sort(key=lambda item: item[1])
+        return out
+
+    def stats(self) -> Dict[str, dict]:
+        """Dla każdego czujnika z polityką: liczba odczytów, liczba zapisanych i krotność redukcji."""
+        return {sensor_id: {
+            "policy": state.policy.to_dict(),
+            "received": state.received,
+            "stored": state.stored,
+            "reduction": state.received / state.stored if state.stored else None,
+        } for sensor_id, state in sorted(self._states.items())}
+
+
+def reconstruct(stored_us: Sequence[int], stored_values: Sequence[float], query_us: Sequence[int],
+                policy: Optional[WritePolicy]) -> List[Optional[float]]:
+    """
+    Odtwarza wartości czujnika w chwilach query_us z zapisanych punktów (posortowanych według czasu).
+    Zwraca None dla chwil bez danych: przed pierwszym punktem, w przerwach dłuższych niż
+    max_silence_s oraz (dla swinging door) po ostatnim zapisanym punkcie.
+
+    :param policy: Polityka, z którą zapisano punkty (None - odczyty zapisywane bez redukcji: wartość
+                   ostatniego punktu)
+    """
+    max_gap = policy.max_silence_us if policy is not None else None
+    linear = policy is not None and policy.mode == "swinging_door"
+    result: List[Optional[float]] = []
+    for t in query_us:
+        index = bisect.bisect_right(stored_us, t) - 1
+        if index < 0:
+            result.append(None)
+            continue
+        t0, v0 = stored_us[index], stored_values[index]
+        if t == t0 or not linear:
+            result.append(v0 if max_gap is None or t - t0 <= max_gap else None)
+            continue
+        if index + 1 >= len(stored_us):
+            result.append(None)  # Odcinek jeszcze niezamknięty zapisem kolejnego punktu
+            continue
+        t1, v1 = stored_us[index + 1], stored_values[index + 1]
+        if max_gap is not None and t1 - t0 > max_gap:
+            result.append(None)
+            continue
+        result.append(v0 + (v1 - v0) * (t - t0) / (t1 - t0))
+    return result